@@ -0,0 +1,35 @@
+"""add market_seed to matches
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+新增字段：
+- matches.market_seed — 行情随机种子（模拟行情的生成种子 / 真实行情的截取种子），用于精确复现
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+
+def _table_columns(conn, table_name: str):
+    return [c["name"] for c in inspect(conn).get_columns(table_name)]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    cols = _table_columns(conn, "matches")
+    with op.batch_alter_table("matches") as batch_op:
+        if "market_seed" not in cols:
+            batch_op.add_column(sa.Column("market_seed", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("matches") as batch_op:
+        batch_op.drop_column("market_seed")
@@ -0,0 +1,55 @@
+"""add match_jobs
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+新增表：
+- match_jobs — 持久化比赛任务队列（状态、任务参数、重试次数、租约与心跳）
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "005"
+down_revision = "004"
+branch_labels = None
+depends_on = None
+
+
+def _table_names(conn):
+    return inspect(conn).get_table_names()
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if "match_jobs" in _table_names(conn):
+        return
+    op.create_table(
+        "match_jobs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "match_id",
+            sa.String(36),
+            sa.ForeignKey("matches.id", ondelete="CASCADE"),
+            nullable=False,
+            unique=True,
+        ),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("max_attempts", sa.Integer(), nullable=True),
+        sa.Column("lease_owner", sa.String(100), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_match_jobs_status_created_at", "match_jobs", ["status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_match_jobs_status_created_at", table_name="match_jobs")
+    op.drop_table("match_jobs")
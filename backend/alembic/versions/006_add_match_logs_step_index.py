@@ -0,0 +1,31 @@
+"""add (match_id, step) index to match_logs
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+新增索引：
+- ix_match_logs_match_id_step — 按比赛读取日志时按步数键集分页 / 流式读取
+"""
+
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+
+def _table_indexes(conn, table_name: str):
+    return [i["name"] for i in inspect(conn).get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if "ix_match_logs_match_id_step" not in _table_indexes(conn, "match_logs"):
+        op.create_index("ix_match_logs_match_id_step", "match_logs", ["match_id", "step"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_match_logs_match_id_step", table_name="match_logs")
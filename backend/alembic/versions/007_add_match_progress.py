@@ -0,0 +1,45 @@
+"""add match_progress
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+新增表：
+- match_progress — 运行中比赛的最新进度快照（每场一行，供实时进度推送）
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def _table_names(conn):
+    return inspect(conn).get_table_names()
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if "match_progress" in _table_names(conn):
+        return
+    op.create_table(
+        "match_progress",
+        sa.Column(
+            "match_id",
+            sa.String(36),
+            sa.ForeignKey("matches.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("step", sa.Integer(), nullable=False),
+        sa.Column("total_steps", sa.Integer(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("match_progress")
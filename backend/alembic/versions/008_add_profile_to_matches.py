@@ -0,0 +1,35 @@
+"""add profile to matches
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+新增列：
+- matches.profile — 比赛引擎分阶段计时报告（JSON，开启 profile 时写入）
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def _table_columns(conn, table_name: str):
+    return [c["name"] for c in inspect(conn).get_columns(table_name)]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    cols = _table_columns(conn, "matches")
+    with op.batch_alter_table("matches") as batch_op:
+        if "profile" not in cols:
+            batch_op.add_column(sa.Column("profile", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("matches") as batch_op:
+        batch_op.drop_column("profile")
@@ -0,0 +1,35 @@
+"""add coin_ids to matches
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+新增列：
+- matches.coin_ids — 多资产比赛的币种 ID 列表（JSON，首个为主资产；单资产比赛为 NULL）
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def _table_columns(conn, table_name: str):
+    return [c["name"] for c in inspect(conn).get_columns(table_name)]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    cols = _table_columns(conn, "matches")
+    with op.batch_alter_table("matches") as batch_op:
+        if "coin_ids" not in cols:
+            batch_op.add_column(sa.Column("coin_ids", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("matches") as batch_op:
+        batch_op.drop_column("coin_ids")
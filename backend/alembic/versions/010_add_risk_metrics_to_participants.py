@@ -0,0 +1,57 @@
+"""add risk/return metrics to match_participants
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+新增列（引擎结算时计算并写入，排行与分析接口直接读取，不再从 value_history 重算）：
+- match_participants.sortino_ratio / calmar_ratio — 年化索提诺率 / 卡玛比率
+- match_participants.volatility — 年化波动率 (%)
+- match_participants.max_drawdown_duration — 最长回撤持续步数
+- match_participants.profit_factor — 盈亏比（没有下跌时为 NULL）
+- match_participants.avg_trade_pnl — 平均每笔交易盈亏
+- match_participants.exposure_pct / turnover — 持仓时间占比 (%) / 累计成交额
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = (
+    ("sortino_ratio", sa.Float(), "0"),
+    ("calmar_ratio", sa.Float(), "0"),
+    ("volatility", sa.Float(), "0"),
+    ("max_drawdown_duration", sa.Integer(), "0"),
+    ("profit_factor", sa.Float(), None),
+    ("avg_trade_pnl", sa.Float(), "0"),
+    ("exposure_pct", sa.Float(), "0"),
+    ("turnover", sa.Float(), "0"),
+)
+
+
+def _table_columns(conn, table_name: str):
+    return [c["name"] for c in inspect(conn).get_columns(table_name)]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    cols = _table_columns(conn, "match_participants")
+    with op.batch_alter_table("match_participants") as batch_op:
+        for name, type_, default in NEW_COLUMNS:
+            if name in cols:
+                continue
+            if default is None:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+            else:
+                batch_op.add_column(sa.Column(name, type_, nullable=False, server_default=default))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("match_participants") as batch_op:
+        for name, _, _ in reversed(NEW_COLUMNS):
+            batch_op.drop_column(name)
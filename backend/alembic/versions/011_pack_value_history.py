@@ -0,0 +1,79 @@
+"""pack match_participants.value_history
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+
+match_participants.value_history 由 JSON 数组改为压缩的二进制 float64 序列
+（编码见 app/core/series_codec.py）：新增二进制列，逐行转换已有的 JSON 数据后替换原列。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+from app.core.series_codec import decode_values, encode_values
+
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+def _column_type(conn, table_name: str, column: str):
+    for c in inspect(conn).get_columns(table_name):
+        if c["name"] == column:
+            return c["type"]
+    return None
+
+
+def _convert(conn, source_type, target_type, transform) -> None:
+    """把 value_history 逐批转换写入临时列 value_history_new"""
+    table = sa.table(
+        "match_participants",
+        sa.column("id", sa.String()),
+        sa.column("value_history", source_type),
+        sa.column("value_history_new", target_type),
+    )
+    stmt = (
+        sa.update(table)
+        .where(table.c.id == sa.bindparam("b_id"))
+        .values(value_history_new=sa.bindparam("b_value"))
+    )
+    last_id = ""
+    while True:
+        # 按主键键集分批读取，读写不共用同一个未读完的游标
+        batch = conn.execute(
+            sa.select(table.c.id, table.c.value_history)
+            .where(table.c.id > last_id, table.c.value_history.isnot(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        conn.execute(stmt, [{"b_id": row.id, "b_value": transform(row.value_history)} for row in batch])
+        last_id = batch[-1].id
+
+
+def _replace(conn, source_type, target_type, transform) -> None:
+    with op.batch_alter_table("match_participants") as batch_op:
+        batch_op.add_column(sa.Column("value_history_new", target_type, nullable=True))
+    _convert(conn, source_type, target_type, transform)
+    with op.batch_alter_table("match_participants") as batch_op:
+        batch_op.drop_column("value_history")
+        batch_op.alter_column("value_history_new", new_column_name="value_history")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    current = _column_type(conn, "match_participants", "value_history")
+    if current is None or isinstance(current, sa.LargeBinary):
+        return
+    _replace(conn, sa.JSON(), sa.LargeBinary(), lambda values: encode_values(values))
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    _replace(conn, sa.LargeBinary(), sa.JSON(), lambda blob: decode_values(blob).tolist())
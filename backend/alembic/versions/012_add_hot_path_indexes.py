@@ -0,0 +1,72 @@
+"""add secondary indexes for hot query paths
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18
+
+新增索引（match_logs(match_id, step) 已由 006 创建）：
+- match_participants(match_id) / match_participants(strategy_id) — 比赛详情与策略参赛记录
+- matches(status, created_at) — 按状态过滤的比赛列表
+- matches(created_at, id) — 比赛列表摘要的键集分页
+- strategies(user_id, created_at) / strategies(is_public, created_at) — 策略列表
+- market_data(symbol, timeframe, timestamp) — 行情查询
+
+Postgres 上以 CREATE INDEX CONCURRENTLY 在事务外创建，建索引期间不阻塞写入。
+"""
+
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_match_participants_match_id", "match_participants", ["match_id"]),
+    ("ix_match_participants_strategy_id", "match_participants", ["strategy_id"]),
+    ("ix_matches_status_created_at", "matches", ["status", "created_at"]),
+    ("ix_matches_created_at_id", "matches", ["created_at", "id"]),
+    ("ix_strategies_user_id_created_at", "strategies", ["user_id", "created_at"]),
+    ("ix_strategies_is_public_created_at", "strategies", ["is_public", "created_at"]),
+    ("ix_market_data_symbol_timeframe_timestamp", "market_data", ["symbol", "timeframe", "timestamp"]),
+)
+
+
+def _existing_indexes(conn):
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    return tables, {
+        index["name"]
+        for table in {table for _, table, _ in INDEXES} & tables
+        for index in inspector.get_indexes(table)
+    }
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    tables, existing = _existing_indexes(conn)
+    missing = [spec for spec in INDEXES if spec[1] in tables and spec[0] not in existing]
+    if not missing:
+        return
+    if conn.dialect.name == "postgresql":
+        # CONCURRENTLY 不能在事务中执行
+        with op.get_context().autocommit_block():
+            for name, table, columns in missing:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in missing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    _, existing = _existing_indexes(conn)
+    present = [spec for spec in INDEXES if spec[0] in existing]
+    if conn.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _ in present:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in present:
+            op.drop_index(name, table_name=table)
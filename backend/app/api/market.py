@@ -34,7 +34,7 @@ async def get_coin_ohlc(coin_id: str, days: int = 30, steps: int = 100):
             "symbol": CoinGeckoFetcher.coin_symbol(coin_id),
             "days": days,
             "count": len(klines),
-            "klines": klines,
+            "klines": klines.to_rows(),
         }
     except Exception as e:
         logger.error(f"获取 CoinGecko 数据失败 [{coin_id}]: {e}")
@@ -1,20 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import base64
+import binascii
+import json
+import secrets
+import time
+from contextlib import aclosing
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
 from pydantic import BaseModel, Field
 from loguru import logger
 
-from app.database import get_db, SessionLocal
-from app.db.crud import MatchCRUD, StrategyCRUD
-from app.db import models
-from app.models.match import Match, MatchConfig, MatchStatus
-from app.core.match_engine import MatchEngine
-from app.core.market_data import MarketDataGenerator, CoinGeckoFetcher
+from app.database import AsyncSessionLocal, SessionLocal, get_async_db
+from app.db.crud import AsyncMatchCRUD, AsyncStrategyCRUD, MatchCRUD, MatchJobCRUD
+from app.core.executor import match_executor
+from app.core.match_runner import build_job_payload
+from app.core.progress_hub import ProgressHub
+from app.core.series_codec import lttb
+from app.core.market_data import CoinGeckoFetcher
+from app.models.strategy import Strategy, StrategyType, StrategyParams
+from app.worker import get_local_worker
+from app.config import settings
 
 router = APIRouter()
 
 
-def _match_to_response(db_match, *, include_logs: bool = False):
+def _history_fields(values, points: Optional[int]) -> dict:
+    """价值序列的响应字段：给出 points 且序列更长时按 LTTB 降采样，并附带所选点的步数下标"""
+    if values is None:
+        return {"value_history": []}
+    if points is None or points >= len(values):
+        return {"value_history": values.tolist()}
+    steps, sampled = lttb(values, points)
+    return {"value_history": sampled.tolist(), "value_history_steps": steps.tolist()}
+
+
+def _match_to_response(db_match, *, include_logs: bool = False, points: Optional[int] = None):
     """统一比赛序列化，供 get_match / list_matches 复用。"""
     participants = [
         {
@@ -27,7 +50,15 @@ def _match_to_response(db_match, *, include_logs: bool = False):
             "rank": p.rank,
             "max_drawdown": p.max_drawdown,
             "sharpe_ratio": p.sharpe_ratio,
-            "value_history": p.value_history or [],
+            "sortino_ratio": p.sortino_ratio,
+            "calmar_ratio": p.calmar_ratio,
+            "volatility": p.volatility,
+            "max_drawdown_duration": p.max_drawdown_duration,
+            "profit_factor": p.profit_factor,
+            "avg_trade_pnl": p.avg_trade_pnl,
+            "exposure_pct": p.exposure_pct,
+            "turnover": p.turnover,
+            **_history_fields(p.value_history, points),
         }
         for p in db_match.participants
     ]
@@ -43,128 +74,64 @@ def _match_to_response(db_match, *, include_logs: bool = False):
             "market_type": db_match.market_type,
             "market_source": getattr(db_match, "market_source", None),
             "coin_id": getattr(db_match, "coin_id", None),
+            "coin_ids": getattr(db_match, "coin_ids", None),
+            "market_seed": getattr(db_match, "market_seed", None),
         },
         "created_at": db_match.created_at,
         "start_time": db_match.start_time,
         "end_time": db_match.end_time,
         "participants": participants,
     }
+    if getattr(db_match, "profile", None):
+        result["profile"] = db_match.profile
     if include_logs and getattr(db_match, "logs", None):
-        result["logs"] = [
-            {"step": log.step, "data": log.data}
-            for log in sorted(db_match.logs, key=lambda x: x.step)
-        ]
+        # 关系已按 step 排序加载；长比赛请使用 /{match_id}/logs 分页或流式接口
+        result["logs"] = [{"step": log.step, "data": log.data} for log in db_match.logs]
     return result
 
 
+def _load_progress(match_id: str) -> Optional[dict]:
+    """读取比赛进度快照（供 ProgressHub 在线程池中轮询，比赛不存在时返回 None）"""
+    db = SessionLocal()
+    try:
+        row = MatchCRUD.get_progress(db, match_id)
+    finally:
+        db.close()
+    if row is None:
+        return None
+    status, total_steps, progress = row
+    step = progress.step if progress else 0
+    return {
+        "match_id": match_id,
+        "status": status,
+        "step": step,
+        "total_steps": total_steps,
+        "progress_pct": round(step / total_steps * 100, 2) if total_steps else 0.0,
+        "rankings": progress.data.get("rankings", []) if progress else [],
+        "updated_at": progress.updated_at.isoformat() if progress and progress.updated_at else None,
+    }
+
+
+# 每场比赛一个轮询者，扇出给该比赛的全部 SSE 订阅者
+progress_hub = ProgressHub(_load_progress)
+
+
 class RunMatchRequest(BaseModel):
     """运行比赛请求"""
-    strategy_ids: List[str] = Field(..., min_length=2, max_length=10)
+    strategy_ids: List[str] = Field(..., min_length=2, max_length=settings.max_strategies_per_match)
     market_type: str = Field(default="random", pattern="^(random|trending|ranging)$")
     market_source: str = Field(default="simulated", pattern="^(simulated|coingecko_historical|coingecko_realtime)$")
     coin_id: str = Field(default="ethereum")
-    duration_steps: int = Field(default=100, ge=10, le=500)
+    coin_ids: Optional[List[str]] = Field(
+        default=None,
+        min_length=1,
+        max_length=settings.max_match_assets,
+        description="多资产比赛的币种 ID 列表（首个为主资产），传入时取代 coin_id；模拟行情下为各资产生成独立路径",
+    )
+    duration_steps: int = Field(default=100, ge=10, le=settings.max_match_duration_steps)
     initial_capital: float = Field(default=10000.0, ge=1000, le=1000000)
-
-
-# ==================== 后台执行函数 ====================
-
-async def _run_match_job(
-    match_id: str,
-    request: RunMatchRequest,
-    pydantic_strategies: list,
-):
-    """后台异步执行比赛（在请求返回后运行）"""
-    db = SessionLocal()
-    try:
-        MatchCRUD.update_status(db, match_id, "running")
-
-        # 生成市场数据
-        logger.info(
-            f"[{match_id}] 生成市场数据: source={request.market_source}, "
-            f"type={request.market_type}, coin={request.coin_id}, steps={request.duration_steps}"
-        )
-        if request.market_source == "coingecko_historical":
-            market_data = await CoinGeckoFetcher.fetch_historical(
-                coin_id=request.coin_id,
-                days=30,
-                steps=request.duration_steps,
-            )
-        elif request.market_source == "coingecko_realtime":
-            market_data = await CoinGeckoFetcher.fetch_realtime(
-                coin_id=request.coin_id,
-                steps=request.duration_steps,
-            )
-        elif request.market_type == "trending":
-            market_data = MarketDataGenerator.generate_trending(steps=request.duration_steps)
-        elif request.market_type == "ranging":
-            market_data = MarketDataGenerator.generate_ranging(steps=request.duration_steps)
-        else:
-            market_data = MarketDataGenerator.generate_random_walk(steps=request.duration_steps)
-
-        if len(market_data) < request.duration_steps:
-            raise ValueError(
-                f"行情数据不足: 获取到 {len(market_data)} 步，需要 {request.duration_steps} 步"
-            )
-
-        # 获取交易对名称
-        trading_pair = (
-            CoinGeckoFetcher.coin_symbol(request.coin_id)
-            if request.market_source != "simulated"
-            else "ETH/USDC"
-        )
-
-        # 初始化并执行比赛
-        match_config = MatchConfig(
-            initial_capital=request.initial_capital,
-            trading_pair=trading_pair,
-            timeframe="5m",
-            duration_steps=request.duration_steps,
-        )
-        engine = MatchEngine(match_config)
-        match = engine.initialize_match(pydantic_strategies)
-
-        for step in range(request.duration_steps):
-            current_price = market_data[step]["close"]
-            engine.execute_step(match, market_data[: step + 1], step, current_price)
-
-        results = engine.finalize_match(match)
-
-        # 构建含完整价值序列的结果
-        result_dicts = [
-            {
-                "strategy_id": r.strategy_id,
-                "final_value": r.final_value,
-                "return_pct": r.return_pct,
-                "total_trades": r.total_trades,
-                "win_trades": r.win_trades,
-                "rank": r.rank,
-                "max_drawdown": r.max_drawdown,
-                "sharpe_ratio": r.sharpe_ratio,
-                "value_history": engine.value_history.get(r.strategy_id, []),
-            }
-            for r in results
-        ]
-
-        MatchCRUD.save_results(db, match_id, result_dicts)
-        MatchCRUD.update_status(db, match_id, "completed")
-
-        # 更新策略统计
-        for result in result_dicts:
-            StrategyCRUD.update_stats(db, result["strategy_id"], result)
-
-        db.commit()
-        logger.info(f"[{match_id}] 比赛执行完成，冠军: {results[0].strategy_id} ({results[0].return_pct:+.2f}%)")
-
-    except Exception as e:
-        logger.error(f"[{match_id}] 比赛执行失败: {e}", exc_info=True)
-        try:
-            MatchCRUD.update_status(db, match_id, "failed")
-            MatchCRUD.set_error(db, match_id, str(e))
-        except Exception:
-            pass
-    finally:
-        db.close()
+    seed: Optional[int] = Field(default=None, ge=0, le=2**32 - 1, description="行情随机种子，相同种子可复现同一行情")
+    profile: Optional[bool] = Field(default=None, description="记录引擎分阶段计时，未传时取配置 MATCH_PROFILE")
 
 
 # ==================== API 路由 ====================
@@ -173,13 +140,16 @@ async def _run_match_job(
 async def run_match(
         request: RunMatchRequest,
         background_tasks: BackgroundTasks,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """提交比赛，立即返回 match_id，后台异步执行"""
     # 验证策略存在
+    if len(set(request.strategy_ids)) != len(request.strategy_ids):
+        raise HTTPException(status_code=400, detail="参赛策略不能重复")
+    found = await AsyncStrategyCRUD.get_many(db, request.strategy_ids)
     strategies = []
     for strategy_id in request.strategy_ids:
-        db_strategy = StrategyCRUD.get(db, strategy_id)
+        db_strategy = found.get(strategy_id)
         if not db_strategy:
             raise HTTPException(status_code=404, detail=f"策略不存在: {strategy_id}")
         strategies.append(db_strategy)
@@ -187,10 +157,23 @@ async def run_match(
     if len(strategies) < 2:
         raise HTTPException(status_code=400, detail="至少需要 2 个策略")
 
+    if request.coin_ids:
+        if len(set(request.coin_ids)) != len(request.coin_ids):
+            raise HTTPException(status_code=400, detail="币种不能重复")
+        supported_ids = {c["id"] for c in CoinGeckoFetcher.get_supported_coins()}
+        unsupported = [c for c in request.coin_ids if c not in supported_ids]
+        if unsupported:
+            raise HTTPException(status_code=400, detail=f"不支持的币种: {', '.join(unsupported)}")
+        request = request.model_copy(update={"coin_id": request.coin_ids[0]})
+
+    # 未指定种子时在此生成并随比赛记录保存，便于事后精确复现行情
+    if request.seed is None:
+        request = request.model_copy(update={"seed": secrets.randbits(32)})
+
     # 创建比赛记录
     trading_pair = (
         CoinGeckoFetcher.coin_symbol(request.coin_id)
-        if request.market_source != "simulated"
+        if request.market_source != "simulated" or request.coin_ids
         else "ETH/USDC"
     )
     config = {
@@ -200,14 +183,14 @@ async def run_match(
         "duration_steps": request.duration_steps,
         "market_type": request.market_type,
         "market_source": request.market_source,
-        "coin_id": request.coin_id if request.market_source != "simulated" else None,
+        "coin_id": request.coin_id if request.market_source != "simulated" or request.coin_ids else None,
+        "coin_ids": request.coin_ids,
+        "market_seed": request.seed,
     }
 
-    db_match = MatchCRUD.create(db, config=config, strategy_ids=request.strategy_ids)
-
-    # 转换为 Pydantic 模型（供后台任务使用，不依赖 DB session）
-    from app.models.strategy import Strategy, StrategyType, StrategyParams
+    db_match = await AsyncMatchCRUD.create(db, config=config, strategy_ids=request.strategy_ids)
 
+    # 策略以快照形式随任务持久化，worker 无需再查策略表
     pydantic_strategies = [
         Strategy(
             id=s.id,
@@ -224,9 +207,18 @@ async def run_match(
         )
         for s in strategies
     ]
+    # 模拟行情的时间戳锚定在提交时刻并随任务保存，任务重试时行情（含时间戳）逐位相同
+    params = {**request.model_dump(), "market_end_ms": int(time.time() * 1000)}
+    job = await db.run_sync(
+        MatchJobCRUD.enqueue,
+        db_match.id,
+        build_job_payload(params, pydantic_strategies),
+        max_attempts=settings.job_max_attempts,
+    )
 
-    # 注册后台任务并立即返回
-    background_tasks.add_task(_run_match_job, db_match.id, request, pydantic_strategies)
+    # 本地模式：在 API 进程内立即执行；worker 模式：由独立 worker 进程领取
+    if settings.match_queue_mode == "local":
+        background_tasks.add_task(get_local_worker().run_job, job.id)
 
     logger.info(f"比赛已提交后台: {db_match.id}")
     return {
@@ -237,18 +229,87 @@ async def run_match(
     }
 
 
+@router.get("/executor/stats")
+async def get_executor_stats(db: AsyncSession = Depends(get_async_db)):
+    """比赛执行器状态：本进程执行器的排队数、运行数、并发上限与利用率，以及任务队列各状态数量"""
+    return {
+        **match_executor.stats(),
+        "queue_mode": settings.match_queue_mode,
+        "jobs": await db.run_sync(MatchJobCRUD.count_by_status),
+        "progress_hub": progress_hub.stats(),
+    }
+
+
+def _encode_cursor(created_at: datetime, match_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{match_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, match_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), match_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="无效的分页游标") from None
+
+
+@router.get("/summary")
+async def list_match_summaries(
+        cursor: Optional[str] = Query(default=None, description="上一页的 next_cursor，不传为第一页"),
+        limit: int = Query(default=50, ge=1, le=200),
+        status: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """比赛列表摘要：按创建时间倒序，键集分页（不返回参赛明细与价值序列）"""
+    before = _decode_cursor(cursor) if cursor else None
+    rows = await AsyncMatchCRUD.list_summaries(db, limit=limit + 1, status=status, before=before)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {
+            "id": row.id,
+            "status": row.status,
+            "error_message": row.error_message,
+            "config": {
+                "initial_capital": row.initial_capital,
+                "trading_pair": row.trading_pair,
+                "timeframe": row.timeframe,
+                "duration_steps": row.duration_steps,
+                "market_type": row.market_type,
+                "market_source": row.market_source,
+                "coin_id": row.coin_id,
+            },
+            "created_at": row.created_at,
+            "start_time": row.start_time,
+            "end_time": row.end_time,
+            "participants_count": row.participants_count,
+            "winner": {
+                "strategy_id": row.winner_id,
+                "strategy_name": row.winner_name,
+                "return_pct": row.winner_return_pct,
+            } if row.winner_id else None,
+        }
+        for row in rows
+    ]
+    return {
+        "items": items,
+        "next_cursor": _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+    }
+
+
 @router.delete("/{match_id}")
 async def delete_match(
         match_id: str,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """删除比赛记录"""
-    db_match = MatchCRUD.get(db, match_id)
+    db_match = await AsyncMatchCRUD.get(db, match_id, load_logs=False)
     if not db_match:
         raise HTTPException(status_code=404, detail="比赛不存在")
     if db_match.status == "running":
         raise HTTPException(status_code=400, detail="比赛进行中，无法删除")
-    deleted = MatchCRUD.delete(db, match_id)
+    deleted = await AsyncMatchCRUD.delete(db, match_id)
     if not deleted:
         raise HTTPException(status_code=500, detail="删除失败")
     return {"message": "删除成功"}
@@ -258,26 +319,98 @@ async def delete_match(
 async def get_match(
         match_id: str,
         include_logs: bool = False,
-        db: Session = Depends(get_db)
+        points: Optional[int] = Query(default=None, ge=3, description="价值序列按 LTTB 降采样到的点数，不传返回完整序列"),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """获取比赛详情"""
-    db_match = MatchCRUD.get(db, match_id, load_logs=include_logs)
+    db_match = await AsyncMatchCRUD.get(db, match_id, load_logs=include_logs)
     if not db_match:
         raise HTTPException(status_code=404, detail="比赛不存在")
-    return _match_to_response(db_match, include_logs=include_logs)
+    return _match_to_response(db_match, include_logs=include_logs, points=points)
+
+
+@router.get("/{match_id}/logs")
+async def get_match_logs(
+        match_id: str,
+        after_step: int = Query(default=-1, ge=-1, description="只返回 step 大于该值的日志（上一页的 next_after_step）"),
+        limit: int = Query(default=500, ge=1, le=5000),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """按步数键集分页获取执行日志"""
+    if not await AsyncMatchCRUD.exists(db, match_id):
+        raise HTTPException(status_code=404, detail="比赛不存在")
+    logs = await AsyncMatchCRUD.get_logs_page(db, match_id, after_step=after_step, limit=limit + 1)
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    return {
+        "match_id": match_id,
+        "items": [{"step": log.step, "data": log.data} for log in logs],
+        "next_after_step": logs[-1].step if has_more else None,
+    }
+
+
+@router.get("/{match_id}/logs/stream")
+async def stream_match_logs(
+        match_id: str,
+        after_step: int = Query(default=-1, ge=-1),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """以 NDJSON 流式返回全部执行日志（每行一个 {"step", "data"}），服务端游标分块读取"""
+    if not await AsyncMatchCRUD.exists(db, match_id):
+        raise HTTPException(status_code=404, detail="比赛不存在")
+
+    async def generate():
+        # 流式响应在依赖清理之后才开始发送，使用独立会话
+        async with AsyncSessionLocal() as stream_db:
+            async for step, data in AsyncMatchCRUD.iter_logs(stream_db, match_id, after_step=after_step):
+                yield json.dumps({"step": step, "data": data}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/{match_id}/progress")
+async def get_match_progress(match_id: str):
+    """获取比赛当前进度快照：已完成步数、实时排名与各策略总价值"""
+    snapshot = await run_in_threadpool(_load_progress, match_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="比赛不存在")
+    return snapshot
+
+
+@router.get("/{match_id}/progress/stream")
+async def stream_match_progress(match_id: str, request: Request):
+    """以 Server-Sent Events 推送比赛进度（event: progress），比赛结束时发送最终状态并关闭连接"""
+    if await run_in_threadpool(_load_progress, match_id) is None:
+        raise HTTPException(status_code=404, detail="比赛不存在")
+
+    async def generate():
+        # 客户端断开时立即退订，最后一个订阅者离开后停止该比赛的轮询
+        async with aclosing(progress_hub.subscribe(match_id)) as snapshots:
+            async for snapshot in snapshots:
+                if await request.is_disconnected():
+                    break
+                yield f"event: progress\ndata: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @router.get("/")
 async def list_matches(
         skip: int = 0,
         limit: int = 100,
         status: Optional[str] = None,
-        db: Session = Depends(get_db)
+        points: Optional[int] = Query(default=None, ge=3, description="价值序列按 LTTB 降采样到的点数，不传返回完整序列"),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """获取比赛列表"""
-    db_matches = MatchCRUD.get_all(db, skip=skip, limit=limit, status=status)
+    db_matches = await AsyncMatchCRUD.get_all(db, skip=skip, limit=limit, status=status)
     out = []
     for m in db_matches:
-        r = _match_to_response(m, include_logs=False)
+        r = _match_to_response(m, include_logs=False, points=points)
         r["created_at"] = m.created_at.isoformat()
         r["start_time"] = m.start_time.isoformat() if m.start_time else None
         r["end_time"] = m.end_time.isoformat() if m.end_time else None
@@ -0,0 +1,49 @@
+from typing import Dict, Tuple
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from app.api.matches import progress_hub
+from app.core.metrics import CONTENT_TYPE, registry
+from app.database import SessionLocal
+from app.db.crud import MatchCRUD, MatchJobCRUD
+
+router = APIRouter()
+
+
+def _matches_by_status() -> Dict[Tuple[str, ...], float]:
+    db = SessionLocal()
+    try:
+        return {(status,): count for status, count in MatchCRUD.count_by_status(db).items()}
+    finally:
+        db.close()
+
+
+def _jobs_by_status() -> Dict[Tuple[str, ...], float]:
+    db = SessionLocal()
+    try:
+        return {(status,): count for status, count in MatchJobCRUD.count_by_status(db).items()}
+    finally:
+        db.close()
+
+
+# 以下指标需查询数据库或读取进程内状态，只在抓取时采集
+registry.callback_gauge("matches", "各状态比赛数", ("status",), _matches_by_status)
+registry.callback_gauge("match_jobs", "比赛任务队列各状态任务数（queued 即队列深度）", ("status",), _jobs_by_status)
+registry.callback_gauge(
+    "match_progress_subscribers",
+    "实时进度订阅者数与被订阅的比赛数",
+    ("kind",),
+    lambda: {
+        ("subscribers",): progress_hub.stats()["subscribers"],
+        ("matches",): progress_hub.stats()["matches"],
+    },
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 文本格式指标（抓取时查询数据库的指标在线程池中采集）"""
+    body = await run_in_threadpool(registry.render)
+    return Response(content=body, media_type=CONTENT_TYPE)
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from loguru import logger
 
-from app.database import get_db
-from app.db.crud import StrategyCRUD
+from app.database import get_async_db
+from app.db.crud import AsyncStrategyCRUD
 from app.db import models
 from app.models.strategy import Strategy, StrategyCreate, StrategyUpdate
 
@@ -14,11 +14,11 @@ router = APIRouter()
 @router.post("/", response_model=Strategy, status_code=201)
 async def create_strategy(
         strategy: StrategyCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """创建策略"""
     try:
-        db_strategy = StrategyCRUD.create(db, strategy)
+        db_strategy = await AsyncStrategyCRUD.create(db, strategy)
 
         # 转换为 Pydantic 模型
         return Strategy(
@@ -45,10 +45,10 @@ async def list_strategies(
         limit: int = 100,
         user_id: Optional[str] = None,
         is_public: Optional[bool] = None,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """获取策略列表"""
-    db_strategies = StrategyCRUD.get_all(
+    db_strategies = await AsyncStrategyCRUD.get_all(
         db,
         skip=skip,
         limit=limit,
@@ -77,10 +77,10 @@ async def list_strategies(
 @router.get("/{strategy_id}", response_model=Strategy)
 async def get_strategy(
         strategy_id: str,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """获取策略详情"""
-    db_strategy = StrategyCRUD.get(db, strategy_id)
+    db_strategy = await AsyncStrategyCRUD.get(db, strategy_id)
 
     if not db_strategy:
         raise HTTPException(status_code=404, detail="策略不存在")
@@ -104,10 +104,10 @@ async def get_strategy(
 async def update_strategy(
         strategy_id: str,
         strategy_update: StrategyUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """更新策略"""
-    db_strategy = StrategyCRUD.get(db, strategy_id)
+    db_strategy = await AsyncStrategyCRUD.get(db, strategy_id)
 
     if not db_strategy:
         raise HTTPException(status_code=404, detail="策略不存在")
@@ -116,7 +116,7 @@ async def update_strategy(
     # model_dump() already serializes nested Pydantic models (e.g. StrategyParams) to dicts
     update_data = strategy_update.model_dump(exclude_unset=True)
 
-    db_strategy = StrategyCRUD.update(db, strategy_id, **update_data)
+    db_strategy = await AsyncStrategyCRUD.update(db, strategy_id, **update_data)
 
     return Strategy(
         id=db_strategy.id,
@@ -136,10 +136,10 @@ async def update_strategy(
 @router.delete("/{strategy_id}", status_code=204)
 async def delete_strategy(
         strategy_id: str,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """删除策略"""
-    success = StrategyCRUD.delete(db, strategy_id)
+    success = await AsyncStrategyCRUD.delete(db, strategy_id)
 
     if not success:
         raise HTTPException(status_code=404, detail="策略不存在")
@@ -0,0 +1,86 @@
+import secrets
+import time
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from loguru import logger
+from pydantic import BaseModel, Field, ValidationError
+
+from app.config import settings
+from app.core.market_data import load_market_data
+from app.core.sweep import expand_grid, grid_size, run_sweep_async
+from app.models.strategy import StrategyType
+from app.models.sweep import ParamGrid
+
+router = APIRouter()
+
+
+class SweepRequest(BaseModel):
+    """参数扫描请求：同一段行情上回测一种策略的全部参数组合"""
+    strategy_type: StrategyType
+    grid: ParamGrid
+    market_type: str = Field(default="random", pattern="^(random|trending|ranging)$")
+    market_source: str = Field(default="simulated", pattern="^(simulated|coingecko_historical|coingecko_realtime)$")
+    coin_id: str = Field(default="ethereum")
+    duration_steps: int = Field(default=1000, ge=10, le=settings.max_sweep_steps)
+    initial_capital: float = Field(default=10000.0, ge=1000, le=1000000)
+    seed: Optional[int] = Field(default=None, ge=0, le=2**32 - 1, description="行情随机种子，相同种子可复现同一行情")
+    sort_by: str = Field(default="return_pct", pattern="^(return_pct|sharpe_ratio|sortino_ratio|calmar_ratio|max_drawdown|total_trades)$")
+    top: int = Field(default=100, ge=1, le=settings.max_sweep_combinations, description="返回排名前 N 的组合")
+
+
+@router.post("/")
+async def run_parameter_sweep(request: SweepRequest):
+    """参数扫描：展开参数网格，在同一段行情上回测全部组合，返回排名结果表（不创建策略记录）"""
+    if request.strategy_type == StrategyType.CUSTOM:
+        raise HTTPException(status_code=400, detail="自定义策略不支持参数扫描")
+
+    combinations = grid_size(request.grid)
+    if combinations > settings.max_sweep_combinations:
+        raise HTTPException(
+            status_code=400,
+            detail=f"参数组合过多: {combinations} > {settings.max_sweep_combinations}",
+        )
+    try:
+        params_list = expand_grid(request.grid)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"参数组合不合法: {e.errors()[0]['msg']}")
+
+    seed = request.seed if request.seed is not None else secrets.randbits(32)
+    try:
+        market_data = await load_market_data(
+            request.market_source,
+            request.market_type,
+            request.coin_id,
+            request.duration_steps,
+            seed=seed,
+        )
+    except Exception as e:
+        logger.error(f"参数扫描获取行情失败: {e}")
+        raise HTTPException(status_code=502, detail=f"获取行情数据失败: {str(e)}")
+
+    started = time.perf_counter()
+    # 计算密集：各块提交到共享的比赛执行器，与比赛共用有界并发，不阻塞事件循环
+    rows = await run_sweep_async(
+        request.strategy_type,
+        params_list,
+        market_data,
+        initial_capital=request.initial_capital,
+        sort_by=request.sort_by,
+    )
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    return {
+        "strategy_type": request.strategy_type,
+        "combinations": combinations,
+        "sort_by": request.sort_by,
+        "elapsed_ms": elapsed_ms,
+        "market": {
+            "market_source": request.market_source,
+            "market_type": request.market_type,
+            "coin_id": request.coin_id if request.market_source != "simulated" else None,
+            "duration_steps": request.duration_steps,
+            "market_seed": seed,
+        },
+        "results": [row.model_dump() for row in rows[: request.top]],
+    }
@@ -33,6 +33,7 @@ class Settings(BaseSettings):
 
     # 数据库配置
     database_url: str = "sqlite:///./data/agent_arena.db"
+    async_database_url: Optional[str] = None  # API 路由使用的异步连接串，未设置时由 database_url 推导（aiosqlite / asyncpg）
     db_pool_size: int = 5
     db_max_overflow: int = 10
     db_pool_timeout: int = 30
@@ -67,9 +68,33 @@ class Settings(BaseSettings):
     redis_url: Optional[str] = "redis://localhost:6379/0"
 
     # 比赛配置
-    max_strategies_per_match: int = 10
-    max_match_duration_steps: int = 500
+    max_strategies_per_match: int = 1000  # 单场比赛参赛策略数上限（引擎状态为按策略下标的数组，可容纳大规模种群）
+    max_match_assets: int = 5  # 多资产比赛（coin_ids）的币种数上限
+    max_match_duration_steps: int = 10000
     default_initial_capital: float = 10000.0
+    match_log_every: int = 10  # 无成交的步每隔多少步写一条执行日志快照（有成交或止损止盈的步总是记录），0 表示不记录
+    match_log_batch_size: int = 5000  # 执行日志批量写入的批大小
+    worker_metrics_port: int = 0  # 独立 worker 进程暴露 Prometheus 指标的端口，0 表示不开启
+    match_profile: bool = False  # 默认记录比赛引擎分阶段计时（单场比赛也可通过请求参数 profile 开启）
+    progress_every_steps: int = 500  # 比赛进度快照：每隔多少步发送一次
+    progress_interval_ms: int = 250  # 或距上次发送超过多少毫秒
+    progress_poll_ms: int = 500  # API 进度推送轮询间隔（每场比赛一个轮询者）
+    match_workers: int = 2  # 比赛计算进程数，0 表示在 API 进程的线程池中执行
+    max_concurrent_matches: int = 0  # 同时运行的比赛数上限，0 表示与进程数相同
+
+    # 比赛任务队列：local = API 进程内执行（并接管遗留任务），worker = 由 python -m app.worker 执行
+    match_queue_mode: str = "local"
+    worker_concurrency: int = 2  # 每个 worker 进程同时执行的任务数
+    job_lease_seconds: float = 60.0
+    job_heartbeat_seconds: float = 15.0
+    job_poll_seconds: float = 1.0
+    job_max_attempts: int = 3
+
+    # 参数扫描配置
+    max_sweep_combinations: int = 5000
+    max_sweep_steps: int = 100000
+    sweep_workers: int = 0  # 脚本中 run_sweep 的进程数，0 表示 CPU 核数，1 表示在当前进程执行（API 扫描走 match_executor）
+    sweep_chunk_size: int = 50  # 每个进程任务包含的参数组合数
 
     # 兼容旧配置
     initial_capital: float = 10000.0
@@ -0,0 +1,145 @@
+"""列式执行日志
+
+每个策略一份 ExecutionLog，按步追加定长数值（array.array 存储，无逐步 dict）：
+- step: int64 步数
+- action: int8 操作代码（0=hold，1=buy，2=sell）
+- asset_index: int8 指令交易的资产在 assets 中的下标（持有为主资产）
+- amount / cash / total_value / price: float64（price 为所交易资产的价格）
+- position: float64，每行依次存放 assets 中各资产的持仓数量
+
+只有在 API 输出等确实需要时才通过 row() / rows() 构造与旧版一致的 dict 行。
+"""
+import heapq
+from array import array
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+ACTION_HOLD = 0
+ACTION_BUY = 1
+ACTION_SELL = 2
+
+ACTION_CODES = {"hold": ACTION_HOLD, "buy": ACTION_BUY, "sell": ACTION_SELL}
+ACTION_NAMES = ("hold", "buy", "sell")
+
+
+class ExecutionLog:
+    """单个策略的列式执行日志"""
+
+    __slots__ = (
+        "strategy_id", "assets", "step", "action", "asset_index",
+        "amount", "cash", "position", "total_value", "price",
+    )
+
+    FLOAT_FIELDS = ("amount", "cash", "position", "total_value", "price")
+
+    def __init__(self, strategy_id: str, assets: Union[str, Sequence[str]] = "ETH"):
+        self.strategy_id = strategy_id
+        self.assets = (assets,) if isinstance(assets, str) else tuple(assets)
+        self.step = array("q")
+        self.action = array("b")
+        self.asset_index = array("b")
+        self.amount = array("d")
+        self.cash = array("d")
+        self.position = array("d")
+        self.total_value = array("d")
+        self.price = array("d")
+
+    @property
+    def asset(self) -> str:
+        """主资产"""
+        return self.assets[0]
+
+    def append(
+        self,
+        step: int,
+        action: int,
+        amount: float,
+        cash: float,
+        position: Union[float, Sequence[float]],
+        total_value: float,
+        price: float,
+        asset_index: int = 0,
+    ) -> None:
+        """追加一行；单资产时 position 为数量，多资产时为按 assets 顺序的数量序列"""
+        self.step.append(step)
+        self.action.append(action)
+        self.asset_index.append(asset_index)
+        self.amount.append(amount)
+        self.cash.append(cash)
+        if len(self.assets) == 1:
+            self.position.append(position)
+        else:
+            self.position.extend(position)
+        self.total_value.append(total_value)
+        self.price.append(price)
+
+    def __len__(self) -> int:
+        return len(self.step)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """各列的 NumPy 视图（共享底层缓冲区，不复制）；多资产时 position 为 (行数, 资产数)"""
+        out = {
+            "step": np.frombuffer(self.step, dtype=np.int64) if self.step else np.empty(0, dtype=np.int64),
+            "action": np.frombuffer(self.action, dtype=np.int8) if self.action else np.empty(0, dtype=np.int8),
+            "asset_index": (
+                np.frombuffer(self.asset_index, dtype=np.int8) if self.asset_index else np.empty(0, dtype=np.int8)
+            ),
+        }
+        for name in self.FLOAT_FIELDS:
+            column = getattr(self, name)
+            out[name] = np.frombuffer(column, dtype=np.float64) if column else np.empty(0)
+        if len(self.assets) > 1:
+            out["position"] = out["position"].reshape(-1, len(self.assets))
+        return out
+
+    @property
+    def trade_count(self) -> int:
+        """非 hold 操作数（有成交的步总是记录，因此抽样记录时也与引擎的增量计数一致）"""
+        return int(np.count_nonzero(self.arrays()["action"]))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """构造单行日志 dict（与旧版 execution_log 的条目格式相同）"""
+        width = len(self.assets)
+        return {
+            "step": self.step[index],
+            "strategy_id": self.strategy_id,
+            "action": {
+                "type": ACTION_NAMES[self.action[index]],
+                "asset": self.assets[self.asset_index[index]],
+                "amount": self.amount[index],
+            },
+            "portfolio": {
+                "cash": round(self.cash[index], 2),
+                "positions": {
+                    asset: round(self.position[index * width + j], 4)
+                    for j, asset in enumerate(self.assets)
+                },
+                "total_value": round(self.total_value[index], 2),
+            },
+            "price": round(self.price[index], 2),
+        }
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in range(start, len(self) if stop is None else stop)]
+
+
+def _keyed_steps(log: ExecutionLog, order: int):
+    for i, step in enumerate(log.step):
+        yield step, order, i
+
+
+def merge_rows(logs: Iterable[ExecutionLog]) -> List[Dict[str, Any]]:
+    """按步合并多个策略的日志行（同一步内保持策略顺序）"""
+    logs = list(logs)
+    streams = [_keyed_steps(log, order) for order, log in enumerate(logs)]
+    return [logs[order].row(i) for _, order, i in heapq.merge(*streams)]
+
+
+def step_snapshots(logs: Iterable[ExecutionLog]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """逐步产出 (step, 该步各策略的日志行)，用于按步写入 match_logs（惰性构造，不一次性展开）"""
+    logs = list(logs)
+    streams = [_keyed_steps(log, order) for order, log in enumerate(logs)]
+    for step, group in groupby(heapq.merge(*streams), key=lambda key: key[0]):
+        yield step, [logs[order].row(i) for _, order, i in group]
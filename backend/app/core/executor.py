@@ -0,0 +1,132 @@
+"""比赛计算执行器
+
+比赛主循环与结算是 CPU 密集任务，不能在事件循环线程上运行。MatchExecutor 将其
+分发到进程池（settings.match_workers > 0）或线程池（= 0，测试与单进程部署使用），
+并用信号量限制同时运行的比赛数，超出部分在事件循环上排队等待。
+"""
+import asyncio
+import multiprocessing
+import queue
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.core.metrics import registry
+
+
+class MatchExecutor:
+    """有界并发的比赛执行器（进程池 / 线程池）"""
+
+    def __init__(self, workers: Optional[int] = None, max_concurrent: Optional[int] = None):
+        self.workers = settings.match_workers if workers is None else workers
+        max_concurrent = settings.max_concurrent_matches if max_concurrent is None else max_concurrent
+        # 未配置并发上限时与进程数相同（线程模式至少 1 个）
+        self.max_concurrent = max_concurrent or max(self.workers, 1)
+        self._pool: Optional[Executor] = None
+        self._manager = None
+        # 信号量绑定创建时的事件循环，循环变化（如测试中多次启动应用）时重建
+        self._semaphore: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self._busy_seconds = 0.0
+        self._started_at = time.monotonic()
+
+    @property
+    def mode(self) -> str:
+        return "process" if self.workers > 0 else "thread"
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.workers > 0:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent, thread_name_prefix="match"
+                )
+            logger.info(f"比赛执行器启动: mode={self.mode}, 并发上限={self.max_concurrent}")
+        return self._pool
+
+    def progress_channel(self) -> Any:
+        """创建供计算任务回传进度的队列：线程模式为普通队列，进程模式为跨进程的 Manager 队列"""
+        if self.workers <= 0:
+            return queue.Queue()
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager.Queue()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.max_concurrent))
+        return self._semaphore[1]
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """在执行器中运行 fn(*args)，达到并发上限时排队等待（fn 与参数需可 pickle）"""
+        semaphore = self._get_semaphore()
+        self.queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._busy_seconds += time.perf_counter() - started
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度与利用率（utilization 为当前占用的并发槽位比例）"""
+        uptime = time.monotonic() - self._started_at
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.workers > 0 else self.max_concurrent,
+            "max_concurrent": self.max_concurrent,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "utilization": round(self.running / self.max_concurrent, 4),
+            "busy_seconds": round(self._busy_seconds, 3),
+            "avg_busy_ratio": (
+                round(self._busy_seconds / (uptime * self.max_concurrent), 4) if uptime > 0 else 0.0
+            ),
+        }
+
+    def shutdown(self) -> None:
+        """关闭底层进程池/线程池（下次提交时按需重建）"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            logger.info("比赛执行器已关闭")
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+# 应用级单例
+match_executor = MatchExecutor()
+
+registry.callback_gauge(
+    "match_executor_tasks",
+    "本进程比赛执行器的排队 / 运行中任务数与并发上限",
+    ("state",),
+    lambda: {
+        ("queued",): match_executor.queued,
+        ("running",): match_executor.running,
+        ("max_concurrent",): match_executor.max_concurrent,
+    },
+)
@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+
+class KlineSeries:
+    """列式 K 线序列（struct-of-arrays）
+
+    - timestamp: int64，Unix 毫秒时间戳
+    - open/high/low/close/volume: float64
+
+    行情生成器、CoinGecko 获取器、比赛引擎与策略都直接使用数组；
+    只有在 JSON API 边界才通过 to_rows() 构造逐根 K 线的 dict。
+    """
+
+    __slots__ = ("timestamp", "open", "high", "low", "close", "volume")
+
+    PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(
+        self,
+        timestamp: Any,
+        open: Any,
+        high: Any,
+        low: Any,
+        close: Any,
+        volume: Any = None,
+    ):
+        self.close = np.asarray(close, dtype=np.float64)
+        n = len(self.close)
+        self.timestamp = np.asarray(timestamp, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.volume = (
+            np.zeros(n, dtype=np.float64) if volume is None
+            else np.asarray(volume, dtype=np.float64)
+        )
+        for name in ("timestamp",) + self.PRICE_FIELDS:
+            arr = getattr(self, name)
+            if arr.ndim != 1 or len(arr) != n:
+                raise ValueError(f"K 线字段 {name} 长度不一致: {len(arr)} != {n}")
+
+    # ==================== 构造 ====================
+
+    @classmethod
+    def empty(cls) -> "KlineSeries":
+        return cls(
+            np.empty(0, dtype=np.int64), *(np.empty(0) for _ in cls.PRICE_FIELDS)
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "KlineSeries":
+        """由逐根 K 线 dict 构造（兼容旧格式：ISO 时间戳字符串、缺省字段）
+
+        缺少 open/high/low 时以 close 代替，缺少 volume 时为 0，缺少时间戳时为 0。
+        """
+        rows = list(rows)
+        close = [float(r["close"]) for r in rows]
+        return cls(
+            [_to_epoch_ms(r.get("timestamp")) for r in rows],
+            [float(r.get("open", c)) for r, c in zip(rows, close)],
+            [float(r.get("high", c)) for r, c in zip(rows, close)],
+            [float(r.get("low", c)) for r, c in zip(rows, close)],
+            close,
+            [float(r.get("volume", 0.0)) for r in rows],
+        )
+
+    @classmethod
+    def concat(cls, parts: List["KlineSeries"]) -> "KlineSeries":
+        """按时间顺序拼接多段序列"""
+        if not parts:
+            return cls.empty()
+        return cls(
+            np.concatenate([p.timestamp for p in parts]),
+            *(np.concatenate([getattr(p, f) for p in parts]) for f in cls.PRICE_FIELDS),
+        )
+
+    # ==================== 访问 ====================
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        """整数下标返回单根 K 线 dict；切片返回共享底层数组的新序列（不复制）"""
+        if isinstance(index, slice):
+            return KlineSeries(
+                self.timestamp[index],
+                *(getattr(self, f)[index] for f in self.PRICE_FIELDS),
+            )
+        return self.row(index)
+
+    def take(self, indices: Any) -> "KlineSeries":
+        """按下标数组取子序列（复制），用于多资产按公共时间戳对齐"""
+        return KlineSeries(
+            self.timestamp[indices],
+            *(getattr(self, f)[indices] for f in self.PRICE_FIELDS),
+        )
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """构造单根 K 线 dict（仅用于兼容旧接口或 API 输出）"""
+        return {
+            "timestamp": _epoch_ms_to_iso(int(self.timestamp[index])),
+            "open": float(self.open[index]),
+            "high": float(self.high[index]),
+            "low": float(self.low[index]),
+            "close": float(self.close[index]),
+            "volume": float(self.volume[index]),
+        }
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """转换为 JSON 友好的 K 线 dict 列表（API 边界使用）"""
+        columns = [getattr(self, f).tolist() for f in self.PRICE_FIELDS]
+        return [
+            {
+                "timestamp": _epoch_ms_to_iso(ts),
+                "open": o,
+                "high": h,
+                "low": lo,
+                "close": c,
+                "volume": v,
+            }
+            for ts, o, h, lo, c, v in zip(self.timestamp.tolist(), *columns)
+        ]
+
+    def __repr__(self) -> str:
+        return f"<KlineSeries len={len(self)}>"
+
+
+def _to_epoch_ms(value: Optional[Union[int, float, str, datetime]]) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def _epoch_ms_to_iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts / 1000).isoformat()
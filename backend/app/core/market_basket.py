@@ -0,0 +1,116 @@
+"""多资产行情篮子
+
+- MarketBasket: 按公共时间戳对齐的一组 KlineSeries（资产符号 → 序列），首个资产为主资产；
+  closes 为 (步数, 资产数) 的收盘价矩阵，每步取一行即为引擎估值与风控使用的价格向量
+- BasketView: 多资产行情视图。本身是主资产的 MarketView（单资产策略无需改动），
+  另可通过 asset(symbol) 读取其他资产的视图、通过 prices 读取当前步的价格向量
+"""
+from functools import reduce
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.core.kline_series import KlineSeries
+from app.core.market_view import MarketView
+
+
+class MarketBasket:
+    """按时间戳对齐的多资产行情（各序列长度与时间戳完全一致）"""
+
+    __slots__ = ("assets", "series", "closes")
+
+    def __init__(self, series: Mapping[str, KlineSeries]):
+        if not series:
+            raise ValueError("行情篮子至少需要一个资产")
+        self.assets: Tuple[str, ...] = tuple(series)
+        self.series: Dict[str, KlineSeries] = dict(series)
+        timestamp = self.primary.timestamp
+        for asset, s in self.series.items():
+            if len(s) != len(timestamp) or not np.array_equal(s.timestamp, timestamp):
+                raise ValueError(f"资产 {asset} 的时间戳未与主资产对齐")
+        # 每步一行的价格向量（C 连续，按行读取无需复制）
+        self.closes = np.ascontiguousarray(
+            np.column_stack([s.close for s in self.series.values()])
+        )
+
+    @classmethod
+    def align(cls, series: Mapping[str, KlineSeries]) -> "MarketBasket":
+        """取各序列时间戳的交集对齐（各序列时间戳需升序且无重复）"""
+        common = reduce(np.intersect1d, (s.timestamp for s in series.values()))
+        aligned = {}
+        for asset, s in series.items():
+            if len(s) == len(common):
+                aligned[asset] = s
+            else:
+                aligned[asset] = s.take(np.searchsorted(s.timestamp, common))
+        return cls(aligned)
+
+    @classmethod
+    def single(cls, asset: str, series: KlineSeries) -> "MarketBasket":
+        return cls({asset: series})
+
+    @property
+    def primary(self) -> KlineSeries:
+        """主资产序列"""
+        return self.series[self.assets[0]]
+
+    def __len__(self) -> int:
+        return len(self.primary)
+
+    def __getitem__(self, index: slice) -> "MarketBasket":
+        """切片返回共享底层数组的新篮子"""
+        return MarketBasket({asset: s[index] for asset, s in self.series.items()})
+
+    def __repr__(self) -> str:
+        return f"<MarketBasket assets={','.join(self.assets)} len={len(self)}>"
+
+
+class BasketView(MarketView):
+    """多资产行情视图：列式属性与切片均为主资产，其他资产的视图随 advance_to 同步原地推进
+
+    与 MarketView 相同是由引擎推进的游标：本视图与 asset(symbol) 返回的视图只在当步有效，
+    策略需要跨步保留时保存 asset(symbol)[:] 切片或列式数组
+    """
+
+    __slots__ = ("_basket", "_views")
+
+    def __init__(self, basket: MarketBasket, start: int = 0, stop: Optional[int] = None):
+        super().__init__(basket.primary, start, stop)
+        self._basket = basket
+        self._views = {basket.assets[0]: self}
+        for asset in basket.assets[1:]:
+            self._views[asset] = MarketView(basket.series[asset], self._start, self._stop)
+
+    def advance_to(self, length: int) -> "BasketView":
+        MarketView.advance_to(self, length)
+        if len(self._views) > 1:
+            for view in self._views.values():
+                if view is not self:
+                    view.advance_to(length)
+        return self
+
+    def rewind(self) -> "BasketView":
+        return BasketView(self._basket, self._start, self._start)
+
+    @property
+    def basket(self) -> MarketBasket:
+        return self._basket
+
+    @property
+    def assets(self) -> Tuple[str, ...]:
+        return self._basket.assets
+
+    def asset(self, symbol: str) -> MarketView:
+        """某个资产截止当前步的行情视图（共享底层数组）"""
+        try:
+            return self._views[symbol]
+        except KeyError:
+            raise KeyError(f"行情篮子中没有资产 {symbol}") from None
+
+    @property
+    def prices(self) -> np.ndarray:
+        """当前步（可见区间最后一根）各资产的收盘价向量，顺序与 assets 一致"""
+        return self._basket.closes[self._stop - 1]
+
+    def __repr__(self) -> str:
+        return f"<BasketView [{self._start}:{self._stop}] assets={','.join(self.assets)}>"
@@ -1,82 +1,135 @@
+import asyncio
 import numpy as np
 import httpx
 import json
 import time
 from pathlib import Path
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Sequence, Union
+
+from app.core.kline_series import KlineSeries
+from app.core.market_basket import MarketBasket
+from app.core.metrics import COINGECKO_CACHE, COINGECKO_FETCH_DURATION
+
+
+# 随机源：可传入整数种子或现成的 np.random.Generator；均未传时使用新的随机熵
+SeedLike = Optional[Union[int, np.random.Generator]]
+
+# 模拟价格下限
+MIN_SIMULATED_PRICE = 100.0
+
+
+def make_rng(seed: SeedLike = None) -> np.random.Generator:
+    """将种子统一为独立的 np.random.Generator（不使用全局 RNG，可并行、可复现）"""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
 
 
 class MarketDataGenerator:
-    """市场数据生成器（模拟）"""
+    """市场数据生成器（模拟）
+
+    所有生成器一次性向量化构造整条路径，随机数来自显式传入的 seed / Generator：
+    相同种子、相同参数生成完全一致的 OHLCV 序列。
+    """
 
     @staticmethod
     def generate_random_walk(
             initial_price: float = 2000.0,
             steps: int = 100,
             volatility: float = 0.02,
-            trend: float = 0.0
-    ) -> List[Dict[str, Any]]:
-        """生成随机游走价格数据"""
-        prices = [initial_price]
-
-        for _ in range(steps - 1):
-            change = np.random.normal(trend, volatility)
-            new_price = prices[-1] * (1 + change)
-            prices.append(max(new_price, 100))  # 价格不低于 100
-
-        # 生成 K 线数据
-        klines = []
-        base_time = datetime.now() - timedelta(minutes=steps * 5)
-
-        for i, price in enumerate(prices):
-            klines.append({
-                "timestamp": (base_time + timedelta(minutes=i * 5)).isoformat(),
-                "open": round(price * (1 + np.random.uniform(-0.005, 0.005)), 2),
-                "high": round(price * (1 + abs(np.random.uniform(0, 0.01))), 2),
-                "low": round(price * (1 - abs(np.random.uniform(0, 0.01))), 2),
-                "close": round(price, 2),
-                "volume": round(np.random.uniform(100, 1000), 2)
-            })
+            trend: float = 0.0,
+            *,
+            seed: SeedLike = None,
+            end_ms: Optional[int] = None,
+    ) -> KlineSeries:
+        """生成随机游走价格数据（价格不低于 MIN_SIMULATED_PRICE）"""
+        rng = make_rng(seed)
+        changes = rng.normal(trend, volatility, size=max(steps - 1, 0))
+        # 逐步 p[t] = max(p[t-1] * (1 + c[t]), floor) 在对数空间是带反射下界的随机游走，
+        # 其闭式解 W[t] = S[t] - min(-W[0], min(S[1..t])) 可用累加和与前缀最小值一次算出
+        log_floor = np.log(MIN_SIMULATED_PRICE)
+        log_returns = np.log1p(np.maximum(changes, -1.0 + 1e-12))
+        cum = np.cumsum(log_returns)
+        w0 = np.log(initial_price) - log_floor
+        excess = cum - np.minimum(np.minimum.accumulate(cum), -w0)
+        prices = np.empty(steps)
+        prices[:1] = initial_price
+        prices[1:] = np.exp(log_floor + excess)
 
-        return klines
+        return MarketDataGenerator._build_klines(prices, rng, end_ms)
 
     @staticmethod
     def generate_trending(
             initial_price: float = 2000.0,
             steps: int = 100,
             trend: float = 0.001,  # 每步 0.1% 上涨
-            volatility: float = 0.015
-    ) -> List[Dict[str, Any]]:
+            volatility: float = 0.015,
+            *,
+            seed: SeedLike = None,
+            end_ms: Optional[int] = None,
+    ) -> KlineSeries:
         """生成趋势行情"""
         return MarketDataGenerator.generate_random_walk(
-            initial_price, steps, volatility, trend
+            initial_price, steps, volatility, trend, seed=seed, end_ms=end_ms
         )
 
     @staticmethod
     def generate_ranging(
             center_price: float = 2000.0,
             steps: int = 100,
-            range_pct: float = 0.05  # 5% 震荡范围
-    ) -> List[Dict[str, Any]]:
+            range_pct: float = 0.05,  # 5% 震荡范围
+            *,
+            seed: SeedLike = None,
+            end_ms: Optional[int] = None,
+    ) -> KlineSeries:
         """生成震荡行情"""
-        klines = []
-        base_time = datetime.now() - timedelta(minutes=steps * 5)
-
-        for i in range(steps):
-            # 在中心价格附近震荡
-            price = center_price * (1 + np.random.uniform(-range_pct, range_pct))
-
-            klines.append({
-                "timestamp": (base_time + timedelta(minutes=i * 5)).isoformat(),
-                "open": round(price * (1 + np.random.uniform(-0.005, 0.005)), 2),
-                "high": round(price * (1 + abs(np.random.uniform(0, 0.01))), 2),
-                "low": round(price * (1 - abs(np.random.uniform(0, 0.01))), 2),
-                "close": round(price, 2),
-                "volume": round(np.random.uniform(100, 1000), 2)
-            })
+        rng = make_rng(seed)
+        # 在中心价格附近震荡
+        prices = center_price * (1 + rng.uniform(-range_pct, range_pct, size=steps))
+        return MarketDataGenerator._build_klines(prices, rng, end_ms)
 
-        return klines
+    @staticmethod
+    def generate(
+            market_type: str,
+            steps: int,
+            *,
+            seed: SeedLike = None,
+            end_ms: Optional[int] = None,
+    ) -> KlineSeries:
+        """按行情类型（random / trending / ranging）生成模拟行情"""
+        if market_type == "trending":
+            return MarketDataGenerator.generate_trending(steps=steps, seed=seed, end_ms=end_ms)
+        if market_type == "ranging":
+            return MarketDataGenerator.generate_ranging(steps=steps, seed=seed, end_ms=end_ms)
+        return MarketDataGenerator.generate_random_walk(steps=steps, seed=seed, end_ms=end_ms)
+
+    @staticmethod
+    def _build_klines(
+            prices: np.ndarray,
+            rng: np.random.Generator,
+            end_ms: Optional[int] = None,
+    ) -> KlineSeries:
+        """由收盘价序列生成 5 分钟 K 线（时间戳为 Unix 毫秒，默认截止到当前时刻）"""
+        steps = len(prices)
+        interval_ms = 5 * 60 * 1000
+        if end_ms is None:
+            end_ms = int(time.time() * 1000)
+        timestamps = (end_ms - steps * interval_ms) + np.arange(steps, dtype=np.int64) * interval_ms
+
+        jitter = rng.uniform(0.0, 1.0, size=(4, steps))
+        opens = prices * (1 + (jitter[0] * 0.01 - 0.005))
+        highs = prices * (1 + jitter[1] * 0.01)
+        lows = prices * (1 - jitter[2] * 0.01)
+        volumes = 100 + jitter[3] * 900
+
+        return KlineSeries(
+            timestamps,
+            np.round(opens, 2),
+            np.round(highs, 2),
+            np.round(lows, 2),
+            np.round(prices, 2),
+            np.round(volumes, 2),
+        )
 
 
 class CoinGeckoFetcher:
@@ -123,74 +176,122 @@ class CoinGeckoFetcher:
             json.dump(data, f)
 
     @classmethod
-    def _convert_ohlc(cls, raw: List) -> List[Dict[str, Any]]:
-        """将 CoinGecko OHLC 格式转换为内部 K 线格式
+    def _convert_ohlc(cls, raw: List, seed: SeedLike = None) -> KlineSeries:
+        """将 CoinGecko OHLC 格式转换为列式 K 线
         CoinGecko 返回: [[timestamp_ms, open, high, low, close], ...]
         """
-        klines = []
-        for candle in raw:
-            ts = datetime.fromtimestamp(candle[0] / 1000)
-            open_, high, low, close = (float(candle[i]) for i in range(1, 5))
-            klines.append({
-                "timestamp": ts.isoformat(),
-                "open": round(open_, 6),
-                "high": round(high, 6),
-                "low": round(low, 6),
-                "close": round(close, 6),
-                # OHLC 接口不含成交量，用随机值模拟
-                "volume": round(abs(np.random.normal(500, 200)), 2),
-            })
-        return klines
+        if not raw:
+            return KlineSeries.empty()
+        arr = np.asarray(raw, dtype=np.float64)
+        return KlineSeries(
+            arr[:, 0].astype(np.int64),
+            np.round(arr[:, 1], 6),
+            np.round(arr[:, 2], 6),
+            np.round(arr[:, 3], 6),
+            np.round(arr[:, 4], 6),
+            # OHLC 接口不含成交量，用随机值模拟
+            np.round(np.abs(make_rng(seed).normal(500, 200, size=len(arr))), 2),
+        )
+
+    @classmethod
+    async def _fetch_raw(cls, coin_id: str, days: int) -> List:
+        """获取原始 OHLC 列表（带磁盘缓存）"""
+        raw = cls._load_cache(coin_id, days)
+        COINGECKO_CACHE.inc("hit" if raw is not None else "miss")
+        if raw is None:
+            started = time.perf_counter()
+            result = "error"
+            try:
+                async with httpx.AsyncClient(timeout=15.0) as client:
+                    resp = await client.get(
+                        f"{cls.BASE_URL}/coins/{coin_id}/ohlc",
+                        params={"vs_currency": "usd", "days": str(days)},
+                        headers={"Accept": "application/json"},
+                    )
+                    resp.raise_for_status()
+                    raw = resp.json()
+                result = "ok"
+            finally:
+                COINGECKO_FETCH_DURATION.observe(time.perf_counter() - started, result)
+            cls._save_cache(coin_id, days, raw)
+        return raw
+
+    @staticmethod
+    def _pad(klines: KlineSeries, steps: int, rng: np.random.Generator, end_ms: Optional[int] = None) -> KlineSeries:
+        """数据不足 steps 时用最后一根收盘价起步的模拟数据补足"""
+        if len(klines) >= steps:
+            return klines
+        last_price = float(klines.close[-1]) if len(klines) else 2000.0
+        extra = MarketDataGenerator.generate_random_walk(
+            initial_price=last_price,
+            steps=steps - len(klines) + 1,
+            seed=rng,
+            end_ms=end_ms,
+        )
+        return KlineSeries.concat([klines, extra[1:]])  # 避免首尾重复
 
     @classmethod
     async def fetch_historical(
-        cls, coin_id: str, days: int = 30, steps: int = 100
-    ) -> List[Dict[str, Any]]:
+        cls, coin_id: str, days: int = 30, steps: int = 100, seed: SeedLike = None
+    ) -> KlineSeries:
         """获取历史 OHLC 数据（带磁盘缓存）
 
         Args:
             coin_id: CoinGecko 币种 ID（如 "bitcoin"）
             days: 获取天数（1/7/14/30/90/180/365）
             steps: 需要的步数，超出则随机截取一段
+            seed: 随机种子（决定截取位置、模拟成交量与补足数据），便于复现
 
         Returns:
-            长度为 steps 的 K 线列表
+            长度为 steps 的列式 K 线序列
         """
-        raw = cls._load_cache(coin_id, days)
-        if raw is None:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                resp = await client.get(
-                    f"{cls.BASE_URL}/coins/{coin_id}/ohlc",
-                    params={"vs_currency": "usd", "days": str(days)},
-                    headers={"Accept": "application/json"},
-                )
-                resp.raise_for_status()
-                raw = resp.json()
-            cls._save_cache(coin_id, days, raw)
-
-        klines = cls._convert_ohlc(raw)
-
-        # 截取所需步数
-        if len(klines) < steps:
-            # 数据不足时用最后一根收盘价补充模拟数据
-            last_price = klines[-1]["close"] if klines else 2000.0
-            extra = MarketDataGenerator.generate_random_walk(
-                initial_price=last_price,
-                steps=steps - len(klines) + 1,
-            )
-            klines = klines + extra[1:]  # 避免首尾重复
+        raw = await cls._fetch_raw(coin_id, days)
+        rng = make_rng(seed)
+        klines = cls._pad(cls._convert_ohlc(raw, rng), steps, rng)
         if len(klines) == steps:
             return klines
         # 从随机起始位置截取连续 steps 段
-        start = int(np.random.randint(0, len(klines) - steps))
+        start = int(rng.integers(0, len(klines) - steps))
         return klines[start: start + steps]
 
+    @classmethod
+    async def fetch_basket(
+        cls, coin_ids: Sequence[str], days: int = 30, steps: int = 100, seed: SeedLike = None
+    ) -> MarketBasket:
+        """并发获取多个币种的历史 OHLC，按公共时间戳对齐后截取同一段 steps 步
+
+        截取位置对所有资产相同；对齐后不足 steps 时各资产在同一时间网格上补足模拟数据。
+        """
+        raws = await asyncio.gather(*(cls._fetch_raw(coin_id, days) for coin_id in coin_ids))
+        rng = make_rng(seed)
+        basket = MarketBasket.align({
+            cls.symbol(coin_id): cls._convert_ohlc(raw, rng)
+            for coin_id, raw in zip(coin_ids, raws)
+        })
+        if len(basket) < steps:
+            end_ms = int(time.time() * 1000)
+            basket = MarketBasket({
+                asset: cls._pad(series, steps, rng, end_ms) for asset, series in basket.series.items()
+            })
+        if len(basket) == steps:
+            return basket
+        start = int(rng.integers(0, len(basket) - steps))
+        return basket[start: start + steps]
+
     @classmethod
     async def fetch_realtime(
-        cls, coin_id: str, steps: int = 100
-    ) -> List[Dict[str, Any]]:
+        cls, coin_id: str, steps: int = 100, seed: SeedLike = None
+    ) -> KlineSeries:
         """获取近 1 天的 OHLC 作为实时行情（基于 days=1 的最新数据）"""
-        return await cls.fetch_historical(coin_id, days=1, steps=steps)
+        return await cls.fetch_historical(coin_id, days=1, steps=steps, seed=seed)
+
+    @classmethod
+    def symbol(cls, coin_id: str) -> str:
+        """根据 coin_id 返回资产符号，例如 BTC（未收录的币种取 ID 的大写）"""
+        for c in cls.SUPPORTED_COINS:
+            if c["id"] == coin_id:
+                return c["symbol"]
+        return coin_id.upper()
 
     @classmethod
     def coin_symbol(cls, coin_id: str) -> str:
@@ -199,3 +300,76 @@ class CoinGeckoFetcher:
             if c["id"] == coin_id:
                 return f"{c['symbol']}/USDT"
         return "CRYPTO/USDT"
+
+
+async def load_market_data(
+    market_source: str,
+    market_type: str,
+    coin_id: str,
+    steps: int,
+    seed: SeedLike = None,
+    end_ms: Optional[int] = None,
+) -> KlineSeries:
+    """按行情来源加载长度为 steps 的 K 线序列（比赛与参数扫描共用）
+
+    Args:
+        market_source: simulated / coingecko_historical / coingecko_realtime
+        market_type: 模拟行情类型（random / trending / ranging），仅 simulated 使用
+        coin_id: CoinGecko 币种 ID，仅 coingecko_* 使用
+        steps: 步数
+        seed: 随机种子（决定价格与成交量）
+        end_ms: 模拟行情最后一根 K 线之后的截止时刻（毫秒），未传时取当前时间；
+            相同 seed 与 end_ms 生成逐位相同的序列（含时间戳）
+    """
+    if market_source == "coingecko_historical":
+        market_data = await CoinGeckoFetcher.fetch_historical(
+            coin_id=coin_id, days=30, steps=steps, seed=seed
+        )
+    elif market_source == "coingecko_realtime":
+        market_data = await CoinGeckoFetcher.fetch_realtime(
+            coin_id=coin_id, steps=steps, seed=seed
+        )
+    else:
+        market_data = MarketDataGenerator.generate(market_type, steps, seed=seed, end_ms=end_ms)
+
+    if len(market_data) < steps:
+        raise ValueError(f"行情数据不足: 获取到 {len(market_data)} 步，需要 {steps} 步")
+    return market_data
+
+
+async def load_market_basket(
+    market_source: str,
+    market_type: str,
+    coin_ids: Sequence[str],
+    steps: int,
+    seed: SeedLike = None,
+    end_ms: Optional[int] = None,
+) -> MarketBasket:
+    """按行情来源加载多资产篮子（资产符号由 coin_id 映射，首个为主资产），各资产对齐到同一时间网格
+
+    真实行情并发获取后按公共时间戳对齐；模拟行情各资产使用由 seed 派生的独立随机源
+    （主资产与单资产比赛使用同一种子，行情一致），并共享同一截止时刻 end_ms（未传时取当前时间）。
+    """
+    if market_source == "coingecko_historical":
+        basket = await CoinGeckoFetcher.fetch_basket(coin_ids, days=30, steps=steps, seed=seed)
+    elif market_source == "coingecko_realtime":
+        basket = await CoinGeckoFetcher.fetch_basket(coin_ids, days=1, steps=steps, seed=seed)
+    else:
+        end_ms = int(time.time() * 1000) if end_ms is None else end_ms
+        basket = MarketBasket({
+            CoinGeckoFetcher.symbol(coin_id): MarketDataGenerator.generate(
+                market_type, steps, seed=_asset_seed(seed, j), end_ms=end_ms
+            )
+            for j, coin_id in enumerate(coin_ids)
+        })
+
+    if len(basket) < steps:
+        raise ValueError(f"行情数据不足: 对齐后 {len(basket)} 步，需要 {steps} 步")
+    return basket
+
+
+def _asset_seed(seed: SeedLike, j: int) -> SeedLike:
+    """篮子中第 j 个资产的随机源：首个资产沿用 seed，其余由 (seed, j) 派生"""
+    if j == 0 or seed is None or isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng([seed, j])
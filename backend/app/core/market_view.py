@@ -0,0 +1,125 @@
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from app.core.kline_series import KlineSeries
+
+
+class MarketView(Sequence):
+    """行情游标视图（策略只读，由比赛主循环原地推进）
+
+    多个视图共享同一份 KlineSeries，只记录 [start, stop) 区间：
+    - 比赛主循环通过 advance_to() 原地推进同一个视图的可见长度，无需每步复制前缀。
+      因此传给 decide() 的视图只在当步有效，策略不应跨步保存它；需要保留某一步的行情时
+      保存切片（view[:] 返回区间固定的新视图）或列式数组（如 view.close），二者都不随推进变化
+    - 支持 len()、负下标与步长为 1 的切片，切片返回新的视图而非列表
+    - open/high/low/close/volume/timestamp 属性直接返回 NumPy 数组视图（零拷贝），
+      策略应优先使用列式访问；整数下标返回单根 K 线 dict，仅为兼容旧策略
+    """
+
+    __slots__ = ("_series", "_start", "_stop")
+
+    def __init__(
+        self,
+        series: Union[KlineSeries, Sequence],
+        start: int = 0,
+        stop: Optional[int] = None,
+    ):
+        if not isinstance(series, KlineSeries):
+            series = KlineSeries.from_rows(series)
+        size = len(series)
+        stop = size if stop is None else stop
+        if not 0 <= start <= stop <= size:
+            raise ValueError(f"视图区间越界: [{start}, {stop}) / {size}")
+        self._series = series
+        self._start = start
+        self._stop = stop
+
+    @classmethod
+    def wrap(cls, data: Any) -> "MarketView":
+        """将 MarketView / KlineSeries / K 线 dict 列表统一为 MarketView"""
+        if isinstance(data, MarketView):
+            return data
+        return cls(data)
+
+    def advance_to(self, length: int) -> "MarketView":
+        """将可见长度原地推进到 length（从视图起点算起），返回自身便于链式调用
+
+        持有该视图的代码随之看到新的长度；切片与列式数组不受影响
+        """
+        stop = self._start + length
+        if not self._start <= stop <= len(self._series):
+            raise ValueError(f"视图长度越界: {length}")
+        self._stop = stop
+        return self
+
+    def rewind(self) -> "MarketView":
+        """从视图起点重新开始、可见长度为 0 的新视图（共享底层数据），供逐步回放"""
+        return MarketView(self._series, self._start, self._start)
+
+    # ==================== 列式访问（零拷贝）====================
+
+    @property
+    def series(self) -> KlineSeries:
+        """底层共享的完整序列"""
+        return self._series
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self._series.timestamp[self._start:self._stop]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._series.open[self._start:self._stop]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._series.high[self._start:self._stop]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._series.low[self._start:self._stop]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._series.close[self._start:self._stop]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._series.volume[self._start:self._stop]
+
+    # ==================== Sequence 协议 ====================
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                # 非连续切片无法共享区间，退化为 K 线 dict 列表
+                return [self._series.row(self._start + i) for i in range(start, stop, step)]
+            stop = max(start, stop)
+            return MarketView(self._series, self._start + start, self._start + stop)
+        n = self._stop - self._start
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("MarketView index out of range")
+        return self._series.row(self._start + index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._start, self._stop):
+            yield self._series.row(i)
+
+    def __repr__(self) -> str:
+        return f"<MarketView [{self._start}:{self._stop}] of {len(self._series)}>"
+
+    def to_series(self) -> KlineSeries:
+        """返回可见区间对应的 KlineSeries（共享底层数组）"""
+        return self._series[self._start:self._stop]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """显式构造 K 线 dict 列表（仅在 API 输出等确实需要时使用）"""
+        return self.to_series().to_rows()
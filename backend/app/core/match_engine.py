@@ -1,12 +1,22 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime
 import math
+import time
 import uuid
+import numpy as np
 from loguru import logger
 
-from app.models.match import Match, MatchConfig, MatchResult, MatchStatus, Action
+from app.models.match import Match, MatchConfig, MatchResult, MatchStatus
 from app.models.portfolio import Portfolio
 from app.models.strategy import Strategy
+from app.core.execution_log import ACTION_CODES, ACTION_HOLD, ACTION_SELL, ExecutionLog, merge_rows
+from app.core.market_basket import BasketView
+from app.core.market_view import MarketView
+from app.core.portfolio_book import PortfolioBook, PortfolioView
+from app.core.value_metrics import steps_per_year
+from app.strategies.actions import HOLD
+from app.core.profiler import EngineProfiler
+from app.strategies.indicators import IndicatorRegistry
 from app.strategies.templates import MeanReversionStrategy, MomentumStrategy, DCAStrategy
 
 # 策略类型 → 策略类，新增策略时只需在此注册
@@ -17,8 +27,25 @@ STRATEGY_CLASSES = {
 }
 
 
+def _or_nan(value: Optional[float], transform=None) -> float:
+    """可选参数转为数组元素：未设置为 NaN"""
+    if value is None:
+        return math.nan
+    return transform(value) if transform is not None else value
+
+
+def _round_optional(value: Optional[float], digits: int) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
 class MatchEngine:
-    """比赛执行引擎（手续费与滑点从配置读取，回测更贴近实盘）"""
+    """比赛执行引擎（手续费与滑点从配置读取，回测更贴近实盘）
+
+    各策略的现金、持仓、成本、计数与价值序列存放在 PortfolioBook 的数组中，
+    每步只有 decide() 逐策略调用，风控、交易执行与估值对全部策略批量计算。
+    比赛交易 config.assets 中的资产（首个为主资产）：多资产比赛每步传入 BasketView，
+    止损止盈与估值按当步的价格向量对全部资产计算。
+    """
 
     def __init__(
         self,
@@ -26,13 +53,24 @@ class MatchEngine:
         *,
         fee_rate: Optional[float] = None,
         slippage_rate: Optional[float] = None,
+        record_log: bool = True,
+        log_every: int = 1,
+        profile: bool = False,
     ):
         self.config = match_config
-        self.portfolios: Dict[str, Portfolio] = {}
+        # 年化系数由 K 线周期换算（5m → 105120 步/年）
+        self.steps_per_year = steps_per_year(match_config.timeframe)
+        self.book: Optional[PortfolioBook] = None
         self.strategies_instances = {}
-        self.value_history: Dict[str, List[float]] = {}
-        self.cost_basis: Dict[str, Dict[str, float]] = {}
-        self.win_trade_count: Dict[str, int] = {}
+        # 每个策略一份列式执行日志；record_log=False 时只计算结果，不记录逐步日志
+        self.record_log = record_log
+        # 只有持有的步每 log_every 步记录一次；有成交或强制平仓的步与最后一步总是记录
+        self.log_every = max(int(log_every), 1)
+        self.execution_logs: Dict[str, ExecutionLog] = {}
+        # 分阶段计时（profile=True 时开启，见 core/profiler.py）
+        self.profiler: Optional[EngineProfiler] = EngineProfiler() if profile else None
+        # 比赛级共享指标：相同规格的指标每步只计算一次
+        self.indicators = IndicatorRegistry()
         # 手续费率（如 0.002 = 0.2%）、滑点率（如 0.001 = 0.1%），未传则从配置读取
         from app.config import settings
         self.fee_rate = fee_rate if fee_rate is not None else getattr(settings, "fee_rate", 0.002)
@@ -48,18 +86,17 @@ class MatchEngine:
             start_time=datetime.now()
         )
 
-        # 初始化每个策略的持仓
-        for strategy in strategies:
-            portfolio = Portfolio(
-                strategy_id=strategy.id,
-                cash=self.config.initial_capital,
-                positions={},
-                total_value=self.config.initial_capital
-            )
-            self.portfolios[strategy.id] = portfolio
-            self.value_history[strategy.id] = [self.config.initial_capital]
-            self.cost_basis[strategy.id] = {}
-            self.win_trade_count[strategy.id] = 0
+        # 所有策略的持仓状态，价值序列按比赛步数预分配
+        book = self.book = PortfolioBook(
+            [s.id for s in strategies],
+            self.config.initial_capital,
+            assets=self.config.assets,
+            capacity=self.config.duration_steps + 1,
+        )
+        primary = book.assets[0]
+        for i, strategy in enumerate(strategies):
+            if self.record_log:
+                self.execution_logs[strategy.id] = ExecutionLog(strategy.id, book.assets)
 
             # 实例化策略（通过注册表，便于扩展）
             try:
@@ -68,215 +105,522 @@ class MatchEngine:
                 raise ValueError(f"不支持的策略类型: {strategy.type}")
             strategy_instance = strategy_cls(strategy.id, strategy.params.model_dump())
 
-            strategy_instance.set_portfolio(portfolio)
+            strategy_instance.set_portfolio(PortfolioView(book, i))
+            strategy_instance.set_asset(primary)
+            strategy_instance.bind_indicators(self.indicators)
             self.strategies_instances[strategy.id] = strategy_instance
 
-        logger.info(f"比赛初始化完成: {match.id}, 参赛策略数: {len(strategies)}")
+        # 风控参数取自编译后的 StrategyConfig，按策略下标展开为数组（未设置为 NaN），每步批量检查
+        configs = [instance.config for instance in self.strategies_instances.values()]
+        self._stop_level = np.array([_or_nan(c.stop_loss, lambda v: 1.0 - v) for c in configs], dtype=np.float64)
+        self._take_profit = np.array([_or_nan(c.take_profit) for c in configs], dtype=np.float64)
+        self._max_position_pct = np.array([c.max_position_pct for c in configs], dtype=np.float64)
+        self._risk_rows = np.flatnonzero(~np.isnan(self._stop_level) | ~np.isnan(self._take_profit))
+
+        # 每步复用的指令缓冲区：只重置本步写过的下标，持有步不分配新对象
+        n = len(strategies)
+        self._decide_order = [
+            (i, strategy_id, instance)
+            for i, (strategy_id, instance) in enumerate(self.strategies_instances.items())
+        ]
+        self._kinds = [ACTION_HOLD] * n
+        self._amounts = [0.0] * n
+        self._cols = [0] * n  # 主资产
+        self._prices = np.zeros(len(book.assets))
+
+        logger.info(
+            f"比赛初始化完成: {match.id}, 参赛策略数: {len(strategies)}, "
+            f"共享指标: {self.indicators.unique_count}/{self.indicators.subscriptions}"
+        )
         return match
 
+    # ==================== 对外快照（兼容按策略 id 访问） ====================
+
+    @property
+    def portfolios(self) -> Dict[str, Portfolio]:
+        """策略 id → 当前持仓快照"""
+        book = self.book
+        return {sid: book.snapshot(i) for i, sid in enumerate(book.strategy_ids)} if book else {}
+
+    @property
+    def value_history(self) -> Dict[str, List[float]]:
+        """策略 id → 资产价值序列（首项为初始资金）"""
+        return self.book.history_lists() if self.book else {}
+
+    @property
+    def trade_count(self) -> Dict[str, int]:
+        return dict(zip(self.book.strategy_ids, self.book.trades.tolist())) if self.book else {}
+
+    @property
+    def win_trade_count(self) -> Dict[str, int]:
+        return dict(zip(self.book.strategy_ids, self.book.wins.tolist())) if self.book else {}
+
+    @property
+    def cost_basis(self) -> Dict[str, Dict[str, float]]:
+        """策略 id → {资产: 加权平均成本}（无持仓成本的资产不出现）"""
+        if self.book is None:
+            return {}
+        assets = self.book.assets
+        return {
+            sid: {asset: cost for asset, cost in zip(assets, row) if not math.isnan(cost)}
+            for sid, row in zip(self.book.strategy_ids, self.book.cost_basis.tolist())
+        }
+
+    def current_values(self) -> Dict[str, float]:
+        """策略 id → 当前总资产（进度快照用，不构造 Portfolio）"""
+        return self.book.value_map() if self.book else {}
+
+    def result_metrics(self) -> Dict[str, np.ndarray]:
+        """截至当前步按策略下标的结果指标（回撤、夏普率、索提诺率等），耗时与步数无关"""
+        return self.book.result_metrics(self.steps_per_year)
+
+    def _metric_columns(self) -> Dict[str, List[Any]]:
+        """结果指标转为 Python 列表，NaN（如没有下跌时的盈亏比）转为 None"""
+        return {
+            name: [None if v != v else v for v in values.tolist()]
+            for name, values in self.result_metrics().items()
+        }
+
+    def current_metrics(self) -> Dict[str, Dict[str, float]]:
+        """策略 id → 截至当前步的结果指标与交易次数（进度快照用）"""
+        if self.book is None:
+            return {}
+        book = self.book
+        columns = self._metric_columns()
+        columns["total_trades"] = book.trades.tolist()
+        return {
+            sid: {name: values[i] for name, values in columns.items()}
+            for i, sid in enumerate(book.strategy_ids)
+        }
+
+    # ==================== 逐步执行 ====================
+
     def execute_step(
             self,
             match: Match,
-            market_data: List[Dict[str, Any]],
+            market_data: Sequence[Dict[str, Any]],
             step: int,
-            current_price: float
+            current_price: Optional[float] = None,
     ):
-        """执行单步"""
-        for strategy_id, strategy_instance in self.strategies_instances.items():
-            portfolio = self.portfolios[strategy_id]
+        """执行单步（market_data 为截止当前步的行情，推荐传入共享缓冲区的 MarketView）
 
+        多资产比赛需传入 BasketView，价格向量取自其当前步各资产的收盘价；
+        单资产比赛的价格为 current_price（未传时取行情最后一根收盘价）。
+        """
+        market_data = MarketView.wrap(market_data)
+        book = self.book
+        prof = self.profiler
+        if prof is not None:
+            step_started = lap = time.perf_counter()
+        # 当步价格向量（顺序与 book.assets 一致）
+        prices = self._prices
+        if isinstance(market_data, BasketView):
+            if market_data.assets != book.assets:
+                raise ValueError(f"行情资产 {market_data.assets} 与比赛资产 {book.assets} 不一致")
+            np.copyto(prices, market_data.prices)
+        elif len(prices) > 1:
+            raise ValueError("多资产比赛需传入 BasketView")
+        else:
+            prices[0] = current_price if current_price is not None else market_data.close[-1]
+        # 每个唯一指标每步只更新一次，各策略直接读取共享结果
+        self.indicators.sync(market_data)
+        if prof is not None:
+            lap = prof.lap("indicators", None, lap)
+        sampled = self.record_log and (
+            step % self.log_every == 0 or step == self.config.duration_steps - 1
+        )
+        kinds = self._kinds
+        amounts = self._amounts
+        cols = self._cols
+        orders: List[int] = []   # 有买入/卖出指令的策略下标
+        touched: List[int] = []  # 记录了非零数量的持有指令或强制平仓的策略下标
+
+        # 1. 止损/止盈：对全部资产批量检查并立即平仓，触发的策略本步不再调用 decide
+        forced = ()
+        if len(self._risk_rows):
+            exit_rows, exit_cols = self._check_risk_controls(prices)
+            if len(exit_rows):
+                # 日志记录每个策略平掉的第一个资产
+                for i, col in zip(exit_rows.tolist(), exit_cols.tolist()):
+                    if kinds[i] == ACTION_HOLD:
+                        kinds[i] = ACTION_SELL
+                        amounts[i] = float(book.positions[i, col])
+                        cols[i] = col
+                        touched.append(i)
+                book.liquidate(exit_rows, exit_cols, prices, self.fee_rate, self.slippage_rate)
+                forced = set(touched)
+        if prof is not None:
+            lap = prof.lap("risk_controls", None, lap)
+
+        # 2. 策略决策：逐策略调用 decide，只收集指令（HOLD 单例直接跳过）
+        asset_index = book.asset_index
+        for i, strategy_id, strategy_instance in self._decide_order:
+            if forced and i in forced:
+                continue
             try:
-                # 1. 优先检查止损/止盈（强制平仓）
-                action = self._check_risk_controls(strategy_id, strategy_instance, current_price)
-
-                # 2. 无风控触发时交给策略决策
-                if action is None:
-                    action = strategy_instance.decide(market_data, step)
-
-                # 3. 买入时检查最大持仓比例限制
-                if action.type == "buy":
-                    max_pos_pct = strategy_instance.params.get("max_position_pct", 0.5)
-                    current_pos_value = portfolio.positions.get(action.asset, 0) * current_price
-                    max_allowed = portfolio.total_value * max_pos_pct
-                    if current_pos_value >= max_allowed:
-                        logger.debug(
-                            f"策略 {strategy_id}: 持仓已达上限 "
-                            f"({current_pos_value:.1f} >= {max_allowed:.1f})，跳过买入"
-                        )
-                        action = Action(type="hold")
-
-                # 4. 执行交易
-                if action.type == "buy":
-                    self._execute_buy(portfolio, action, current_price, strategy_id)
-                elif action.type == "sell":
-                    self._execute_sell(portfolio, action, current_price, strategy_id)
-
-                # 5. 更新持仓价值，记录历史
-                portfolio.update_value({action.asset if action.asset else "ETH": current_price})
-                self.value_history[strategy_id].append(portfolio.total_value)
-
-                # 6. 记录日志
-                match.execution_log.append({
-                    "step": step,
-                    "strategy_id": strategy_id,
-                    "action": action.model_dump(),
-                    "portfolio": {
-                        "cash": round(portfolio.cash, 2),
-                        "positions": {k: round(v, 4) for k, v in portfolio.positions.items()},
-                        "total_value": round(portfolio.total_value, 2)
-                    },
-                    "price": round(current_price, 2)
-                })
+                action = strategy_instance.decide(market_data, step)
             except Exception as e:
                 logger.error(f"策略 {strategy_id} 执行失败: {str(e)}")
-
-    def _check_risk_controls(
-            self,
-            strategy_id: str,
-            strategy_instance,
-            current_price: float
-    ) -> Optional[Action]:
-        """检查止损/止盈，触发时返回强制平仓指令，否则返回 None"""
-        stop_loss = strategy_instance.params.get("stop_loss")      # e.g. 0.05 → 跌5%止损
-        take_profit = strategy_instance.params.get("take_profit")  # e.g. 1.20 → 涨20%止盈
-
-        portfolio = self.portfolios[strategy_id]
-        eth_balance = portfolio.positions.get("ETH", 0)
-        if eth_balance <= 0:
-            return None
-
-        avg_cost = self.cost_basis[strategy_id].get("ETH")
-        if not avg_cost or avg_cost == 0:
-            return None
-
-        price_ratio = current_price / avg_cost
-
-        if stop_loss is not None and price_ratio <= (1.0 - stop_loss):
-            logger.info(
-                f"策略 {strategy_id}: 触发止损 "
-                f"(当前价 {current_price:.2f}, 成本 {avg_cost:.2f}, "
-                f"亏损 {(1 - price_ratio) * 100:.1f}%)"
-            )
-            return Action(type="sell", asset="ETH", amount=eth_balance)
-
-        if take_profit is not None and price_ratio >= take_profit:
-            logger.info(
-                f"策略 {strategy_id}: 触发止盈 "
-                f"(当前价 {current_price:.2f}, 成本 {avg_cost:.2f}, "
-                f"盈利 {(price_ratio - 1) * 100:.1f}%)"
-            )
-            return Action(type="sell", asset="ETH", amount=eth_balance)
-
-        return None
-
-    def _execute_buy(
-            self,
-            portfolio: Portfolio,
-            action: Action,
-            price: float,
-            strategy_id: str
-    ):
-        """执行买入，并更新加权平均成本"""
-        if action.amount > portfolio.cash:
-            action.amount = portfolio.cash
-
-        if action.amount < 10:
-            return
-
-        fee = action.amount * self.fee_rate
-        slippage = action.amount * self.slippage_rate
-        actual_spend = action.amount - fee - slippage
-        quantity = actual_spend / price
-
-        # 更新加权平均成本
-        old_qty = portfolio.positions.get(action.asset, 0)
-        old_cost = self.cost_basis[strategy_id].get(action.asset, price)
-        new_qty = old_qty + quantity
-        if new_qty > 0:
-            self.cost_basis[strategy_id][action.asset] = (
-                (old_qty * old_cost + quantity * price) / new_qty
+                continue
+            finally:
+                # 决策抛出异常时耗时（含日志）也计入该策略，不转嫁给下一个策略或执行阶段
+                if prof is not None:
+                    lap = prof.lap("decide", strategy_id, lap)
+            if action is HOLD:
+                continue
+            kind = self._action_code(strategy_id, action)
+            if kind is None:
+                continue
+            if kind == ACTION_HOLD:
+                if action.amount:
+                    amounts[i] = action.amount
+                    touched.append(i)
+                continue
+            if action.asset not in asset_index:
+                logger.error(f"策略 {strategy_id} 执行失败: 不支持的资产 {action.asset}")
+                continue
+            kinds[i] = kind
+            amounts[i] = action.amount
+            cols[i] = asset_index[action.asset]
+            orders.append(i)
+
+        # 3-4. 最大持仓限制、交易计数、手续费/滑点
+        if orders:
+            orders.sort()
+            book.execute(
+                orders, kinds, amounts, cols, prices,
+                self._max_position_pct, self.fee_rate, self.slippage_rate,
             )
+        if prof is not None:
+            lap = prof.lap("execute", None, lap)
+
+        # 5. 批量估值（持仓矩阵 × 价格向量），记录价值序列
+        book.revalue(prices)
+        if prof is not None:
+            lap = prof.lap("update_value", None, lap)
+
+        # 6. 记录日志：抽样步，以及任一策略成交或触发止损/止盈的步（交易记录完整）
+        if self.record_log and (
+            sampled or forced or any(kinds[i] != ACTION_HOLD for i in orders)
+        ):
+            self._log_step(step, kinds, amounts, cols, prices)
+            if prof is not None:
+                lap = prof.lap("log", None, lap)
+
+        # 重置本步写过的缓冲区
+        for i in orders:
+            kinds[i] = ACTION_HOLD
+            amounts[i] = 0.0
+            cols[i] = 0
+        for i in touched:
+            kinds[i] = ACTION_HOLD
+            amounts[i] = 0.0
+            cols[i] = 0
+        if prof is not None:
+            prof.end_step(step_started)
 
-        portfolio.cash -= action.amount
-        portfolio.positions[action.asset] = new_qty
-
-        logger.debug(
-            f"买入: {quantity:.4f} {action.asset} @ {price:.2f}, "
-            f"花费: {action.amount:.2f}, 均成本: {self.cost_basis[strategy_id][action.asset]:.2f}"
-        )
+    @staticmethod
+    def _action_code(strategy_id: str, action: Any) -> Optional[int]:
+        """解析策略返回的指令：TradeAction 直接取 code，其他对象（如 pydantic Action）按 type 解析"""
+        code = getattr(action, "code", None)
+        if code is None:
+            code = ACTION_CODES.get(getattr(action, "type", None))
+            if code is None:
+                logger.error(f"策略 {strategy_id} 执行失败: 无效的指令 {action!r}")
+                return None
+        if code != ACTION_HOLD and not action.amount >= 0:
+            logger.error(f"策略 {strategy_id} 执行失败: 无效的数量 {action.amount!r}")
+            return None
+        return code
+
+    def _log_step(
+            self, step: int, kinds: List[int], amounts: List[float], cols: List[int], prices: np.ndarray
+    ) -> None:
+        book = self.book
+        cash = book.cash.tolist()
+        totals = book.total_value.tolist()
+        price_list = prices.tolist()
+        if len(book.assets) == 1:
+            positions = book.positions[:, 0].tolist()
+        else:
+            positions = book.positions.tolist()
+        for i, log in enumerate(self.execution_logs.values()):
+            col = cols[i]
+            log.append(step, kinds[i], amounts[i], cash[i], positions[i], totals[i], price_list[col], col)
+
+    def log_rows(self) -> List[Dict[str, Any]]:
+        """按步合并各策略的执行日志为 dict 行（仅在 API 输出时构造）"""
+        if self.profiler is None:
+            return merge_rows(self.execution_logs.values())
+        with self.profiler.measure("log_build"):
+            return merge_rows(self.execution_logs.values())
+
+    # ==================== 向量化回测 ====================
+
+    def run_vectorized(self, match: Match, market: Any) -> List[MatchResult]:
+        """整段行情向量化回测（需先 initialize_match）
+
+        信号由各策略的 vector_signals() 在整段收盘价上一次算出（相同规格的指标
+        只算一次），随后用紧凑的标量循环推进现金/持仓/成本/手续费/滑点/止损止盈/
+        最大持仓限制，只在有信号或持仓需风控检查的步上执行，资产价值序列最后按
+        分段常量状态向量化还原。价值序列与结果与逐步执行逐位一致，但不生成逐步日志。
+        存在不支持向量化的策略时自动退回逐步执行。
+        """
+        view = MarketView.wrap(market)
+        close = np.ascontiguousarray(view.close, dtype=np.float64)
 
-    def _execute_sell(
+        batch_cache: Dict[Any, Any] = {}
+        plans = {}
+        for strategy_id, strategy_instance in self.strategies_instances.items():
+            series = {}
+            for name, spec in strategy_instance.required_indicators().items():
+                if spec not in batch_cache:
+                    batch_cache[spec] = spec.batch(view)
+                series[name] = batch_cache[spec]
+            signals = None
+            if all(v is not None for v in series.values()):
+                signals = strategy_instance.vector_signals(close, series)
+            if signals is None:
+                logger.info(f"策略 {strategy_id} 不支持向量化，比赛 {match.id} 退回逐步执行")
+                return self._run_stepwise(match, view)
+            plans[strategy_id] = signals
+
+        closes = close.tolist()
+        self.book.reserve(len(closes) + 1)
+        for strategy_id, signals in plans.items():
+            self._simulate_signals(strategy_id, signals, close, closes)
+
+        return self.finalize_match(match)
+
+    def _run_stepwise(self, match: Match, view: MarketView) -> List[MatchResult]:
+        """逐步执行整段行情（向量化回退路径）"""
+        market_view = view.rewind()
+        for step in range(len(view)):
+            self.execute_step(match, market_view.advance_to(step + 1), step)
+        return self.finalize_match(match)
+
+    def _simulate_signals(
             self,
-            portfolio: Portfolio,
-            action: Action,
-            price: float,
-            strategy_id: str
+            strategy_id: str,
+            signals: np.ndarray,
+            close: np.ndarray,
+            closes: List[float],
     ):
-        """执行卖出，对比成本判断盈亏"""
-        current_position = portfolio.positions.get(action.asset, 0)
-
-        if current_position <= 0:
-            return
-
-        quantity = min(action.amount, current_position)
-
-        if quantity < 0.001:
-            return
-
-        # 判断盈亏（卖出价 > 加权平均成本 → 盈利）
-        avg_cost = self.cost_basis[strategy_id].get(action.asset)
-        if avg_cost is not None and price > avg_cost:
-            self.win_trade_count[strategy_id] += 1
-
-        revenue = quantity * price
-        fee = revenue * self.fee_rate
-        slippage = revenue * self.slippage_rate
-        actual_revenue = revenue - fee - slippage
-
-        portfolio.cash += actual_revenue
-        remaining = current_position - quantity
-        if remaining < 0.0001:
-            portfolio.positions[action.asset] = 0
-            self.cost_basis[strategy_id].pop(action.asset, None)
-        else:
-            portfolio.positions[action.asset] = remaining
-
-        logger.debug(
-            f"卖出: {quantity:.4f} {action.asset} @ {price:.2f}, "
-            f"收入: {actual_revenue:.2f}, "
-            f"{'盈利' if avg_cost and price > avg_cost else '亏损'}"
-        )
+        """单个策略的状态推进循环，算术与 execute_step 的各环节逐项对应"""
+        strategy_instance = self.strategies_instances[strategy_id]
+        book = self.book
+        i = book.index[strategy_id]
+        col = book.asset_index[strategy_instance.asset]
+        config = strategy_instance.config
+        stop_loss = config.stop_loss
+        take_profit = config.take_profit
+        max_pos_pct = config.max_position_pct
+        stop_level = (1.0 - stop_loss) if stop_loss is not None else None
+        has_risk = stop_loss is not None or take_profit is not None
+        fee_rate = self.fee_rate
+        slippage_rate = self.slippage_rate
+        buy_amount = strategy_instance.buy_amount
+        sell_amount = strategy_instance.sell_amount
+
+        n = len(closes)
+        initial_value = float(book.total_value[i])
+        cash = float(book.cash[i])
+        position = float(book.positions[i, col])
+        avg_cost = float(book.cost_basis[i, col])
+        if math.isnan(avg_cost):
+            avg_cost = None
+        trades = 0
+        wins = 0
+        sells = 0
+        realized_gain = 0.0
+        realized_loss = 0.0
+        turnover = float(book.turnover[i])
+
+        # 状态变化点：从第 change_steps[i] 步起（含）的现金与持仓
+        change_steps = [0]
+        change_cash = [cash]
+        change_position = [position]
+
+        sig = signals.tolist()
+        # 无风控参数时只需访问有信号的步；有风控时持仓期间每步都要检查
+        steps = range(n) if has_risk else np.flatnonzero(signals).tolist()
+        for t in steps:
+            if not sig[t] and (not has_risk or position <= 0):
+                continue
+            price = closes[t]
+            kind = 0
+            amount = 0.0
+
+            # 1. 止损/止盈
+            if has_risk and position > 0 and avg_cost:
+                ratio = price / avg_cost
+                if (stop_level is not None and ratio <= stop_level) or (
+                        take_profit is not None and ratio >= take_profit):
+                    kind = -1
+                    amount = position
+
+            # 2. 策略信号
+            if kind == 0:
+                s = sig[t]
+                if s > 0:
+                    order = buy_amount(cash)
+                    if order is not None:
+                        kind, amount = 1, order
+                elif s < 0:
+                    order = sell_amount(position)
+                    if order is not None:
+                        kind, amount = -1, order
+                if kind == 0:
+                    continue
+
+            # 3. 最大持仓比例（上一步的总资产）
+            if kind == 1:
+                prev_total = initial_value if t == 0 else cash + position * closes[t - 1]
+                if position * price >= prev_total * max_pos_pct:
+                    continue
+
+            # 4. 执行交易
+            trades += 1
+            if kind == 1:
+                if amount > cash:
+                    amount = cash
+                if amount < 10:
+                    continue
+                fee = amount * fee_rate
+                slippage = amount * slippage_rate
+                quantity = (amount - fee - slippage) / price
+                old_cost = avg_cost if avg_cost is not None else price
+                new_qty = position + quantity
+                if new_qty > 0:
+                    avg_cost = (position * old_cost + quantity * price) / new_qty
+                cash -= amount
+                position = new_qty
+                turnover += amount
+            else:
+                if position <= 0:
+                    continue
+                quantity = amount if amount < position else position
+                if quantity < 0.001:
+                    continue
+                if avg_cost is not None and price > avg_cost:
+                    wins += 1
+                revenue = quantity * price
+                fee = revenue * fee_rate
+                slippage = revenue * slippage_rate
+                proceeds = revenue - fee - slippage
+                cash += proceeds
+                turnover += revenue
+                pnl = proceeds - quantity * avg_cost
+                sells += 1
+                if pnl > 0:
+                    realized_gain += pnl
+                else:
+                    realized_loss -= pnl
+                remaining = position - quantity
+                if remaining < 0.0001:
+                    position = 0
+                    avg_cost = None
+                else:
+                    position = remaining
+
+            change_steps.append(t)
+            change_cash.append(cash)
+            change_position.append(position)
+
+        # 分段常量状态展开为每步的现金/持仓，再一次性计算资产价值
+        bounds = np.asarray(change_steps + [n])
+        counts = np.diff(bounds)
+        cash_per_step = np.repeat(np.asarray(change_cash, dtype=np.float64), counts)
+        position_per_step = np.repeat(np.asarray(change_position, dtype=np.float64), counts)
+        values = np.empty(n + 1)
+        values[0] = initial_value
+        values[1:] = cash_per_step + position_per_step * close
+
+        book.cash[i] = cash
+        book.positions[i, col] = position
+        book.cost_basis[i, col] = math.nan if avg_cost is None else avg_cost
+        book.total_value[i] = float(values[-1]) if n else initial_value
+        book.set_history(i, values)
+        book.wins[i] += wins
+        book.trades[i] += trades
+        book.sells[i] += sells
+        book.realized_gain[i] += realized_gain
+        book.realized_loss[i] += realized_loss
+        book.turnover[i] = turnover
+        book.exposure_steps[i] += int(counts[np.asarray(change_position) > 0].sum())
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """引擎运行统计（含共享指标去重比）"""
+        return {
+            "strategies": len(self.strategies_instances),
+            **self.indicators.stats(),
+        }
+
+    def _check_risk_controls(self, prices: np.ndarray):
+        """按价格向量批量检查全部资产的止损/止盈，返回需强制平仓的 (策略下标, 资产列) 数组"""
+        book = self.book
+        rows, cols = book.risk_exits(self._risk_rows, prices, self._stop_level, self._take_profit)
+        for i, col in zip(rows.tolist(), cols.tolist()):
+            avg_cost = float(book.cost_basis[i, col])
+            current_price = float(prices[col])
+            price_ratio = current_price / avg_cost
+            asset = book.assets[col]
+            if price_ratio <= self._stop_level[i]:
+                logger.info(
+                    f"策略 {book.strategy_ids[i]}: {asset} 触发止损 "
+                    f"(当前价 {current_price:.2f}, 成本 {avg_cost:.2f}, "
+                    f"亏损 {(1 - price_ratio) * 100:.1f}%)"
+                )
+            else:
+                logger.info(
+                    f"策略 {book.strategy_ids[i]}: {asset} 触发止盈 "
+                    f"(当前价 {current_price:.2f}, 成本 {avg_cost:.2f}, "
+                    f"盈利 {(price_ratio - 1) * 100:.1f}%)"
+                )
+        return rows, cols
 
     def finalize_match(self, match: Match) -> List[MatchResult]:
         """结束比赛并计算结果（含最大回撤和夏普率）"""
-        results = []
-
-        for strategy_id, portfolio in self.portfolios.items():
-            final_value = portfolio.total_value
-            return_pct = (
-                (final_value - self.config.initial_capital) / self.config.initial_capital * 100
-            )
+        if self.profiler is None:
+            return self._finalize_match(match)
+        with self.profiler.measure("finalize"):
+            return self._finalize_match(match)
 
-            values = self.value_history[strategy_id]
+    def profile_report(self) -> Optional[Dict[str, Any]]:
+        """分阶段计时报告，未开启 profile 时为 None"""
+        return self.profiler.report() if self.profiler is not None else None
 
-            trades = [log for log in match.execution_log if log["strategy_id"] == strategy_id]
-            total_trades = len([t for t in trades if t["action"]["type"] != "hold"])
-
-            # 使用准确的盈利卖出计数
-            win_trades = self.win_trade_count[strategy_id]
-
-            max_drawdown = self._calc_max_drawdown(values)
-            sharpe_ratio = self._calc_sharpe(values)
+    def _finalize_match(self, match: Match) -> List[MatchResult]:
+        results = []
 
+        # 回撤、夏普率等已在逐步执行中增量累计，此处只读取按策略下标的数组
+        book = self.book
+        metrics = self._metric_columns()
+        final_values = book.total_value.tolist()
+        trade_counts = book.trades.tolist()
+        win_counts = book.wins.tolist()
+        initial_capital = self.config.initial_capital
+        for i, strategy_id in enumerate(book.strategy_ids):
+            final_value = final_values[i]
+            return_pct = (final_value - initial_capital) / initial_capital * 100
             results.append(MatchResult(
                 strategy_id=strategy_id,
                 final_value=round(final_value, 2),
                 return_pct=round(return_pct, 2),
-                total_trades=total_trades,
-                win_trades=win_trades,
+                total_trades=trade_counts[i],
+                win_trades=win_counts[i],
                 rank=0,
-                max_drawdown=max_drawdown,
-                sharpe_ratio=sharpe_ratio,
+                max_drawdown=round(metrics["max_drawdown"][i], 2),
+                sharpe_ratio=round(metrics["sharpe_ratio"][i], 4),
+                sortino_ratio=round(metrics["sortino_ratio"][i], 4),
+                calmar_ratio=round(metrics["calmar_ratio"][i], 4),
+                volatility=round(metrics["volatility"][i], 2),
+                max_drawdown_duration=metrics["max_drawdown_duration"][i],
+                profit_factor=_round_optional(metrics["profit_factor"][i], 4),
+                avg_trade_pnl=round(metrics["avg_trade_pnl"][i], 2),
+                exposure_pct=round(metrics["exposure_pct"][i], 2),
+                turnover=round(metrics["turnover"][i], 2),
             ))
 
         # 按收益率排序
@@ -292,48 +636,8 @@ class MatchEngine:
             f"比赛结束: {match.id}, 冠军: {results[0].strategy_id}, "
             f"收益率: {results[0].return_pct:.2f}%, "
             f"最大回撤: {results[0].max_drawdown:.2f}%, "
-            f"夏普率: {results[0].sharpe_ratio:.4f}"
+            f"夏普率: {results[0].sharpe_ratio:.4f}, "
+            f"指标去重比: {self.indicators.stats()['indicator_dedup_ratio']}"
         )
 
         return results
-
-    # ==================== 辅助计算 ====================
-
-    @staticmethod
-    def _calc_max_drawdown(values: List[float]) -> float:
-        """计算最大回撤百分比（从峰值的最大跌幅）"""
-        if len(values) < 2:
-            return 0.0
-        peak = values[0]
-        max_dd = 0.0
-        for v in values:
-            if v > peak:
-                peak = v
-            if peak > 0:
-                dd = (peak - v) / peak
-                if dd > max_dd:
-                    max_dd = dd
-        return round(max_dd * 100, 2)
-
-    @staticmethod
-    def _calc_sharpe(values: List[float], steps_per_year: int = 105120) -> float:
-        """
-        计算年化夏普率（无风险利率=0，假设5分钟K线）
-        steps_per_year = 365 * 24 * 12 = 105120
-        """
-        if len(values) < 3:
-            return 0.0
-        returns = [
-            (values[i] - values[i - 1]) / values[i - 1]
-            for i in range(1, len(values))
-            if values[i - 1] > 0
-        ]
-        if len(returns) < 2:
-            return 0.0
-        n = len(returns)
-        mean_r = sum(returns) / n
-        variance = sum((r - mean_r) ** 2 for r in returns) / n
-        std_r = math.sqrt(variance)
-        if std_r == 0:
-            return 0.0
-        return round((mean_r / std_r) * math.sqrt(steps_per_year), 4)
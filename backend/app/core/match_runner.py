@@ -0,0 +1,252 @@
+"""比赛执行任务
+
+- build_job_payload / parse_job_payload：比赛任务在队列中的持久化格式（纯 JSON）
+- run_match：获取行情（单资产或多资产篮子）并在 match_executor 中执行比赛（不访问数据库），
+  由 API 进程（本地模式）或独立 worker 进程调用
+- simulate_match：纯计算，参数与返回值均可 pickle，在进程池中执行；可选地通过
+  进度通道（executor.progress_channel()）按步数/时间节流地发送进度快照
+"""
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from loguru import logger
+
+from app.config import settings
+from app.core.execution_log import ExecutionLog
+from app.core.executor import match_executor
+from app.core.kline_series import KlineSeries
+from app.core.market_basket import BasketView, MarketBasket
+from app.core.market_data import CoinGeckoFetcher, load_market_basket, load_market_data
+from app.core.match_engine import MatchEngine
+from app.strategies.actions import DEFAULT_ASSET
+from app.models.match import MatchConfig
+from app.models.strategy import Strategy
+
+# 任务参数中与行情/资金相关的字段
+JOB_PARAM_FIELDS = (
+    "market_source",
+    "market_type",
+    "coin_id",
+    "coin_ids",
+    "duration_steps",
+    "initial_capital",
+    "seed",
+    "market_end_ms",
+    "profile",
+)
+
+
+class MatchOutcome(NamedTuple):
+    """比赛计算结果：按排名排序的结果 dict、各策略的列式执行日志（未记录日志时为空）
+    与分阶段计时报告（未开启 profile 时为 None）"""
+    results: List[Dict[str, Any]]
+    logs: List[ExecutionLog]
+    profile: Optional[Dict[str, Any]] = None
+    compute_seconds: float = 0.0  # 主循环与结算耗时（不含获取行情与排队）
+
+
+# 进度通道结束标记
+PROGRESS_END = None
+
+
+class ProgressReporter:
+    """在计算进程内节流地发送进度快照：距上次发送满 every_steps 步或 interval_ms 毫秒时发送"""
+
+    __slots__ = ("channel", "every_steps", "interval", "_last_step", "_last_time")
+
+    def __init__(self, channel: Any, every_steps: int, interval_ms: float):
+        self.channel = channel
+        self.every_steps = max(int(every_steps), 1)
+        self.interval = interval_ms / 1000.0
+        self._last_step = 0
+        self._last_time = time.perf_counter()
+
+    def maybe_report(self, steps_done: int, engine: MatchEngine) -> None:
+        if (steps_done - self._last_step < self.every_steps
+                and time.perf_counter() - self._last_time < self.interval):
+            return
+        self.report(steps_done, engine)
+
+    def report(self, steps_done: int, engine: MatchEngine) -> None:
+        self.channel.put({
+            "step": steps_done,
+            "values": engine.current_values(),
+            "metrics": engine.current_metrics(),
+        })
+        self._last_step = steps_done
+        self._last_time = time.perf_counter()
+
+    def finish(self, total_steps: int, engine: MatchEngine) -> None:
+        """确保最后一步的快照已发送"""
+        if self._last_step < total_steps:
+            self.report(total_steps, engine)
+
+    def close(self) -> None:
+        self.channel.put(PROGRESS_END)
+
+
+def progress_rankings(
+    values: Dict[str, float],
+    initial_capital: float,
+    metrics: Optional[Dict[str, Dict[str, float]]] = None,
+) -> List[Dict[str, Any]]:
+    """由各策略当前总价值生成实时排名（按总价值降序），附带截至当前步的回撤、夏普率等指标"""
+    ordered = sorted(values.items(), key=lambda item: item[1], reverse=True)
+    metrics = metrics or {}
+    rankings = []
+    for rank, (strategy_id, value) in enumerate(ordered, start=1):
+        entry = {
+            "rank": rank,
+            "strategy_id": strategy_id,
+            "total_value": round(value, 2),
+            "return_pct": round((value - initial_capital) / initial_capital * 100, 4),
+        }
+        current = metrics.get(strategy_id)
+        if current:
+            entry.update(
+                max_drawdown=round(current["max_drawdown"], 2),
+                sharpe_ratio=round(current["sharpe_ratio"], 4),
+                exposure_pct=round(current["exposure_pct"], 2),
+                turnover=round(current["turnover"], 2),
+                total_trades=current["total_trades"],
+            )
+        rankings.append(entry)
+    return rankings
+
+
+def build_job_payload(params: Dict[str, Any], strategies: List[Strategy]) -> Dict[str, Any]:
+    """构造可持久化的任务参数（策略以快照形式保存，worker 无需再查策略表）"""
+    return {
+        "params": {name: params.get(name) for name in JOB_PARAM_FIELDS},
+        "strategies": [s.model_dump(mode="json") for s in strategies],
+    }
+
+
+def parse_job_payload(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Strategy]]:
+    return payload["params"], [Strategy(**s) for s in payload["strategies"]]
+
+
+async def run_match(
+    match_id: str,
+    params: Dict[str, Any],
+    strategies: List[Strategy],
+    progress: Optional[Any] = None,
+) -> MatchOutcome:
+    """获取行情并执行比赛（事件循环上只做 I/O），无成交的步每 settings.match_log_every 步记录一次日志（有成交的步总是记录）
+
+    Args:
+        progress: 可选的进度通道（由 match_executor.progress_channel() 创建），结束时收到 PROGRESS_END
+    """
+    coin_ids = params.get("coin_ids")  # 旧任务没有该字段，按单资产处理
+    logger.info(
+        f"[{match_id}] 生成市场数据: source={params['market_source']}, "
+        f"type={params['market_type']}, coin={coin_ids or params['coin_id']}, "
+        f"steps={params['duration_steps']}, seed={params['seed']}"
+    )
+    # 旧任务没有 market_end_ms，模拟行情以当前时间为截止时刻
+    if coin_ids:
+        # 多资产：并发获取并按公共时间戳对齐，首个币种为主资产
+        market_data = await load_market_basket(
+            params["market_source"],
+            params["market_type"],
+            coin_ids,
+            params["duration_steps"],
+            seed=params["seed"],
+            end_ms=params.get("market_end_ms"),
+        )
+        primary_coin = coin_ids[0]
+    else:
+        series = await load_market_data(
+            params["market_source"],
+            params["market_type"],
+            params["coin_id"],
+            params["duration_steps"],
+            seed=params["seed"],
+            end_ms=params.get("market_end_ms"),
+        )
+        # 模拟行情沿用 ETH，真实行情按币种命名资产
+        asset = (
+            CoinGeckoFetcher.symbol(params["coin_id"])
+            if params["market_source"] != "simulated"
+            else DEFAULT_ASSET
+        )
+        market_data = MarketBasket.single(asset, series)
+        primary_coin = params["coin_id"]
+
+    # 获取交易对名称（主资产）
+    trading_pair = (
+        CoinGeckoFetcher.coin_symbol(primary_coin)
+        if params["market_source"] != "simulated" or coin_ids
+        else "ETH/USDC"
+    )
+    match_config = MatchConfig(
+        initial_capital=params["initial_capital"],
+        trading_pair=trading_pair,
+        timeframe="5m",
+        duration_steps=params["duration_steps"],
+        assets=list(market_data.assets),
+    )
+    # 旧任务的参数中没有 profile 字段，按配置决定
+    profile = params.get("profile")
+    profile = settings.match_profile if profile is None else profile
+    return await match_executor.run(
+        simulate_match, match_config, strategies, market_data, settings.match_log_every, progress, profile
+    )
+
+
+def simulate_match(
+    match_config: MatchConfig,
+    strategies: List[Strategy],
+    market_data: Union[KlineSeries, MarketBasket],
+    log_every: int = 0,
+    progress: Optional[Any] = None,
+    profile: bool = False,
+) -> MatchOutcome:
+    """逐步执行整场比赛，结果含完整价值序列（按排名排序）
+
+    Args:
+        market_data: 行情篮子（资产与 match_config.assets 一致）；传入单条 KlineSeries 时作为主资产
+        log_every: 无成交的步每隔多少步记录一次执行日志（有成交的步总是记录），0 表示只计算结果、不记录日志
+        progress: 可选的进度通道，按 settings.progress_every_steps / progress_interval_ms 节流发送
+        profile: 是否记录引擎分阶段计时（结果随 MatchOutcome.profile 返回）
+    """
+    reporter = (
+        ProgressReporter(progress, settings.progress_every_steps, settings.progress_interval_ms)
+        if progress is not None else None
+    )
+    started = time.perf_counter()
+    try:
+        engine = MatchEngine(
+            match_config, record_log=log_every > 0, log_every=log_every or 1, profile=profile
+        )
+        match = engine.initialize_match(strategies)
+
+        # 所有步共享同一份行情缓冲区，每步只推进视图长度（避免 O(N²) 的前缀复制），
+        # 价格向量取自篮子收盘价矩阵的当前行
+        if isinstance(market_data, KlineSeries):
+            market_data = MarketBasket.single(match_config.assets[0], market_data)
+        market_view = BasketView(market_data, stop=0)
+        total_steps = match_config.duration_steps
+        for step in range(total_steps):
+            engine.execute_step(match, market_view.advance_to(step + 1), step)
+            if reporter is not None:
+                reporter.maybe_report(step + 1, engine)
+        if reporter is not None:
+            reporter.finish(total_steps, engine)
+
+        ranked = engine.finalize_match(match)
+        compute_seconds = time.perf_counter() - started
+    finally:
+        if reporter is not None:
+            reporter.close()
+    logger.debug(f"比赛计算完成: {match.id}, 引擎统计: {engine.stats}")
+    # MatchResult 的全部字段（收益、回撤与各项风险收益指标）按 match_participants 的列名写入；
+    # 价值序列保持 float64 数组（跨进程传回与编码入库都不经过 Python 列表）
+    book = engine.book
+    results = [
+        {**r.model_dump(), "value_history": book.values(book.index[r.strategy_id]).copy()}
+        for r in ranked
+    ]
+    return MatchOutcome(
+        results, list(engine.execution_logs.values()), engine.profile_report(), compute_seconds
+    )
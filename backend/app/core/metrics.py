@@ -0,0 +1,361 @@
+"""Prometheus 文本格式指标
+
+进程内的轻量指标实现（计数器 / 仪表 / 直方图），无需额外依赖：
+- 热路径上每次更新只是一次加锁的字典累加，常开成本可忽略
+- 需要查询才能得到的值（按状态的比赛数、任务队列深度、连接池状态）在抓取时
+  通过回调采集，不在请求路径上产生开销
+- 指标按进程统计：API 进程通过 GET /metrics 暴露，独立 worker 进程在
+  WORKER_METRICS_PORT > 0 时通过自带的 HTTP 端口暴露
+
+用法：
+
+    REQUESTS = registry.counter("http_requests_total", "HTTP 请求数", ("method", "route", "status"))
+    REQUESTS.inc("GET", "/api/matches/", "200")
+"""
+import asyncio
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 延迟类直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, self._labels(labelvalues), value
+
+
+class Gauge(_Metric):
+    """可增可减的仪表"""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, self._labels(labelvalues), value
+
+
+class CallbackGauge(_Metric):
+    """抓取时由回调采集的仪表：回调返回 {标签值元组: 数值}，失败时本次不输出样本"""
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[Labels, float]],
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self) -> Iterator[Sample]:
+        try:
+            values = self.collect()
+        except Exception as e:
+            logger.warning(f"采集指标 {self.name} 失败: {e}")
+            return
+        for labelvalues, value in values.items():
+            yield self.name, self._labels(labelvalues), value
+
+
+class Histogram(_Metric):
+    """累积分桶直方图（输出 _bucket / _sum / _count）"""
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值元组 -> [各桶计数..., +Inf 桶计数, 总和]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        state = self._values.get(labelvalues)
+        return int(sum(state[:-1])) if state else 0
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+        for labelvalues, state in items:
+            labels = self._labels(labelvalues)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, state[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """指标注册表，render() 输出全部指标的 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"指标已注册: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback_gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[Labels, float]],
+    ) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, labelnames, collect))
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ==================== HTTP ====================
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP 请求数（按方法、路由模板、状态码）", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（至响应开始发送）", ("method", "route")
+)
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "正在处理的 HTTP 请求数")
+
+# ==================== 比赛执行 ====================
+
+MATCH_RUNS = registry.counter("match_runs_total", "本进程执行的比赛任务数（按结果）", ("result",))
+MATCH_DURATION = registry.histogram(
+    "match_duration_seconds",
+    "比赛任务耗时（获取行情 + 排队 + 计算）",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+MATCH_STEPS_PER_SECOND = registry.histogram(
+    "match_steps_per_second",
+    "比赛主循环吞吐（步/秒）",
+    buckets=(1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000),
+)
+
+# ==================== 行情 ====================
+
+COINGECKO_FETCH_DURATION = registry.histogram(
+    "coingecko_fetch_duration_seconds",
+    "CoinGecko 行情请求耗时",
+    ("result",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0),
+)
+COINGECKO_CACHE = registry.counter(
+    "coingecko_cache_requests_total", "CoinGecko 行情磁盘缓存查询数（hit / miss）", ("result",)
+)
+
+
+def _coingecko_cache_hit_ratio() -> Dict[Labels, float]:
+    hits = COINGECKO_CACHE.value("hit")
+    total = hits + COINGECKO_CACHE.value("miss")
+    return {(): hits / total if total else 0.0}
+
+
+registry.callback_gauge(
+    "coingecko_cache_hit_ratio", "CoinGecko 行情缓存命中率（本进程启动以来）", (), _coingecko_cache_hit_ratio
+)
+
+# ==================== 数据库连接池 ====================
+
+DB_POOL_WAIT = registry.histogram(
+    "db_pool_wait_seconds",
+    "从连接池获取连接的等待时间",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+
+
+class MetricsMiddleware:
+    """ASGI 中间件：统计请求数、耗时与并发数（路由取模板路径，避免高基数标签）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - started, scope["method"], _route_of(scope)
+                )
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_REQUESTS.inc(scope["method"], _route_of(scope), status)
+
+
+def _route_of(scope) -> str:
+    """匹配到的路由模板（含 include_router 前缀），未匹配时为 unmatched"""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    if not scope.get("path_params"):
+        # 无路径参数时请求路径即模板
+        return scope["path"]
+    # route.path 不含路由器前缀：用请求路径中对应的前几段补齐
+    path_parts = scope["path"].split("/")
+    prefix_len = len(path_parts) - len(template.split("/")) + 1
+    return "/".join(path_parts[:prefix_len]) + template if prefix_len > 1 else template
+
+
+async def serve_metrics(port: int, host: str = "0.0.0.0", render: Optional[Callable[[], str]] = None):
+    """在独立端口上提供 /metrics（worker 进程使用，任意路径均返回全部指标）"""
+    render = render or registry.render
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # 读取并丢弃请求头
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            body = render().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                + f"Content-Type: {CONTENT_TYPE}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"worker 指标端口已启动: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,396 @@
+"""比赛引擎的持仓状态（结构数组）
+
+一场比赛所有策略的状态按策略下标存放在 NumPy 数组中：
+- cash: (n,) 现金
+- positions: (n, 资产数) 持仓数量
+- cost_basis: (n, 资产数) 加权平均成本，NaN 表示无持仓成本
+- total_value: (n,) 最近一次估值
+- trades / wins: (n,) 交易次数 / 盈利卖出次数
+- sells / realized_gain / realized_loss: (n,) 成交的卖出笔数 / 已实现盈利合计 / 已实现亏损合计
+  （每笔卖出的已实现盈亏 = 卖出净收入 − 卖出数量 × 加权平均成本）
+- exposure_steps / turnover: (n,) 持仓不为零的步数 / 累计成交额（买入金额 + 卖出收入）
+- history: (容量, n) 预分配的资产价值序列（按时间为行，每步追加一行连续写入），前 length 行有效
+
+每步的止损止盈检查（价格向量与各资产成本逐列比较）、估值（持仓矩阵与价格向量的
+矩阵乘积）与价值序列追加对全部策略批量计算；交易指令较多时最大持仓限制与
+手续费/滑点也整批计算，较少时逐条计算以避免 NumPy 小数组的固定开销，两种路径的
+算术逐项对应（结果逐位一致）。策略通过 PortfolioView
+读取自己的现金与持仓；pydantic Portfolio 只作为对外快照。
+
+峰值、回撤、收益率均值/方差等由 ValueMetrics 按块增量折叠（见 core/value_metrics.py），
+结算与实时进度通过 result_metrics() 读取，耗时与比赛步数无关。
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.execution_log import ACTION_BUY, ACTION_HOLD, ACTION_SELL
+from app.core.value_metrics import METRIC_BLOCK, ValueMetrics, ratio_metrics
+from app.models.portfolio import Portfolio
+
+# 低于该金额的买入、低于该数量的卖出不成交；卖出后剩余低于该数量视为清仓
+MIN_BUY_AMOUNT = 10
+MIN_SELL_QUANTITY = 0.001
+DUST_QUANTITY = 0.0001
+# 一步内交易指令不超过该数量时逐条执行，否则整批向量化
+SCALAR_ORDER_LIMIT = 16
+
+
+class PortfolioBook:
+    """一场比赛全部策略的持仓状态"""
+
+    def __init__(
+        self,
+        strategy_ids: Sequence[str],
+        initial_capital: float,
+        assets: Sequence[str] = ("ETH",),
+        capacity: int = 1,
+    ):
+        self.strategy_ids = list(strategy_ids)
+        self.index = {sid: i for i, sid in enumerate(self.strategy_ids)}
+        self.assets = tuple(assets)
+        self.asset_index = {asset: j for j, asset in enumerate(self.assets)}
+        n, m = len(self.strategy_ids), len(self.assets)
+        self.initial_capital = float(initial_capital)
+        self.cash = np.full(n, self.initial_capital)
+        self.positions = np.zeros((n, m))
+        self.cost_basis = np.full((n, m), np.nan)
+        self.total_value = np.full(n, self.initial_capital)
+        self._position_value = np.zeros(n)  # 估值缓冲区（每步复用）
+        self.trades = np.zeros(n, dtype=np.int64)
+        self.wins = np.zeros(n, dtype=np.int64)
+        self.sells = np.zeros(n, dtype=np.int64)
+        self.realized_gain = np.zeros(n)
+        self.realized_loss = np.zeros(n)
+        # 持仓步数以 float64 计数：每步由持仓市值的符号（0 或 1）直接累加，无需类型转换的临时数组
+        self.exposure_steps = np.zeros(n)
+        self.turnover = np.zeros(n)
+        self._exposed = np.zeros(n)  # 持仓判断缓冲区（每步复用）
+        self.metrics = ValueMetrics(n, self.initial_capital)
+        self.history = np.empty((max(int(capacity), 1), n))
+        self.history[0] = self.initial_capital
+        self.length = 1
+
+    def __len__(self) -> int:
+        return len(self.strategy_ids)
+
+    # ==================== 每步批量计算 ====================
+
+    def risk_exits(
+        self,
+        rows: np.ndarray,
+        prices: np.ndarray,
+        stop_level: np.ndarray,
+        take_profit: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """止损/止盈检查（只检查 rows 中设置了风控参数的策略），对全部资产按价格向量批量比较
+
+        stop_level = 1 - stop_loss，未设置的参数为 NaN（比较恒为 False）。
+        返回需强制平仓的 (策略下标, 资产列) 数组，按策略、资产顺序排列。
+        """
+        cost = self.cost_basis[rows]
+        held = (self.positions[rows] > 0) & (cost > 0)
+        if not held.any():
+            return rows[:0], rows[:0]
+        ratio = prices / cost
+        hit = held & (
+            (ratio <= stop_level[rows, None]) | (ratio >= take_profit[rows, None])
+        )
+        r, c = np.nonzero(hit)
+        return rows[r], c
+
+    def liquidate(
+        self,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        prices: np.ndarray,
+        fee_rate: float,
+        slippage_rate: float,
+    ) -> None:
+        """强制平仓 (rows[k], cols[k]) 的全部持仓（止损/止盈），同一策略可同时平掉多个资产
+
+        每个平仓计一次交易，算术与普通卖出相同。
+        """
+        if len(rows) <= SCALAR_ORDER_LIMIT:
+            price_list = prices.tolist()
+            for i, col in zip(rows.tolist(), cols.tolist()):
+                self.trades[i] += 1
+                self._sell_one(i, col, float(self.positions[i, col]), price_list[col], fee_rate, slippage_rate)
+            return
+        np.add.at(self.trades, rows, 1)
+        # 同一资产列内策略下标不重复，可整批卖出
+        for col in np.unique(cols).tolist():
+            idx = rows[cols == col]
+            col_arr = np.full(len(idx), col, dtype=np.intp)
+            self._sell(idx, col_arr, self.positions[idx, col], prices[col_arr], fee_rate, slippage_rate)
+
+    def execute(
+        self,
+        rows: List[int],
+        kinds: List[int],
+        amounts: List[float],
+        cols: List[int],
+        prices: np.ndarray,
+        max_position_pct: np.ndarray,
+        fee_rate: float,
+        slippage_rate: float,
+    ) -> None:
+        """执行一步的交易指令
+
+        rows 为有买入/卖出指令的策略下标；kinds / amounts / cols 为按策略下标的列表，
+        原地更新为实际记录的指令：持仓已达 max_position_pct 上限的买入改为 hold，
+        买入金额超过现金时按现金截断。
+        """
+        if len(rows) <= SCALAR_ORDER_LIMIT:
+            price_list = prices.tolist()
+            for i in rows:
+                self._execute_one(
+                    i, kinds, amounts, cols[i], price_list[cols[i]],
+                    float(max_position_pct[i]), fee_rate, slippage_rate,
+                )
+            return
+
+        idx = np.asarray(rows, dtype=np.intp)
+        kind_arr = np.array([kinds[i] for i in rows], dtype=np.int8)
+        amount_arr = np.array([amounts[i] for i in rows], dtype=np.float64)
+        col_arr = np.array([cols[i] for i in rows], dtype=np.intp)
+        price_arr = prices[col_arr]
+
+        buy = kind_arr == ACTION_BUY
+        if buy.any():
+            # 最大持仓比例按上一步的总资产判断
+            over = buy & (
+                self.positions[idx, col_arr] * price_arr
+                >= self.total_value[idx] * max_position_pct[idx]
+            )
+            if over.any():
+                kind_arr[over] = ACTION_HOLD
+                amount_arr[over] = 0.0
+                buy &= ~over
+        self.trades[idx] += kind_arr != ACTION_HOLD
+
+        if buy.any():
+            amount_arr[buy] = np.minimum(amount_arr[buy], self.cash[idx[buy]])
+            self._buy(idx[buy], col_arr[buy], amount_arr[buy], price_arr[buy], fee_rate, slippage_rate)
+        sell = kind_arr == ACTION_SELL
+        if sell.any():
+            self._sell(idx[sell], col_arr[sell], amount_arr[sell], price_arr[sell], fee_rate, slippage_rate)
+
+        for i, kind, amount in zip(rows, kind_arr.tolist(), amount_arr.tolist()):
+            kinds[i] = kind
+            amounts[i] = amount
+
+    def _execute_one(self, i, kinds, amounts, col, price, max_position_pct, fee_rate, slippage_rate) -> None:
+        """逐条执行单个策略的指令（算术与 _buy / _sell 逐项对应）"""
+        position = float(self.positions[i, col])
+        if kinds[i] == ACTION_BUY:
+            if position * price >= float(self.total_value[i]) * max_position_pct:
+                kinds[i] = ACTION_HOLD
+                amounts[i] = 0.0
+                return
+            self.trades[i] += 1
+            cash = float(self.cash[i])
+            amount = amounts[i]
+            if amount > cash:
+                amount = amounts[i] = cash
+            if amount < MIN_BUY_AMOUNT:
+                return
+            fee = amount * fee_rate
+            slippage = amount * slippage_rate
+            quantity = (amount - fee - slippage) / price
+            old_cost = float(self.cost_basis[i, col])
+            if math.isnan(old_cost):
+                old_cost = price
+            new_qty = position + quantity
+            if new_qty > 0:
+                self.cost_basis[i, col] = (position * old_cost + quantity * price) / new_qty
+            self.cash[i] = cash - amount
+            self.positions[i, col] = new_qty
+            self.turnover[i] += amount
+            return
+
+        self.trades[i] += 1
+        self._sell_one(i, col, amounts[i], price, fee_rate, slippage_rate)
+
+    def _sell_one(self, i, col, amount, price, fee_rate, slippage_rate) -> None:
+        """逐条卖出（算术与 _sell 逐项对应）"""
+        position = float(self.positions[i, col])
+        if position <= 0:
+            return
+        quantity = amount if amount < position else position
+        if quantity < MIN_SELL_QUANTITY:
+            return
+        cost = float(self.cost_basis[i, col])
+        if price > cost:
+            self.wins[i] += 1
+        revenue = quantity * price
+        fee = revenue * fee_rate
+        slippage = revenue * slippage_rate
+        proceeds = revenue - fee - slippage
+        self.cash[i] = float(self.cash[i]) + proceeds
+        self.turnover[i] += revenue
+        pnl = proceeds - quantity * cost
+        self.sells[i] += 1
+        if pnl > 0:
+            self.realized_gain[i] += pnl
+        else:
+            self.realized_loss[i] -= pnl
+        remaining = position - quantity
+        if remaining < DUST_QUANTITY:
+            self.positions[i, col] = 0.0
+            self.cost_basis[i, col] = math.nan
+        else:
+            self.positions[i, col] = remaining
+
+    def _buy(self, rows, cols, amounts, prices, fee_rate, slippage_rate) -> None:
+        """批量买入并更新加权平均成本"""
+        ok = amounts >= MIN_BUY_AMOUNT
+        if not ok.all():
+            rows, cols, amounts, prices = rows[ok], cols[ok], amounts[ok], prices[ok]
+        fee = amounts * fee_rate
+        slippage = amounts * slippage_rate
+        quantity = (amounts - fee - slippage) / prices
+
+        old_qty = self.positions[rows, cols]
+        old_cost = self.cost_basis[rows, cols]
+        old_cost = np.where(np.isnan(old_cost), prices, old_cost)
+        new_qty = old_qty + quantity
+        held = new_qty > 0
+        self.cost_basis[rows[held], cols[held]] = (
+            (old_qty * old_cost + quantity * prices)[held] / new_qty[held]
+        )
+        self.cash[rows] -= amounts
+        self.positions[rows, cols] = new_qty
+        self.turnover[rows] += amounts
+
+    def _sell(self, rows, cols, amounts, prices, fee_rate, slippage_rate) -> None:
+        """批量卖出，卖出价高于加权平均成本计为盈利，并累计已实现盈亏"""
+        position = self.positions[rows, cols]
+        quantity = np.minimum(amounts, position)
+        ok = (position > 0) & (quantity >= MIN_SELL_QUANTITY)
+        if not ok.all():
+            rows, cols, prices = rows[ok], cols[ok], prices[ok]
+            position, quantity = position[ok], quantity[ok]
+
+        cost = self.cost_basis[rows, cols]
+        self.wins[rows] += prices > cost
+        revenue = quantity * prices
+        fee = revenue * fee_rate
+        slippage = revenue * slippage_rate
+        proceeds = revenue - fee - slippage
+        self.cash[rows] += proceeds
+        self.turnover[rows] += revenue
+        pnl = proceeds - quantity * cost
+        self.sells[rows] += 1
+        self.realized_gain[rows] += np.maximum(pnl, 0.0)
+        self.realized_loss[rows] += np.maximum(-pnl, 0.0)
+
+        remaining = position - quantity
+        closed = remaining < DUST_QUANTITY
+        self.positions[rows, cols] = np.where(closed, 0.0, remaining)
+        self.cost_basis[rows[closed], cols[closed]] = np.nan
+
+    def revalue(self, prices: np.ndarray) -> np.ndarray:
+        """按当前价格批量估值，追加一行到价值序列，累计持仓步数，每满一块折叠一次运行统计"""
+        np.matmul(self.positions, prices, out=self._position_value)
+        np.add(self.cash, self._position_value, out=self.total_value)
+        np.sign(self._position_value, out=self._exposed)
+        np.add(self.exposure_steps, self._exposed, out=self.exposure_steps)
+        if self.length == len(self.history):
+            self.reserve(self.length * 2)
+        self.history[self.length] = self.total_value
+        self.length += 1
+        if self.length - self.metrics.folded >= METRIC_BLOCK:
+            self.metrics.fold(self.history, self.length)
+        return self.total_value
+
+    def result_metrics(self, steps_per_year: float) -> Dict[str, np.ndarray]:
+        """截至当前步的结果指标（按策略下标的数组）：ratio_metrics() 的风险收益指标，
+        以及持仓时间占比（%）、成交额，和按已成交卖出计算的盈亏比（已实现盈利合计 / 亏损合计，
+        没有亏损卖出时为 NaN）与平均每笔卖出的已实现盈亏"""
+        metrics = ratio_metrics(self.metrics.snapshot(self.history, self.length), steps_per_year)
+        steps = max(self.length - 1, 1)
+        metrics["exposure_pct"] = self.exposure_steps * (100.0 / steps)
+        metrics["turnover"] = self.turnover
+        metrics["profit_factor"] = np.divide(
+            self.realized_gain, self.realized_loss,
+            out=np.full(len(self), np.nan), where=self.realized_loss > 0,
+        )
+        metrics["avg_trade_pnl"] = np.divide(
+            self.realized_gain - self.realized_loss, self.sells,
+            out=np.zeros(len(self)), where=self.sells > 0,
+        )
+        return metrics
+
+    # ==================== 价值序列 ====================
+
+    def reserve(self, capacity: int) -> None:
+        """扩容价值序列矩阵（逐步执行时按比赛步数预分配，一般不会触发）"""
+        if capacity <= len(self.history):
+            return
+        grown = np.empty((capacity, len(self)))
+        grown[:self.length] = self.history[:self.length]
+        self.history = grown
+
+    def set_history(self, i: int, values: np.ndarray) -> None:
+        """整段写入某个策略的价值序列（向量化回测，各策略长度相同）"""
+        self.reserve(len(values))
+        self.history[:len(values), i] = values
+        self.length = len(values)
+
+    def values(self, i: int) -> np.ndarray:
+        """策略 i 的价值序列（视图，不复制）"""
+        return self.history[:self.length, i]
+
+    # ==================== 对外视图 ====================
+
+    def position_dict(self, i: int) -> Dict[str, float]:
+        return {
+            asset: quantity
+            for asset, quantity in zip(self.assets, self.positions[i].tolist())
+            if quantity
+        }
+
+    def snapshot(self, i: int) -> Portfolio:
+        """策略 i 当前状态的 pydantic 快照"""
+        return Portfolio(
+            strategy_id=self.strategy_ids[i],
+            cash=float(self.cash[i]),
+            positions=self.position_dict(i),
+            total_value=float(self.total_value[i]),
+        )
+
+    def value_map(self) -> Dict[str, float]:
+        """策略 id → 当前总资产"""
+        return dict(zip(self.strategy_ids, self.total_value.tolist()))
+
+    def history_lists(self) -> Dict[str, List[float]]:
+        """策略 id → 价值序列列表"""
+        return dict(zip(self.strategy_ids, self.history[:self.length].T.tolist()))
+
+
+class PortfolioView:
+    """单个策略的只读持仓视图（读取 PortfolioBook 的当前状态）
+
+    提供与 Portfolio 相同的 cash / positions / total_value 属性，策略决策时使用。
+    """
+
+    __slots__ = ("book", "index", "strategy_id")
+
+    def __init__(self, book: PortfolioBook, index: int):
+        self.book = book
+        self.index = index
+        self.strategy_id = book.strategy_ids[index]
+
+    @property
+    def cash(self) -> float:
+        return float(self.book.cash[self.index])
+
+    @property
+    def positions(self) -> Dict[str, float]:
+        return self.book.position_dict(self.index)
+
+    @property
+    def total_value(self) -> float:
+        return float(self.book.total_value[self.index])
@@ -0,0 +1,86 @@
+"""比赛引擎分阶段计时
+
+MatchEngine(profile=True) 时按阶段与策略累计耗时和调用次数：
+- indicators: 共享指标更新（每步一次，不区分策略）
+- decide: 每步每策略（按策略分别统计）
+- risk_controls / execute / update_value / log: 对全部策略批量计算，每步一次
+- finalize / log_build: 结算与日志行构造（每场一次）
+
+未开启时引擎热路径只多一次 `is not None` 判断，不调用计时函数。
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 报告中的阶段顺序
+STAGES = ("indicators", "risk_controls", "decide", "execute", "update_value", "log", "finalize", "log_build")
+
+
+class EngineProfiler:
+    """按 (阶段, 策略) 累计耗时与调用次数"""
+
+    __slots__ = ("_timings", "steps", "step_seconds")
+
+    def __init__(self):
+        # (stage, strategy_id 或 None) -> [累计秒数, 调用次数]
+        self._timings: Dict[Tuple[str, Optional[str]], List[float]] = {}
+        self.steps = 0
+        self.step_seconds = 0.0
+
+    def lap(self, stage: str, strategy_id: Optional[str], started: float) -> float:
+        """记录 started 至今的耗时，返回当前时刻（作为下一阶段的起点）"""
+        now = time.perf_counter()
+        entry = self._timings.get((stage, strategy_id))
+        if entry is None:
+            entry = self._timings[(stage, strategy_id)] = [0.0, 0]
+        entry[0] += now - started
+        entry[1] += 1
+        return now
+
+    def end_step(self, started: float) -> None:
+        self.steps += 1
+        self.step_seconds += time.perf_counter() - started
+
+    @contextmanager
+    def measure(self, stage: str, strategy_id: Optional[str] = None) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.lap(stage, strategy_id, started)
+
+    @staticmethod
+    def _entry(seconds: float, calls: int) -> Dict[str, Any]:
+        return {
+            "seconds": round(seconds, 6),
+            "calls": int(calls),
+            "avg_us": round(seconds / calls * 1e6, 3) if calls else 0.0,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """汇总报告：各阶段总耗时与占比、各策略分阶段耗时、每秒步数"""
+        stages: Dict[str, List[float]] = {}
+        strategies: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (stage, strategy_id), (seconds, calls) in self._timings.items():
+            total = stages.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += calls
+            if strategy_id is not None:
+                strategies.setdefault(strategy_id, {})[stage] = self._entry(seconds, calls)
+
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        measured = sum(seconds for seconds, _ in stages.values())
+        stage_report = {}
+        for stage in sorted(stages, key=lambda s: order.get(s, len(order))):
+            seconds, calls = stages[stage]
+            stage_report[stage] = {
+                **self._entry(seconds, calls),
+                "share_pct": round(seconds / measured * 100, 2) if measured else 0.0,
+            }
+        return {
+            "steps": self.steps,
+            "step_seconds": round(self.step_seconds, 6),
+            "steps_per_second": round(self.steps / self.step_seconds, 1) if self.step_seconds else 0.0,
+            "stages": stage_report,
+            "strategies": strategies,
+        }
@@ -0,0 +1,116 @@
+"""比赛实时进度广播
+
+进度由执行比赛的 worker（可能是独立进程）写入 match_progress。API 进程中每场比赛
+只有一个生产者（轮询任务）读取最新快照，变化时扇出给该比赛的全部订阅者：
+- 订阅者再多，每个轮询周期也只查询一次数据库
+- 每个订阅者的队列只保留最新快照，慢消费者不会阻塞其他订阅者或积压内存
+- 最后一个订阅者离开、或比赛结束（completed / failed）时停止轮询
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from app.config import settings
+
+FINAL_STATUSES = ("completed", "failed")
+
+
+class _Channel:
+    """单场比赛的广播通道"""
+
+    __slots__ = ("subscribers", "latest", "task")
+
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.latest: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+def _offer(subscriber: asyncio.Queue, snapshot: Dict[str, Any]) -> None:
+    """放入最新快照；队列已满时丢弃未消费的旧快照"""
+    if subscriber.full():
+        subscriber.get_nowait()
+    subscriber.put_nowait(snapshot)
+
+
+class ProgressHub:
+    """按比赛聚合订阅者的进度广播中心"""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Optional[Dict[str, Any]]],
+        poll_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            fetch: 同步函数 match_id -> 进度快照 dict（含 status），比赛不存在时返回 None；在线程池中调用
+            poll_seconds: 轮询间隔，未传时取 settings.progress_poll_ms
+        """
+        self.fetch = fetch
+        self.poll_seconds = settings.progress_poll_ms / 1000 if poll_seconds is None else poll_seconds
+        self._channels: Dict[str, _Channel] = {}
+        self.polls = 0
+
+    async def subscribe(self, match_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """订阅比赛进度：先收到当前快照，之后每次变化收到一次，比赛结束后迭代终止"""
+        channel = self._channels.get(match_id)
+        if channel is None:
+            channel = self._channels[match_id] = _Channel()
+            channel.task = asyncio.create_task(self._poll(match_id, channel))
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=1)
+        channel.subscribers.add(subscriber)
+        if channel.latest is not None:
+            _offer(subscriber, channel.latest)
+        try:
+            while True:
+                snapshot = await subscriber.get()
+                if snapshot is None:
+                    return
+                yield snapshot
+                if snapshot["status"] in FINAL_STATUSES:
+                    return
+        finally:
+            channel.subscribers.discard(subscriber)
+            if not channel.subscribers:
+                channel.task.cancel()
+                if self._channels.get(match_id) is channel:
+                    del self._channels[match_id]
+
+    async def _poll(self, match_id: str, channel: _Channel) -> None:
+        try:
+            while True:
+                try:
+                    snapshot = await run_in_threadpool(self.fetch, match_id)
+                except Exception as e:
+                    logger.warning(f"[{match_id}] 读取比赛进度失败: {e}")
+                    await asyncio.sleep(self.poll_seconds)
+                    continue
+                self.polls += 1
+                if snapshot is None:
+                    # 比赛不存在（或已删除）：通知订阅者结束
+                    self._broadcast(channel, None)
+                    return
+                if snapshot != channel.latest:
+                    channel.latest = snapshot
+                    self._broadcast(channel, snapshot)
+                if snapshot["status"] in FINAL_STATUSES:
+                    return
+                await asyncio.sleep(self.poll_seconds)
+        finally:
+            # 轮询结束后通道不再接收新订阅者，之后的订阅会重新建立通道
+            if self._channels.get(match_id) is channel:
+                del self._channels[match_id]
+
+    @staticmethod
+    def _broadcast(channel: _Channel, snapshot: Optional[Dict[str, Any]]) -> None:
+        for subscriber in channel.subscribers:
+            _offer(subscriber, snapshot)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "matches": len(self._channels),
+            "subscribers": sum(len(c.subscribers) for c in self._channels.values()),
+            "polls": self.polls,
+        }
@@ -0,0 +1,215 @@
+"""策略参数扫描
+
+对同一段行情批量回测一种策略类型的全部参数组合：
+- 组合按块分发，每块在一个 MatchEngine 内以向量化路径一次跑完，
+  块内相同规格的指标（如同一 lookback 的 SMA）只计算一次
+- API 通过 run_sweep_async 把各块提交到共享的 match_executor，与比赛共用同一个有界进程池，
+  并发请求不会各自新建进程池；run_sweep 供脚本离线使用，按 workers 自建进程池
+- 参数组合只存在于内存，不创建数据库 Strategy 记录
+"""
+import asyncio
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.core.executor import MatchExecutor, match_executor
+from app.core.kline_series import KlineSeries
+from app.core.match_engine import MatchEngine, STRATEGY_CLASSES
+from app.models.match import MatchConfig
+from app.models.strategy import Strategy, StrategyParams, StrategyType
+from app.models.sweep import ParamGrid, SweepResultRow
+
+# 可排序字段 → 是否降序（回撤越小越好，其余越大越好）
+SWEEP_SORT_KEYS: Dict[str, bool] = {
+    "return_pct": True,
+    "sharpe_ratio": True,
+    "sortino_ratio": True,
+    "calmar_ratio": True,
+    "max_drawdown": False,
+    "total_trades": True,
+}
+
+
+def grid_size(grid: ParamGrid) -> int:
+    """参数网格的组合总数（不展开）"""
+    return math.prod(len(v) for v in grid.model_dump(exclude_none=True).values())
+
+
+def expand_grid(grid: ParamGrid) -> List[StrategyParams]:
+    """展开参数网格为参数组合列表（笛卡尔积，顺序稳定）
+
+    Raises:
+        ValueError: 某个组合不满足 StrategyParams 校验
+    """
+    values = grid.model_dump(exclude_none=True)
+    names = list(values)
+    combos = []
+    for combo in itertools.product(*(values[name] for name in names)):
+        # 网格中的 None 表示不设该参数（止损/止盈）
+        combos.append(StrategyParams(**dict(zip(names, combo))))
+    return combos
+
+
+def run_sweep(
+    strategy_type: StrategyType,
+    params_list: List[StrategyParams],
+    market: KlineSeries,
+    *,
+    initial_capital: float = 10000.0,
+    fee_rate: Optional[float] = None,
+    slippage_rate: Optional[float] = None,
+    sort_by: str = "return_pct",
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[SweepResultRow]:
+    """在同一段行情上回测全部参数组合，返回按 sort_by 排名的结果
+
+    Args:
+        strategy_type: 策略类型（需在 STRATEGY_CLASSES 中注册）
+        params_list: 参数组合列表
+        market: 整段行情
+        initial_capital: 每个组合的初始资金
+        fee_rate / slippage_rate: 未传时从配置读取
+        sort_by: 排名字段，见 SWEEP_SORT_KEYS
+        workers: 进程数，未传时取 settings.sweep_workers（0 表示 CPU 核数）；1 表示在当前进程执行
+        chunk_size: 每个进程任务包含的组合数，未传时取 settings.sweep_chunk_size
+
+    每次调用按 workers 新建进程池，仅供脚本离线使用；API 请求使用 run_sweep_async
+    """
+    chunks = _sweep_chunks(
+        strategy_type, params_list, market, initial_capital, fee_rate, slippage_rate, sort_by, chunk_size
+    )
+    if not chunks:
+        return []
+    workers = settings.sweep_workers if workers is None else workers
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+
+    if workers <= 1:
+        chunk_results = [_run_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk_results = list(pool.map(_run_chunk, *zip(*chunks)))
+
+    logger.info(
+        f"参数扫描完成: type={strategy_type}, 组合数={len(params_list)}, "
+        f"行情步数={len(market)}, 进程数={workers}, 分块数={len(chunks)}"
+    )
+    return _rank_rows(params_list, chunk_results, sort_by)
+
+
+async def run_sweep_async(
+    strategy_type: StrategyType,
+    params_list: List[StrategyParams],
+    market: KlineSeries,
+    *,
+    initial_capital: float = 10000.0,
+    fee_rate: Optional[float] = None,
+    slippage_rate: Optional[float] = None,
+    sort_by: str = "return_pct",
+    chunk_size: Optional[int] = None,
+    executor: MatchExecutor = match_executor,
+) -> List[SweepResultRow]:
+    """与 run_sweep 相同，但各块提交到共享的比赛执行器（与比赛共用有界并发，超出时排队）"""
+    chunks = _sweep_chunks(
+        strategy_type, params_list, market, initial_capital, fee_rate, slippage_rate, sort_by, chunk_size
+    )
+    if not chunks:
+        return []
+    chunk_results = await asyncio.gather(*(executor.run(_run_chunk, *chunk) for chunk in chunks))
+
+    logger.info(
+        f"参数扫描完成: type={strategy_type}, 组合数={len(params_list)}, "
+        f"行情步数={len(market)}, 执行器={executor.mode}, 分块数={len(chunks)}"
+    )
+    return _rank_rows(params_list, chunk_results, sort_by)
+
+
+def _sweep_chunks(
+    strategy_type: StrategyType,
+    params_list: List[StrategyParams],
+    market: KlineSeries,
+    initial_capital: float,
+    fee_rate: Optional[float],
+    slippage_rate: Optional[float],
+    sort_by: str,
+    chunk_size: Optional[int],
+) -> List[Tuple[Any, ...]]:
+    """校验参数并把组合切分为 _run_chunk 的参数元组"""
+    if strategy_type not in STRATEGY_CLASSES:
+        raise ValueError(f"不支持的策略类型: {strategy_type}")
+    if sort_by not in SWEEP_SORT_KEYS:
+        raise ValueError(f"不支持的排序字段: {sort_by}")
+
+    fee_rate = settings.fee_rate if fee_rate is None else fee_rate
+    slippage_rate = settings.slippage_rate if slippage_rate is None else slippage_rate
+    chunk_size = chunk_size or settings.sweep_chunk_size
+    params_dicts = [p.model_dump() for p in params_list]
+    return [
+        (strategy_type, params_dicts[i:i + chunk_size], i, market, initial_capital, fee_rate, slippage_rate)
+        for i in range(0, len(params_dicts), chunk_size)
+    ]
+
+
+def _rank_rows(
+    params_list: List[StrategyParams],
+    chunk_results: List[List[Tuple[int, Dict[str, Any]]]],
+    sort_by: str,
+) -> List[SweepResultRow]:
+    """合并各块结果并按 sort_by 排名"""
+    rows: List[Tuple[int, Dict[str, Any]]] = [row for part in chunk_results for row in part]
+    descending = SWEEP_SORT_KEYS[sort_by]
+    # 同分时保持组合原始顺序，结果稳定可复现
+    rows.sort(key=lambda r: (-r[1][sort_by] if descending else r[1][sort_by], r[0]))
+    return [
+        SweepResultRow(rank=rank, params=params_list[index], **metrics)
+        for rank, (index, metrics) in enumerate(rows, start=1)
+    ]
+
+
+def _run_chunk(
+    strategy_type: StrategyType,
+    params_chunk: List[Dict[str, Any]],
+    offset: int,
+    market: KlineSeries,
+    initial_capital: float,
+    fee_rate: float,
+    slippage_rate: float,
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """在一个引擎内回测一块参数组合（进程池任务，需可 pickle）"""
+    created_at = datetime.now()
+    strategies = [
+        Strategy(
+            id=str(offset + i),
+            name=f"sweep-{offset + i}",
+            type=strategy_type,
+            params=StrategyParams(**params),
+            created_at=created_at,
+        )
+        for i, params in enumerate(params_chunk)
+    ]
+    config = MatchConfig(initial_capital=initial_capital, duration_steps=len(market))
+    engine = MatchEngine(config, fee_rate=fee_rate, slippage_rate=slippage_rate, record_log=False)
+    match = engine.initialize_match(strategies)
+    results = engine.run_vectorized(match, market)
+    return [
+        (
+            int(r.strategy_id),
+            {
+                "final_value": r.final_value,
+                "return_pct": r.return_pct,
+                "max_drawdown": r.max_drawdown,
+                "sharpe_ratio": r.sharpe_ratio,
+                "sortino_ratio": r.sortino_ratio,
+                "calmar_ratio": r.calmar_ratio,
+                "total_trades": r.total_trades,
+                "win_trades": r.win_trades,
+            },
+        )
+        for r in results
+    ]
@@ -0,0 +1,187 @@
+"""价值序列的在线统计（峰值、最大回撤、水下时长、收益率均值/方差/下行偏差）
+
+PortfolioBook 每步向价值矩阵追加一行；ValueMetrics 按固定大小的行块（METRIC_BLOCK 步）
+把新追加的行折叠进各策略的运行状态，对全部策略批量计算：
+- peak / max_drawdown: 运行峰值与最大回撤（比例）
+- underwater / max_duration: 当前与最长的连续低于峰值步数（回撤持续时间）
+- count / mean / m2: 单步收益率的个数、均值与离差平方和，块内两遍计算后按
+  Welford 的并行形式（Chan 合并）并入运行状态，数值稳定
+- downside: 负收益率的平方和（下行偏差，目标收益率为 0）
+
+块的边界只由步数决定（从第 1 行起每 METRIC_BLOCK 行一块），逐步执行与向量化回测
+折叠的块完全相同，统计结果逐位一致。结算与实时进度只需处理最后一个不完整的块，
+耗时与比赛总步数无关。
+
+ratio_metrics() 由运行状态计算年化指标，年化系数由 K 线周期换算（steps_per_year）。
+"""
+import math
+import re
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+# 每次折叠的行数
+METRIC_BLOCK = 256
+
+_TIMEFRAME_MINUTES = {"m": 1, "h": 60, "d": 1440, "w": 10080}
+_TIMEFRAME_PATTERN = re.compile(r"^(\d+)([mhdw])$")
+_MINUTES_PER_YEAR = 365 * 24 * 60
+
+
+def steps_per_year(timeframe: str) -> float:
+    """K 线周期（如 "5m"、"1h"、"1d"）换算为每年的步数，用于年化"""
+    match = _TIMEFRAME_PATTERN.match(timeframe.strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"无法识别的 K 线周期: {timeframe}")
+    return _MINUTES_PER_YEAR / (int(match.group(1)) * _TIMEFRAME_MINUTES[match.group(2)])
+
+
+class _Block(NamedTuple):
+    """一个行块的统计（按策略下标的数组）"""
+    drawdown: np.ndarray
+    peak: np.ndarray
+    duration: np.ndarray
+    underwater: np.ndarray
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    downside: np.ndarray
+
+
+class ValueMetrics:
+    """全部策略价值序列的运行统计"""
+
+    __slots__ = (
+        "peak", "max_drawdown", "underwater", "max_duration",
+        "count", "mean", "m2", "downside", "folded",
+    )
+
+    def __init__(self, n: int, initial_value: float):
+        self.peak = np.full(n, float(initial_value))
+        self.max_drawdown = np.zeros(n)
+        self.underwater = np.zeros(n, dtype=np.int64)
+        self.max_duration = np.zeros(n, dtype=np.int64)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.downside = np.zeros(n)
+        self.folded = 1  # 已折叠的行数（第 0 行为初始资金，没有收益率）
+
+    def fold(self, history: np.ndarray, length: int) -> None:
+        """折叠 history 前 length 行中全部完整的块"""
+        while length - self.folded >= METRIC_BLOCK:
+            stop = self.folded + METRIC_BLOCK
+            self._merge(_block_stats(history, self.folded, stop, self.peak, self.underwater))
+            self.folded = stop
+
+    def snapshot(self, history: np.ndarray, length: int) -> "ValueMetrics":
+        """截至第 length 行的统计，不完整的块只参与计算、不计入运行状态"""
+        self.fold(history, length)
+        if length <= self.folded:
+            return self
+        current = self.copy()
+        current._merge(_block_stats(history, self.folded, length, self.peak, self.underwater))
+        current.folded = length
+        return current
+
+    def copy(self) -> "ValueMetrics":
+        """浅拷贝（_merge 总是替换数组而不原地修改，拷贝之间互不影响）"""
+        other = ValueMetrics.__new__(ValueMetrics)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def _merge(self, block: _Block) -> None:
+        self.max_drawdown = np.maximum(self.max_drawdown, block.drawdown)
+        self.peak = block.peak
+        self.max_duration = np.maximum(self.max_duration, block.duration)
+        self.underwater = block.underwater
+        self.count, self.mean, self.m2 = _combine(
+            self.count, self.mean, self.m2, block.count, block.mean, block.m2
+        )
+        self.downside = self.downside + block.downside
+
+
+def _block_stats(
+    history: np.ndarray, start: int, stop: int, peak: np.ndarray, underwater: np.ndarray
+) -> _Block:
+    """行 [start, stop) 的块统计，peak / underwater 为块前的运行峰值与连续水下步数"""
+    curr = history[start:stop]
+    prev = history[start - 1:stop - 1]
+
+    running_peak = np.maximum.accumulate(curr, axis=0)
+    np.maximum(running_peak, peak, out=running_peak)
+    drawdown = ((running_peak - curr) / running_peak).max(axis=0)
+
+    # 连续水下步数：最近一次回到峰值的行号（块前的水下步数折算为负的起点）逐行取累计最大
+    offsets = np.arange(stop - start)[:, None]
+    below = curr < running_peak
+    last_high = np.where(below, -1 - underwater, offsets)
+    np.maximum.accumulate(last_high, axis=0, out=last_high)
+    run = offsets - last_high
+
+    valid = prev > 0
+    returns = np.divide(curr - prev, prev, out=np.zeros_like(curr), where=valid)
+    nb = valid.sum(axis=0)
+    mean_b = np.divide(returns.sum(axis=0), nb, out=np.zeros(len(nb)), where=nb > 0)
+    deviation = np.where(valid, returns - mean_b, 0.0)
+    m2_b = (deviation * deviation).sum(axis=0)
+    negative = np.minimum(returns, 0.0)
+
+    return _Block(
+        drawdown=drawdown,
+        peak=running_peak[-1].copy(),
+        duration=run.max(axis=0),
+        underwater=run[-1].copy(),
+        count=nb,
+        mean=mean_b,
+        m2=m2_b,
+        downside=(negative * negative).sum(axis=0),
+    )
+
+
+def _combine(count, mean, m2, nb, mean_b, m2_b):
+    """合并两组 (个数, 均值, 离差平方和)"""
+    total = count + nb
+    safe_total = np.maximum(total, 1).astype(np.float64)
+    delta = mean_b - mean
+    new_mean = mean + delta * (nb / safe_total)
+    new_m2 = m2 + m2_b + delta * delta * (count * (nb / safe_total))
+    return total, new_mean, new_m2
+
+
+def sharpe_ratios(count: np.ndarray, mean: np.ndarray, m2: np.ndarray, steps_per_year: float) -> np.ndarray:
+    """年化夏普率（无风险利率=0，总体标准差）；收益率少于 2 个或标准差为 0 时为 0"""
+    std = np.sqrt(np.divide(m2, count, out=np.zeros(len(count)), where=count > 0))
+    ok = (count >= 2) & (std > 0)
+    ratio = np.divide(mean, std, out=np.zeros(len(count)), where=ok)
+    return ratio * math.sqrt(steps_per_year)
+
+
+def ratio_metrics(metrics: ValueMetrics, steps_per_year: float) -> Dict[str, np.ndarray]:
+    """由运行统计计算风险收益指标（按策略下标的数组）
+
+    - max_drawdown: 最大回撤（%）；max_drawdown_duration: 最长回撤持续步数
+    - sharpe_ratio / sortino_ratio: 年化夏普率 / 索提诺率（下行偏差，目标收益率 0）
+    - volatility: 年化波动率（%）
+    - calmar_ratio: 年化收益率（单步平均收益率 × 年化步数）/ 最大回撤
+    下行偏差或回撤为 0 时对应比率为 0（与夏普率一致）。
+    """
+    n = len(metrics.count)
+    count = metrics.count
+    has_returns = count > 0
+    variance = np.divide(metrics.m2, count, out=np.zeros(n), where=has_returns)
+    downside = np.sqrt(np.divide(metrics.downside, count, out=np.zeros(n), where=has_returns))
+    scale = math.sqrt(steps_per_year)
+    drawdown = np.maximum(metrics.max_drawdown, 0.0)
+    annual_return = metrics.mean * steps_per_year
+    return {
+        "max_drawdown": drawdown * 100,
+        "max_drawdown_duration": metrics.max_duration,
+        "sharpe_ratio": sharpe_ratios(count, metrics.mean, metrics.m2, steps_per_year),
+        "sortino_ratio": np.divide(
+            metrics.mean, downside, out=np.zeros(n), where=(count >= 2) & (downside > 0)
+        ) * scale,
+        "volatility": np.sqrt(variance) * scale * 100,
+        "calmar_ratio": np.divide(annual_return, drawdown, out=np.zeros(n), where=drawdown > 0),
+    }
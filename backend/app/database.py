@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine, event
+import time
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
-from sqlalchemy.pool import StaticPool
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from typing import AsyncGenerator, Dict, Generator, Tuple
 from pathlib import Path
 from app.config import settings
+from app.core.metrics import DB_POOL_WAIT, registry
 from loguru import logger
 
 
@@ -12,6 +15,29 @@ class Base(DeclarativeBase):
     pass
 
 
+class TimedQueuePool(QueuePool):
+    """记录获取连接等待时间（含池满时的排队与新建连接）的连接池"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """异步引擎使用的计时连接池"""
+
+
+def _configure_sqlite(dbapi_conn, connection_record):
+    """SQLite 启用外键约束；文件库使用 WAL 日志（同步与异步引擎各自的连接读写互不阻塞，内存库忽略）"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
 # 创建引擎
 def create_db_engine():
     """根据配置创建数据库引擎"""
@@ -26,22 +52,18 @@ def create_db_engine():
         # SQLite 配置
         engine = create_engine(
             settings.database_url,
+            # 文件库使用连接池，每个会话独占一个连接（线程池中的 worker 与进度轮询各自的事务互不交错）
             connect_args={"check_same_thread": False},
-            poolclass=StaticPool,  # SQLite 使用单例连接池
             echo=settings.db_echo,
         )
 
-        # SQLite 启用外键约束
-        @event.listens_for(engine, "connect")
-        def set_sqlite_pragma(dbapi_conn, connection_record):
-            cursor = dbapi_conn.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.close()
+        event.listen(engine, "connect", _configure_sqlite)
 
     else:
         # PostgreSQL/MySQL 配置
         engine = create_engine(
             settings.database_url,
+            poolclass=TimedQueuePool,
             pool_size=settings.db_pool_size,
             max_overflow=settings.db_max_overflow,
             pool_timeout=settings.db_pool_timeout,
@@ -53,9 +75,82 @@ def create_db_engine():
     return engine
 
 
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def async_database_url(url: str) -> str:
+    """同步连接串换成对应的异步驱动：SQLite → aiosqlite，PostgreSQL → asyncpg"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend in ("postgresql", "postgres"):
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    raise ValueError(f"无法推导异步连接串，请设置 ASYNC_DATABASE_URL: {parsed.drivername}")
+
+
+def _async_shares_sync_db() -> bool:
+    """异步引擎能否看到同步引擎的数据（内存 SQLite 只存在于同步引擎自己的连接中）"""
+    return bool(settings.async_database_url) or not _is_memory_sqlite(settings.database_url)
+
+
+def create_async_db_engine() -> AsyncEngine:
+    """创建 API 路由使用的异步引擎（与同步引擎指向同一个库）"""
+    if not _async_shares_sync_db():
+        # 内存库无法在两个引擎间共享：导入时不报错（仅用同步会话的脚本照常运行），
+        # 异步引擎指向一个独立的空内存库，首次获取异步会话时再报错
+        logger.warning("内存 SQLite 无法被异步引擎共享，API 路由不可用；请使用文件库（如 sqlite:///./data/test.db）")
+        return create_async_engine(
+            "sqlite+aiosqlite://",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+            echo=settings.db_echo,
+        )
+
+    url = settings.async_database_url or async_database_url(settings.database_url)
+    if settings.is_sqlite:
+        async_engine = create_async_engine(url, echo=settings.db_echo)
+        event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+        return async_engine
+
+    return create_async_engine(
+        url,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        echo=settings.db_echo,
+    )
+
+
 engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# API 路由使用异步会话，数据库 I/O 不阻塞事件循环；worker、参数扫描等在线程 / 进程中运行的代码仍用同步会话。
+# expire_on_commit=False：提交后仍可读取已加载的属性（异步会话不能隐式懒加载）
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _pool_stats() -> Dict[Tuple[str, ...], float]:
+    """连接池状态（非 QueuePool 的连接池不提供这些统计，此时不输出样本）"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        ("size",): pool.size(),
+        ("checked_in",): pool.checkedin(),
+        ("checked_out",): pool.checkedout(),
+        ("overflow",): pool.overflow(),
+    }
+
+
+registry.callback_gauge("db_pool_connections", "数据库连接池连接数（按状态）", ("state",), _pool_stats)
+
 
 def get_db() -> Generator[Session, None, None]:
     """依赖注入：获取数据库会话"""
@@ -66,6 +161,19 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """依赖注入：获取异步数据库会话"""
+    if not _async_shares_sync_db():
+        raise RuntimeError("内存 SQLite 无法被同步与异步引擎共享，请使用文件库（如 sqlite:///./data/test.db）")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """关闭异步引擎的连接池"""
+    await async_engine.dispose()
+
+
 def init_db():
     """初始化数据库(创建所有表)"""
     logger.info(f"初始化数据库: {settings.database_url}")
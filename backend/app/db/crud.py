@@ -1,12 +1,158 @@
-from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import select, update, delete
-from typing import List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy import Select, and_, bindparam, case, select, update, delete, func, insert, tuple_
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 from loguru import logger
 
 from app.db import models
 from app.models import strategy as strategy_schema
 
 
+# 参赛记录的结果列 → 结果中缺失时的默认值
+PARTICIPANT_RESULT_DEFAULTS = {
+    "final_value": None,
+    "return_pct": None,
+    "total_trades": 0,
+    "win_trades": 0,
+    "rank": None,
+    "max_drawdown": 0.0,
+    "sharpe_ratio": 0.0,
+    "sortino_ratio": 0.0,
+    "calmar_ratio": 0.0,
+    "volatility": 0.0,
+    "max_drawdown_duration": 0,
+    "profit_factor": None,
+    "avg_trade_pnl": 0.0,
+    "exposure_pct": 0.0,
+    "turnover": 0.0,
+    "value_history": [],
+}
+
+
+# ==================== 查询构造（同步与异步 CRUD 共用） ====================
+def _new_strategy(strategy: strategy_schema.StrategyCreate, user_id: Optional[str]) -> models.Strategy:
+    return models.Strategy(
+        user_id=user_id,
+        name=strategy.name,
+        type=strategy.type.value,
+        params=strategy.params.model_dump(),
+        code=strategy.code
+    )
+
+
+def _strategies_by_ids_stmt(ids: List[str]) -> Select:
+    return select(models.Strategy).where(models.Strategy.id.in_(ids))
+
+
+def _strategy_list_stmt(skip: int, limit: int, user_id: Optional[str], is_public: Optional[bool]) -> Select:
+    stmt = select(models.Strategy)
+    if user_id:
+        stmt = stmt.where(models.Strategy.user_id == user_id)
+    if is_public is not None:
+        stmt = stmt.where(models.Strategy.is_public == is_public)
+    return stmt.offset(skip).limit(limit).order_by(models.Strategy.created_at.desc())
+
+
+def _new_match(config: dict, strategy_ids: List[str], creator_id: Optional[str]) -> models.Match:
+    """比赛记录及其参赛记录（一次 flush 写入）"""
+    return models.Match(
+        creator_id=creator_id,
+        status="pending",
+        initial_capital=config["initial_capital"],
+        trading_pair=config["trading_pair"],
+        timeframe=config["timeframe"],
+        duration_steps=config["duration_steps"],
+        market_type=config.get("market_type"),
+        market_source=config.get("market_source"),
+        coin_id=config.get("coin_id"),
+        coin_ids=config.get("coin_ids"),
+        market_seed=config.get("market_seed"),
+        participants=[models.MatchParticipant(strategy_id=strategy_id) for strategy_id in strategy_ids],
+    )
+
+
+def _match_detail_stmt(match_id: str, load_logs: bool) -> Select:
+    opts = [
+        selectinload(models.Match.participants).selectinload(models.MatchParticipant.strategy),
+    ]
+    if load_logs:
+        opts.append(selectinload(models.Match.logs))
+    return select(models.Match).where(models.Match.id == match_id).options(*opts)
+
+
+def _match_list_stmt(skip: int, limit: int, status: Optional[str]) -> Select:
+    stmt = (
+        select(models.Match)
+        .options(
+            selectinload(models.Match.participants).selectinload(models.MatchParticipant.strategy),
+        )
+    )
+    if status:
+        stmt = stmt.where(models.Match.status == status)
+    return stmt.offset(skip).limit(limit).order_by(models.Match.created_at.desc())
+
+
+def _match_summaries_stmt(limit: int, status: Optional[str], before: Optional[Tuple[datetime, str]]) -> Select:
+    match = models.Match
+    winner = aliased(models.MatchParticipant)
+    participants_count = (
+        select(func.count())
+        .where(models.MatchParticipant.match_id == match.id)
+        .correlate(match)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            match.id,
+            match.status,
+            match.error_message,
+            match.initial_capital,
+            match.trading_pair,
+            match.timeframe,
+            match.duration_steps,
+            match.market_type,
+            match.market_source,
+            match.coin_id,
+            match.created_at,
+            match.start_time,
+            match.end_time,
+            winner.strategy_id.label("winner_id"),
+            models.Strategy.name.label("winner_name"),
+            winner.return_pct.label("winner_return_pct"),
+            participants_count.label("participants_count"),
+        )
+        .outerjoin(winner, and_(winner.match_id == match.id, winner.rank == 1))
+        .outerjoin(models.Strategy, models.Strategy.id == winner.strategy_id)
+    )
+    if status:
+        stmt = stmt.where(match.status == status)
+    if before is not None:
+        stmt = stmt.where(tuple_(match.created_at, match.id) < tuple_(*before))
+    return stmt.order_by(match.created_at.desc(), match.id.desc()).limit(limit)
+
+
+def _logs_stmt(match_id: str, after_step: int) -> Select:
+    """step > after_step 的日志，按步数升序（走 (match_id, step) 索引）"""
+    return (
+        select(models.MatchLog)
+        .where(models.MatchLog.match_id == match_id, models.MatchLog.step > after_step)
+        .order_by(models.MatchLog.step)
+    )
+
+
+def _delete_logs_stmt(match_id: str):
+    return delete(models.MatchLog).where(models.MatchLog.match_id == match_id)
+
+
+def _log_rows_stmt(match_id: str, after_step: int) -> Select:
+    return (
+        select(models.MatchLog.step, models.MatchLog.data)
+        .where(models.MatchLog.match_id == match_id, models.MatchLog.step > after_step)
+        .order_by(models.MatchLog.step)
+    )
+
+
 # ==================== 策略 CRUD ====================
 class StrategyCRUD:
 
@@ -17,13 +163,7 @@ class StrategyCRUD:
             user_id: Optional[str] = None
     ) -> models.Strategy:
         """创建策略"""
-        db_strategy = models.Strategy(
-            user_id=user_id,
-            name=strategy.name,
-            type=strategy.type.value,
-            params=strategy.params.model_dump(),
-            code=strategy.code
-        )
+        db_strategy = _new_strategy(strategy, user_id)
         db.add(db_strategy)
         db.commit()
         db.refresh(db_strategy)
@@ -35,6 +175,14 @@ class StrategyCRUD:
         """获取单个策略"""
         return db.get(models.Strategy, strategy_id)
 
+    @staticmethod
+    def get_many(db: Session, strategy_ids: Iterable[str]) -> Dict[str, models.Strategy]:
+        """按 ID 批量获取策略（一次 IN 查询），返回 id → 策略，不存在的 ID 不出现"""
+        ids = list(dict.fromkeys(strategy_ids))
+        if not ids:
+            return {}
+        return {s.id: s for s in db.scalars(_strategies_by_ids_stmt(ids))}
+
     @staticmethod
     def get_all(
             db: Session,
@@ -44,17 +192,7 @@ class StrategyCRUD:
             is_public: Optional[bool] = None
     ) -> List[models.Strategy]:
         """获取策略列表"""
-        stmt = select(models.Strategy)
-
-        if user_id:
-            stmt = stmt.where(models.Strategy.user_id == user_id)
-
-        if is_public is not None:
-            stmt = stmt.where(models.Strategy.is_public == is_public)
-
-        stmt = stmt.offset(skip).limit(limit).order_by(models.Strategy.created_at.desc())
-
-        return list(db.scalars(stmt).all())
+        return list(db.scalars(_strategy_list_stmt(skip, limit, user_id, is_public)).all())
 
     @staticmethod
     def update(
@@ -89,38 +227,42 @@ class StrategyCRUD:
         return True
 
     @staticmethod
-    def update_stats(
-            db: Session,
-            strategy_id: str,
-            match_result: dict
-    ):
-        """更新策略统计数据"""
-        db_strategy = StrategyCRUD.get(db, strategy_id)
-        if not db_strategy:
-            return
-
-        db_strategy.total_matches += 1
-        if match_result.get("rank") == 1:
-            db_strategy.wins += 1
-
-        db_strategy.win_rate = db_strategy.wins / db_strategy.total_matches
-
-        # 滚动更新平均收益率
-        old_total = db_strategy.avg_return * (db_strategy.total_matches - 1)
-        db_strategy.avg_return = (old_total + match_result.get("return_pct", 0)) / db_strategy.total_matches
-
-        # 滚动更新最大回撤（取最大值记录历史最坏情况）
-        new_dd = match_result.get("max_drawdown", 0.0)
-        if new_dd > db_strategy.max_drawdown:
-            db_strategy.max_drawdown = new_dd
+    def record_results(db: Session, results: List[dict]):
+        """按一场比赛的结果批量更新参赛策略的累计统计（不提交，由调用方提交）
 
-        # 滚动更新夏普率（滑动平均）
-        old_sharpe_total = db_strategy.sharpe_ratio * (db_strategy.total_matches - 1)
-        db_strategy.sharpe_ratio = (
-            old_sharpe_total + match_result.get("sharpe_ratio", 0.0)
-        ) / db_strategy.total_matches
-
-        db.commit()
+        一条 UPDATE 以 executemany 执行，统计在数据库端按原值原子更新：
+        场次与冠军次数累加，胜率、平均收益率、夏普率按新场次滚动平均，最大回撤取历史最大值。
+        """
+        if not results:
+            return
+        table = models.Strategy.__table__
+        matches = table.c.total_matches + 1
+        wins = table.c.wins + bindparam("b_win")
+        new_drawdown = bindparam("b_drawdown")
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                total_matches=matches,
+                wins=wins,
+                win_rate=wins * 1.0 / matches,
+                avg_return=(table.c.avg_return * table.c.total_matches + bindparam("b_return")) / matches,
+                max_drawdown=case(
+                    (new_drawdown > table.c.max_drawdown, new_drawdown), else_=table.c.max_drawdown
+                ),
+                sharpe_ratio=(table.c.sharpe_ratio * table.c.total_matches + bindparam("b_sharpe")) / matches,
+            )
+        )
+        db.execute(stmt, [
+            {
+                "b_id": r["strategy_id"],
+                "b_win": 1 if r.get("rank") == 1 else 0,
+                "b_return": r.get("return_pct", 0.0),
+                "b_drawdown": r.get("max_drawdown", 0.0),
+                "b_sharpe": r.get("sharpe_ratio", 0.0),
+            }
+            for r in results
+        ])
 
 
 # ==================== 比赛 CRUD ====================
@@ -134,28 +276,8 @@ class MatchCRUD:
             creator_id: Optional[str] = None
     ) -> models.Match:
         """创建比赛"""
-        db_match = models.Match(
-            creator_id=creator_id,
-            status="pending",
-            initial_capital=config["initial_capital"],
-            trading_pair=config["trading_pair"],
-            timeframe=config["timeframe"],
-            duration_steps=config["duration_steps"],
-            market_type=config.get("market_type"),
-            market_source=config.get("market_source"),
-            coin_id=config.get("coin_id"),
-        )
+        db_match = _new_match(config, strategy_ids, creator_id)
         db.add(db_match)
-        db.flush()  # 获取 ID 但不提交
-
-        # 创建参与记录
-        for strategy_id in strategy_ids:
-            participant = models.MatchParticipant(
-                match_id=db_match.id,
-                strategy_id=strategy_id
-            )
-            db.add(participant)
-
         db.commit()
         db.refresh(db_match)
         logger.info(f"创建比赛: {db_match.id}, 参赛策略数: {len(strategy_ids)}")
@@ -164,17 +286,12 @@ class MatchCRUD:
     @staticmethod
     def get(db: Session, match_id: str, load_logs: bool = True) -> Optional[models.Match]:
         """获取比赛（预加载 participants+strategy，可选 logs，避免 N+1）"""
-        opts = [
-            selectinload(models.Match.participants).selectinload(models.MatchParticipant.strategy),
-        ]
-        if load_logs:
-            opts.append(selectinload(models.Match.logs))
-        stmt = (
-            select(models.Match)
-            .where(models.Match.id == match_id)
-            .options(*opts)
-        )
-        return db.scalars(stmt).one_or_none()
+        return db.scalars(_match_detail_stmt(match_id, load_logs)).one_or_none()
+
+    @staticmethod
+    def exists(db: Session, match_id: str) -> bool:
+        """比赛是否存在（只查主键，不加载关联）"""
+        return db.scalar(select(models.Match.id).where(models.Match.id == match_id)) is not None
 
     @staticmethod
     def get_all(
@@ -184,16 +301,29 @@ class MatchCRUD:
             status: Optional[str] = None
     ) -> List[models.Match]:
         """获取比赛列表（预加载 participants+strategy，避免 N+1）"""
-        stmt = (
-            select(models.Match)
-            .options(
-                selectinload(models.Match.participants).selectinload(models.MatchParticipant.strategy),
-            )
-        )
-        if status:
-            stmt = stmt.where(models.Match.status == status)
-        stmt = stmt.offset(skip).limit(limit).order_by(models.Match.created_at.desc())
-        return list(db.scalars(stmt).unique().all())
+        return list(db.scalars(_match_list_stmt(skip, limit, status)).unique().all())
+
+    @staticmethod
+    def list_summaries(
+            db: Session,
+            limit: int = 50,
+            status: Optional[str] = None,
+            before: Optional[Tuple[datetime, str]] = None
+    ) -> list:
+        """比赛列表摘要（单条查询）：比赛列、冠军策略 id / 名称 / 收益率与参赛数
+
+        不加载参赛记录与 value_history；按 (created_at, id) 降序，before 为上一页最后一行的
+        (created_at, id)，以键集条件翻页，耗时与页码无关。
+        """
+        return db.execute(_match_summaries_stmt(limit, status, before)).all()
+
+    @staticmethod
+    def count_by_status(db: Session) -> dict:
+        """各状态比赛数"""
+        rows = db.execute(
+            select(models.Match.status, func.count()).group_by(models.Match.status)
+        ).all()
+        return {status: count for status, count in rows}
 
     @staticmethod
     def update_status(
@@ -201,11 +331,12 @@ class MatchCRUD:
             match_id: str,
             status: str
     ):
-        """更新比赛状态"""
-        db_match = MatchCRUD.get(db, match_id)
-        if db_match:
-            db_match.status = status
-            db.commit()
+        """更新比赛状态（单条 UPDATE，不加载比赛；不提交，由调用方提交）"""
+        db.execute(
+            update(models.Match)
+            .where(models.Match.id == match_id)
+            .values(status=status)
+        )
 
     @staticmethod
     def save_results(
@@ -213,49 +344,154 @@ class MatchCRUD:
             match_id: str,
             results: List[dict]
     ):
-        """保存比赛结果"""
-        for result in results:
-            stmt = (
-                update(models.MatchParticipant)
-                .where(
-                    models.MatchParticipant.match_id == match_id,
-                    models.MatchParticipant.strategy_id == result["strategy_id"]
-                )
-                .values(
-                    final_value=result["final_value"],
-                    return_pct=result["return_pct"],
-                    total_trades=result["total_trades"],
-                    win_trades=result["win_trades"],
-                    rank=result["rank"],
-                    max_drawdown=result.get("max_drawdown", 0.0),
-                    sharpe_ratio=result.get("sharpe_ratio", 0.0),
-                    value_history=result.get("value_history", []),
-                )
+        """保存比赛结果：全部参赛记录一条 UPDATE 以 executemany 执行（不提交，由调用方提交）"""
+        if not results:
+            return
+        table = models.MatchParticipant.__table__
+        stmt = (
+            update(table)
+            .where(
+                table.c.match_id == bindparam("b_match_id"),
+                table.c.strategy_id == bindparam("b_strategy_id"),
             )
-            db.execute(stmt)
+            .values({name: bindparam(f"b_{name}") for name in PARTICIPANT_RESULT_DEFAULTS})
+        )
+        db.execute(stmt, [
+            {
+                "b_match_id": match_id,
+                "b_strategy_id": result["strategy_id"],
+                **{f"b_{name}": result.get(name, default) for name, default in PARTICIPANT_RESULT_DEFAULTS.items()},
+            }
+            for result in results
+        ])
+        logger.info(f"保存比赛结果: {match_id}, {len(results)} 条")
 
-        db.commit()
-        logger.info(f"保存比赛结果: {match_id}")
+    @staticmethod
+    def complete(
+            db: Session,
+            match_id: str,
+            results: List[dict],
+            profile: Optional[dict] = None
+    ):
+        """写入比赛完成的全部结果：比赛状态、参赛记录与策略累计统计（不提交，由调用方在同一事务中提交）"""
+        values = {"status": "completed", "error_message": None, "end_time": datetime.utcnow()}
+        if profile is not None:
+            values["profile"] = profile
+        db.execute(update(models.Match).where(models.Match.id == match_id).values(**values))
+        MatchCRUD.save_results(db, match_id, results)
+        StrategyCRUD.record_results(db, results)
 
     @staticmethod
-    def set_error(db: Session, match_id: str, error: str):
-        """记录比赛失败原因"""
-        db_match = MatchCRUD.get(db, match_id)
-        if db_match:
-            db_match.error_message = error
-            db.commit()
+    def set_status_and_error(db: Session, match_id: str, status: str, error: Optional[str]):
+        """同时更新状态与失败原因（不提交，由调用方提交）"""
+        db.execute(
+            update(models.Match)
+            .where(models.Match.id == match_id)
+            .values(status=status, error_message=error)
+        )
+
+    @staticmethod
+    def set_profile(db: Session, match_id: str, profile: Optional[dict]):
+        """保存引擎分阶段计时报告（不提交，由调用方提交）"""
+        db.execute(
+            update(models.Match)
+            .where(models.Match.id == match_id)
+            .values(profile=profile)
+        )
 
     @staticmethod
     def delete(db: Session, match_id: str) -> bool:
-        """删除比赛"""
-        db_match = MatchCRUD.get(db, match_id)
+        """删除比赛（执行日志一条 DELETE 删除，不加载到会话）"""
+        db_match = MatchCRUD.get(db, match_id, load_logs=False)
         if not db_match:
             return False
+        db.execute(_delete_logs_stmt(match_id))
         db.delete(db_match)
         db.commit()
         logger.info(f"删除比赛: {match_id}")
         return True
 
+    @staticmethod
+    def bulk_insert_logs(
+            db: Session,
+            match_id: str,
+            snapshots: Iterable[Tuple[int, list]],
+            batch_size: int = 5000
+    ) -> int:
+        """批量写入执行日志（executemany，不提交）：先清除旧日志，保证重复执行时幂等
+
+        Args:
+            snapshots: (step, 该步各策略日志行) 的可迭代对象，按批消费，不一次性展开
+        """
+        db.execute(_delete_logs_stmt(match_id))
+        stmt = insert(models.MatchLog)
+        total = 0
+        batch = []
+        for step, entries in snapshots:
+            batch.append({"match_id": match_id, "step": step, "data": {"logs": entries}})
+            if len(batch) >= batch_size:
+                db.execute(stmt, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            db.execute(stmt, batch)
+            total += len(batch)
+        logger.info(f"写入比赛日志: {match_id}, {total} 条")
+        return total
+
+    @staticmethod
+    def get_logs_page(
+            db: Session,
+            match_id: str,
+            after_step: int = -1,
+            limit: int = 500
+    ) -> List[models.MatchLog]:
+        """按步数键集分页读取日志（step > after_step，走 (match_id, step) 索引）"""
+        return list(db.scalars(_logs_stmt(match_id, after_step).limit(limit)).all())
+
+    @staticmethod
+    def iter_logs(
+            db: Session,
+            match_id: str,
+            after_step: int = -1,
+            chunk_size: int = 1000
+    ) -> Iterator[Tuple[int, dict]]:
+        """流式读取日志 (step, data)：服务端游标按块拉取，内存占用与比赛长度无关"""
+        stmt = _log_rows_stmt(match_id, after_step).execution_options(yield_per=chunk_size)
+        for step, data in db.execute(stmt):
+            yield step, data
+
+    @staticmethod
+    def upsert_progress(
+            db: Session,
+            match_id: str,
+            step: int,
+            total_steps: int,
+            data: dict
+    ):
+        """写入比赛最新进度（每场一行，覆盖旧快照）"""
+        progress = db.get(models.MatchProgress, match_id)
+        if progress is None:
+            db.add(models.MatchProgress(match_id=match_id, step=step, total_steps=total_steps, data=data))
+        else:
+            progress.step = step
+            progress.total_steps = total_steps
+            progress.data = data
+        db.commit()
+
+    @staticmethod
+    def get_progress(
+            db: Session,
+            match_id: str
+    ) -> Optional[Tuple[str, int, Optional[models.MatchProgress]]]:
+        """获取 (比赛状态, 总步数, 最新进度) 的单次查询结果，比赛不存在时返回 None"""
+        row = db.execute(
+            select(models.Match.status, models.Match.duration_steps, models.MatchProgress)
+            .outerjoin(models.MatchProgress, models.MatchProgress.match_id == models.Match.id)
+            .where(models.Match.id == match_id)
+        ).one_or_none()
+        return None if row is None else tuple(row)
+
     @staticmethod
     def add_log(
             db: Session,
@@ -271,3 +507,340 @@ class MatchCRUD:
         )
         db.add(log)
         # 注意：不立即提交，由调用方批量提交
+
+
+# ==================== 比赛任务队列 CRUD ====================
+class MatchJobCRUD:
+    """持久化任务队列：领取使用租约，Postgres 上以 FOR UPDATE SKIP LOCKED 避免多 worker 争抢，
+    SQLite 上依赖带状态条件的 UPDATE 保证同一任务只被一个 worker 领取"""
+
+    @staticmethod
+    def enqueue(
+            db: Session,
+            match_id: str,
+            payload: dict,
+            max_attempts: int = 3
+    ) -> models.MatchJob:
+        """任务入队"""
+        job = models.MatchJob(
+            match_id=match_id,
+            status="queued",
+            payload=payload,
+            attempts=0,
+            max_attempts=max_attempts,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info(f"比赛任务入队: {job.id} (match={match_id})")
+        return job
+
+    @staticmethod
+    def get(db: Session, job_id: str) -> Optional[models.MatchJob]:
+        return db.get(models.MatchJob, job_id)
+
+    @staticmethod
+    def get_by_match(db: Session, match_id: str) -> Optional[models.MatchJob]:
+        return db.scalar(select(models.MatchJob).where(models.MatchJob.match_id == match_id))
+
+    @staticmethod
+    def claim(
+            db: Session,
+            worker_id: str,
+            lease_seconds: float,
+            job_id: Optional[str] = None,
+            created_before: Optional[datetime] = None
+    ) -> Optional[models.MatchJob]:
+        """领取最早入队的一个任务（或指定任务），成功时返回任务并持有租约
+
+        任务租约与比赛状态（running）在同一事务中提交。
+        """
+        stmt = (
+            select(models.MatchJob.id, models.MatchJob.match_id)
+            .where(models.MatchJob.status == "queued")
+            .order_by(models.MatchJob.created_at)
+            .limit(1)
+        )
+        if job_id is not None:
+            stmt = stmt.where(models.MatchJob.id == job_id)
+        if created_before is not None:
+            stmt = stmt.where(models.MatchJob.created_at < created_before)
+        if db.get_bind().dialect.name != "sqlite":
+            stmt = stmt.with_for_update(skip_locked=True)
+        row = db.execute(stmt).first()
+        if row is None:
+            db.rollback()
+            return None
+        candidate, match_id = row
+
+        now = datetime.utcnow()
+        result = db.execute(
+            update(models.MatchJob)
+            .where(models.MatchJob.id == candidate, models.MatchJob.status == "queued")
+            .values(
+                status="running",
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                attempts=models.MatchJob.attempts + 1,
+                updated_at=now,
+            )
+        )
+        if result.rowcount != 1:
+            # 已被其他 worker 抢先领取
+            db.rollback()
+            return None
+        MatchCRUD.update_status(db, match_id, "running")
+        db.commit()
+        return db.get(models.MatchJob, candidate)
+
+    @staticmethod
+    def heartbeat(db: Session, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """续约，返回 False 表示租约已丢失（过期后被重新入队或被其他 worker 领取）"""
+        now = datetime.utcnow()
+        result = db.execute(
+            update(models.MatchJob)
+            .where(
+                models.MatchJob.id == job_id,
+                models.MatchJob.status == "running",
+                models.MatchJob.lease_owner == worker_id,
+            )
+            .values(
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                updated_at=now,
+            )
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def holds_lease(db: Session, job_id: str, worker_id: str) -> bool:
+        """当前 worker 是否仍持有任务租约（在提交结果的同一事务中调用）"""
+        stmt = select(models.MatchJob.id).where(
+            models.MatchJob.id == job_id,
+            models.MatchJob.status == "running",
+            models.MatchJob.lease_owner == worker_id,
+        )
+        if db.get_bind().dialect.name != "sqlite":
+            stmt = stmt.with_for_update()
+        return db.scalar(stmt) is not None
+
+    @staticmethod
+    def mark_completed(db: Session, job_id: str):
+        """标记任务完成（不提交，与比赛结果在同一事务中提交）"""
+        db.execute(
+            update(models.MatchJob)
+            .where(models.MatchJob.id == job_id)
+            .values(status="completed", lease_owner=None, lease_expires_at=None, updated_at=datetime.utcnow())
+        )
+
+    @staticmethod
+    def fail(db: Session, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        """记录失败：未超过最大尝试次数时重新入队，否则标记失败；返回新状态（租约已丢失时为 None）"""
+        job = db.get(models.MatchJob, job_id)
+        if job is None or job.status != "running" or job.lease_owner != worker_id:
+            db.rollback()
+            return None
+        job.status = "queued" if job.attempts < job.max_attempts else "failed"
+        job.lease_owner = None
+        job.lease_expires_at = None
+        job.last_error = error
+        if job.status == "queued":
+            MatchCRUD.set_status_and_error(db, job.match_id, "pending", error)
+        else:
+            MatchCRUD.set_status_and_error(db, job.match_id, "failed", error)
+        db.commit()
+        return job.status
+
+    @staticmethod
+    def requeue_expired(db: Session) -> int:
+        """将租约过期（worker 崩溃或失联）的任务重新入队，超过最大尝试次数的标记失败"""
+        stmt = select(models.MatchJob).where(
+            models.MatchJob.status == "running",
+            models.MatchJob.lease_expires_at < datetime.utcnow(),
+        )
+        if db.get_bind().dialect.name != "sqlite":
+            stmt = stmt.with_for_update(skip_locked=True)
+        requeued = 0
+        for job in db.scalars(stmt).all():
+            error = f"租约过期（worker {job.lease_owner} 未续约）"
+            job.lease_owner = None
+            job.lease_expires_at = None
+            job.last_error = error
+            if job.attempts < job.max_attempts:
+                job.status = "queued"
+                MatchCRUD.set_status_and_error(db, job.match_id, "pending", None)
+                requeued += 1
+            else:
+                job.status = "failed"
+                MatchCRUD.set_status_and_error(db, job.match_id, "failed", error)
+        db.commit()
+        if requeued:
+            logger.warning(f"重新入队租约过期的比赛任务: {requeued} 个")
+        return requeued
+
+    @staticmethod
+    def count_by_status(db: Session) -> dict:
+        """各状态任务数"""
+        rows = db.execute(
+            select(models.MatchJob.status, func.count()).group_by(models.MatchJob.status)
+        ).all()
+        return {status: count for status, count in rows}
+
+
+# ==================== 异步 CRUD（API 路由） ====================
+# 与同步版本执行相同的语句；关联数据一律通过 selectinload 预加载（异步会话不能隐式懒加载）
+class AsyncStrategyCRUD:
+
+    @staticmethod
+    async def create(
+            db: AsyncSession,
+            strategy: strategy_schema.StrategyCreate,
+            user_id: Optional[str] = None
+    ) -> models.Strategy:
+        """创建策略"""
+        db_strategy = _new_strategy(strategy, user_id)
+        db.add(db_strategy)
+        await db.commit()
+        await db.refresh(db_strategy)
+        logger.info(f"创建策略: {db_strategy.id} - {db_strategy.name}")
+        return db_strategy
+
+    @staticmethod
+    async def get(db: AsyncSession, strategy_id: str) -> Optional[models.Strategy]:
+        """获取单个策略"""
+        return await db.get(models.Strategy, strategy_id)
+
+    @staticmethod
+    async def get_many(db: AsyncSession, strategy_ids: Iterable[str]) -> Dict[str, models.Strategy]:
+        """按 ID 批量获取策略（一次 IN 查询），返回 id → 策略，不存在的 ID 不出现"""
+        ids = list(dict.fromkeys(strategy_ids))
+        if not ids:
+            return {}
+        return {s.id: s for s in await db.scalars(_strategies_by_ids_stmt(ids))}
+
+    @staticmethod
+    async def get_all(
+            db: AsyncSession,
+            skip: int = 0,
+            limit: int = 100,
+            user_id: Optional[str] = None,
+            is_public: Optional[bool] = None
+    ) -> List[models.Strategy]:
+        """获取策略列表"""
+        return list((await db.scalars(_strategy_list_stmt(skip, limit, user_id, is_public))).all())
+
+    @staticmethod
+    async def update(
+            db: AsyncSession,
+            strategy_id: str,
+            **kwargs
+    ) -> Optional[models.Strategy]:
+        """更新策略"""
+        db_strategy = await AsyncStrategyCRUD.get(db, strategy_id)
+        if not db_strategy:
+            return None
+
+        for key, value in kwargs.items():
+            if hasattr(db_strategy, key):
+                setattr(db_strategy, key, value)
+
+        await db.commit()
+        await db.refresh(db_strategy)
+        logger.info(f"更新策略: {strategy_id}")
+        return db_strategy
+
+    @staticmethod
+    async def delete(db: AsyncSession, strategy_id: str) -> bool:
+        """删除策略"""
+        db_strategy = await AsyncStrategyCRUD.get(db, strategy_id)
+        if not db_strategy:
+            return False
+
+        await db.delete(db_strategy)
+        await db.commit()
+        logger.info(f"删除策略: {strategy_id}")
+        return True
+
+
+class AsyncMatchCRUD:
+
+    @staticmethod
+    async def create(
+            db: AsyncSession,
+            config: dict,
+            strategy_ids: List[str],
+            creator_id: Optional[str] = None
+    ) -> models.Match:
+        """创建比赛"""
+        db_match = _new_match(config, strategy_ids, creator_id)
+        db.add(db_match)
+        await db.commit()
+        logger.info(f"创建比赛: {db_match.id}, 参赛策略数: {len(strategy_ids)}")
+        return db_match
+
+    @staticmethod
+    async def get(db: AsyncSession, match_id: str, load_logs: bool = True) -> Optional[models.Match]:
+        """获取比赛（预加载 participants+strategy，可选 logs）"""
+        return (await db.scalars(_match_detail_stmt(match_id, load_logs))).one_or_none()
+
+    @staticmethod
+    async def exists(db: AsyncSession, match_id: str) -> bool:
+        """比赛是否存在（只查主键，不加载关联）"""
+        return await db.scalar(select(models.Match.id).where(models.Match.id == match_id)) is not None
+
+    @staticmethod
+    async def get_all(
+            db: AsyncSession,
+            skip: int = 0,
+            limit: int = 100,
+            status: Optional[str] = None
+    ) -> List[models.Match]:
+        """获取比赛列表（预加载 participants+strategy）"""
+        return list((await db.scalars(_match_list_stmt(skip, limit, status))).unique().all())
+
+    @staticmethod
+    async def list_summaries(
+            db: AsyncSession,
+            limit: int = 50,
+            status: Optional[str] = None,
+            before: Optional[Tuple[datetime, str]] = None
+    ) -> list:
+        """比赛列表摘要（单条查询，见 MatchCRUD.list_summaries）"""
+        return (await db.execute(_match_summaries_stmt(limit, status, before))).all()
+
+    @staticmethod
+    async def delete(db: AsyncSession, match_id: str) -> bool:
+        """删除比赛（执行日志一条 DELETE 删除，不加载到会话）"""
+        db_match = await AsyncMatchCRUD.get(db, match_id, load_logs=False)
+        if not db_match:
+            return False
+        await db.execute(_delete_logs_stmt(match_id))
+        await db.delete(db_match)
+        await db.commit()
+        logger.info(f"删除比赛: {match_id}")
+        return True
+
+    @staticmethod
+    async def get_logs_page(
+            db: AsyncSession,
+            match_id: str,
+            after_step: int = -1,
+            limit: int = 500
+    ) -> List[models.MatchLog]:
+        """按步数键集分页读取日志（step > after_step）"""
+        return list((await db.scalars(_logs_stmt(match_id, after_step).limit(limit))).all())
+
+    @staticmethod
+    async def iter_logs(
+            db: AsyncSession,
+            match_id: str,
+            after_step: int = -1,
+            chunk_size: int = 1000
+    ) -> AsyncIterator[Tuple[int, dict]]:
+        """流式读取日志 (step, data)：服务端游标按块拉取"""
+        stmt = _log_rows_stmt(match_id, after_step).execution_options(yield_per=chunk_size)
+        result = await db.stream(stmt)
+        async for step, data in result:
+            yield step, data
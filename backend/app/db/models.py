@@ -1,9 +1,13 @@
-from sqlalchemy import String, Integer, Float, Boolean, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import String, Integer, BigInteger, Float, Boolean, Text, DateTime, ForeignKey, JSON, Index, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 from typing import List, Optional
 import uuid
 
+import numpy as np
+
+from app.core.series_codec import decode_values, encode_values
 from app.database import Base
 
 
@@ -11,6 +15,24 @@ def generate_uuid() -> str:
     return str(uuid.uuid4())
 
 
+class PackedFloats(TypeDecorator):
+    """float64 序列以紧凑二进制存储（见 core/series_codec.py），读取为 NumPy 数组"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else encode_values(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decode_values(value)
+
+    def compare_values(self, x, y):
+        if x is None or y is None:
+            return x is y
+        return np.array_equal(x, y)
+
+
 # ==================== 用户表 ====================
 class User(Base):
     __tablename__ = "users"
@@ -62,6 +84,11 @@ class Strategy(Base):
     user: Mapped[Optional["User"]] = relationship(back_populates="strategies")
     participants: Mapped[List["MatchParticipant"]] = relationship(back_populates="strategy")
 
+    __table_args__ = (
+        Index("ix_strategies_user_id_created_at", "user_id", "created_at"),
+        Index("ix_strategies_is_public_created_at", "is_public", "created_at"),
+    )
+
     def __repr__(self):
         return f"<Strategy {self.name} ({self.type})>"
 
@@ -82,17 +109,31 @@ class Match(Base):
     market_type: Mapped[Optional[str]] = mapped_column(String(20))
     market_source: Mapped[Optional[str]] = mapped_column(String(30))  # simulated | coingecko_historical | coingecko_realtime
     coin_id: Mapped[Optional[str]] = mapped_column(String(50))  # CoinGecko 币种 ID，模拟行情时为 None
+    coin_ids: Mapped[Optional[list]] = mapped_column(JSON)  # 多资产比赛的币种 ID 列表（首个为主资产），单资产时为 None
+    market_seed: Mapped[Optional[int]] = mapped_column(BigInteger)  # 行情随机种子，用于复现同一行情
 
     # 时间
     start_time: Mapped[Optional[datetime]] = mapped_column(DateTime)
     end_time: Mapped[Optional[datetime]] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     error_message: Mapped[Optional[str]] = mapped_column(Text)  # 失败原因
+    profile: Mapped[Optional[dict]] = mapped_column(JSON)  # 引擎分阶段计时报告（开启 profile 时）
 
     # 关系
     creator: Mapped[Optional["User"]] = relationship(back_populates="matches")
     participants: Mapped[List["MatchParticipant"]] = relationship(back_populates="match", cascade="all, delete-orphan")
-    logs: Mapped[List["MatchLog"]] = relationship(back_populates="match", cascade="all, delete-orphan")
+    # passive_deletes：删除比赛时不加载日志，由 CRUD 的批量 DELETE / 外键 ON DELETE CASCADE 删除
+    logs: Mapped[List["MatchLog"]] = relationship(
+        back_populates="match", cascade="all, delete-orphan", order_by="MatchLog.step", passive_deletes=True
+    )
+    progress: Mapped[Optional["MatchProgress"]] = relationship(
+        back_populates="match", cascade="all, delete-orphan", uselist=False
+    )
+
+    __table_args__ = (
+        Index("ix_matches_status_created_at", "status", "created_at"),
+        Index("ix_matches_created_at_id", "created_at", "id"),  # 列表摘要的 (created_at, id) 键集分页
+    )
 
     def __repr__(self):
         return f"<Match {self.id} ({self.status})>"
@@ -116,7 +157,15 @@ class MatchParticipant(Base):
     rank: Mapped[Optional[int]] = mapped_column(Integer)
     max_drawdown: Mapped[float] = mapped_column(Float, default=0.0)
     sharpe_ratio: Mapped[float] = mapped_column(Float, default=0.0)
-    value_history: Mapped[Optional[list]] = mapped_column(JSON)  # List[float] 每步资产价值
+    sortino_ratio: Mapped[float] = mapped_column(Float, default=0.0)
+    calmar_ratio: Mapped[float] = mapped_column(Float, default=0.0)
+    volatility: Mapped[float] = mapped_column(Float, default=0.0)  # 年化波动率 (%)
+    max_drawdown_duration: Mapped[int] = mapped_column(Integer, default=0)  # 最长回撤持续步数
+    profit_factor: Mapped[Optional[float]] = mapped_column(Float)  # 没有亏损卖出时为 NULL
+    avg_trade_pnl: Mapped[float] = mapped_column(Float, default=0.0)
+    exposure_pct: Mapped[float] = mapped_column(Float, default=0.0)  # 持仓时间占比 (%)
+    turnover: Mapped[float] = mapped_column(Float, default=0.0)  # 累计成交额
+    value_history: Mapped[Optional[np.ndarray]] = mapped_column(PackedFloats)  # 每步资产价值（压缩的 float64 序列）
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
@@ -124,8 +173,9 @@ class MatchParticipant(Base):
     match: Mapped["Match"] = relationship(back_populates="participants")
     strategy: Mapped["Strategy"] = relationship(back_populates="participants")
 
-    # 唯一约束（保留，这不是索引）
     __table_args__ = (
+        Index("ix_match_participants_match_id", "match_id"),
+        Index("ix_match_participants_strategy_id", "strategy_id"),
         {'sqlite_autoincrement': True},
     )
 
@@ -143,6 +193,55 @@ class MatchLog(Base):
     # 关系
     match: Mapped["Match"] = relationship(back_populates="logs")
 
+    __table_args__ = (
+        Index("ix_match_logs_match_id_step", "match_id", "step"),
+    )
+
+
+# ==================== 比赛实时进度表 ====================
+class MatchProgress(Base):
+    """比赛运行中的最新进度快照（每场一行，worker 覆盖写入，API 轮询后推送给订阅者）"""
+    __tablename__ = "match_progress"
+
+    match_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("matches.id", ondelete="CASCADE"), primary_key=True
+    )
+    step: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 已完成步数
+    total_steps: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[dict] = mapped_column(JSON, nullable=False)  # {"rankings": [...]}
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 关系
+    match: Mapped["Match"] = relationship(back_populates="progress")
+
+
+# ==================== 比赛任务队列表 ====================
+class MatchJob(Base):
+    """持久化的比赛任务：API 入队，worker 以租约方式领取执行，进程重启不丢失"""
+    __tablename__ = "match_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
+    match_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("matches.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")  # queued | running | completed | failed
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)  # 行情参数与参赛策略快照
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+
+    # 租约：持有者需在到期前续约（心跳），过期未续约的任务会被重新入队
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(100))
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_match_jobs_status_created_at", "status", "created_at"),
+    )
+
 
 # ==================== 市场数据表 ====================
 class MarketData(Base):
@@ -159,6 +258,10 @@ class MarketData(Base):
     close: Mapped[float] = mapped_column(Float, nullable=False)
     volume: Mapped[float] = mapped_column(Float, nullable=False)
 
+    __table_args__ = (
+        Index("ix_market_data_symbol_timeframe_timestamp", "symbol", "timeframe", "timestamp"),
+    )
+
 
 # ==================== 投注表（未来功能）====================
 class Bet(Base):
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import uuid
 from pathlib import Path
@@ -9,8 +10,11 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 
 from app.config import settings
-from app.database import init_db
-from app.api import strategies, matches, market
+from app.database import dispose_async_engine, init_db
+from app.api import strategies, matches, market, sweeps, metrics
+from app.core.executor import match_executor
+from app.core.metrics import MetricsMiddleware
+from app.worker import get_local_worker
 
 # 配置日志（log_file 转为基于 backend 根目录的绝对路径，避免工作目录变化导致写错位置）
 _log_dir = Path(__file__).resolve().parent.parent  # backend/
@@ -34,9 +38,19 @@ logger.add(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    # 本地队列模式：内置 worker 周期性回收过期租约，并接管重启前遗留的排队任务
+    recovery_stop = asyncio.Event()
+    recovery = None
+    if settings.match_queue_mode == "local":
+        recovery = asyncio.create_task(get_local_worker().run_forever(recovery_stop, stale_only=True))
     logger.info("🚀 Agent Arena 服务启动成功")
     logger.info(f"📝 API 文档: http://{settings.host}:{settings.port}/docs")
     yield
+    recovery_stop.set()
+    if recovery is not None:
+        await recovery
+    match_executor.shutdown()
+    await dispose_async_engine()
     logger.info("👋 服务关闭")
 
 
@@ -66,6 +80,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求指标（最后添加即最外层，计入其他中间件的耗时）
+app.add_middleware(MetricsMiddleware)
+
 # 全局异常处理
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(_request: Request, exc: RequestValidationError):
@@ -114,6 +131,8 @@ async def general_exception_handler(request: Request, exc: Exception):
 app.include_router(strategies.router, prefix="/api/strategies", tags=["strategies"])
 app.include_router(matches.router, prefix="/api/matches", tags=["matches"])
 app.include_router(market.router, prefix="/api/market", tags=["market"])
+app.include_router(sweeps.router, prefix="/api/sweeps", tags=["sweeps"])
+app.include_router(metrics.router, tags=["metrics"])
 
 @app.get("/")
 async def root():
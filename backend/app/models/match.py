@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -32,6 +32,7 @@ class MatchConfig(BaseModel):
     trading_pair: str = "ETH/USDC"
     timeframe: str = "5m"
     duration_steps: int = 100
+    assets: List[str] = Field(default_factory=lambda: ["ETH"])  # 交易的资产，首个为主资产（与行情篮子顺序一致）
 
 class MatchResult(BaseModel):
     """比赛结果"""
@@ -43,6 +44,14 @@ class MatchResult(BaseModel):
     rank: int
     max_drawdown: float = 0.0   # 最大回撤 (%)
     sharpe_ratio: float = 0.0   # 夏普率
+    sortino_ratio: float = 0.0  # 索提诺率（年化，下行偏差）
+    calmar_ratio: float = 0.0   # 卡玛比率（年化收益率 / 最大回撤）
+    volatility: float = 0.0     # 年化波动率 (%)
+    max_drawdown_duration: int = 0  # 最长回撤持续步数
+    profit_factor: Optional[float] = None  # 盈亏比（已成交卖出的已实现盈利合计 / 亏损合计），没有亏损卖出时为 None
+    avg_trade_pnl: float = 0.0  # 平均每笔卖出的已实现盈亏
+    exposure_pct: float = 0.0   # 持仓时间占比 (%)
+    turnover: float = 0.0       # 累计成交额
 
 class Match(BaseModel):
     """比赛模型"""
@@ -55,6 +64,5 @@ class Match(BaseModel):
     end_time: Optional[datetime] = None
 
     results: List[MatchResult] = Field(default_factory=list)
-    execution_log: List[Dict[str, Any]] = Field(default_factory=list)
 
     created_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.models.strategy import StrategyParams
+
+
+class ParamGrid(BaseModel):
+    """参数网格：每个字段为候选值列表，未提供的字段取 StrategyParams 默认值"""
+    lookback_period: Optional[List[int]] = Field(default=None, min_length=1)
+    buy_threshold: Optional[List[float]] = Field(default=None, min_length=1)
+    sell_threshold: Optional[List[float]] = Field(default=None, min_length=1)
+    position_size: Optional[List[float]] = Field(default=None, min_length=1)
+    max_position_pct: Optional[List[float]] = Field(default=None, min_length=1)
+    # 列表中可含 null，表示不设止损/止盈
+    stop_loss: Optional[List[Optional[float]]] = Field(default=None, min_length=1)
+    take_profit: Optional[List[Optional[float]]] = Field(default=None, min_length=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "lookback_period": [10, 20, 30],
+                "buy_threshold": [0.95, 0.97],
+                "sell_threshold": [1.03, 1.05],
+                "stop_loss": [None, 0.05],
+            }
+        }
+
+
+class SweepResultRow(BaseModel):
+    """参数扫描结果：一组参数组合的回测指标"""
+    rank: int
+    params: StrategyParams
+    final_value: float
+    return_pct: float
+    max_drawdown: float
+    sharpe_ratio: float
+    sortino_ratio: float = 0.0
+    calmar_ratio: float = 0.0
+    total_trades: int
+    win_trades: int
@@ -0,0 +1,55 @@
+"""策略返回的轻量交易指令
+
+decide() 每步每策略调用一次，返回值不再构造 pydantic Action（每次都要做正则校验）：
+- HOLD: 共享的持有单例，持有步不分配任何对象
+- buy(amount) / sell(amount): 带 __slots__ 的 TradeAction
+
+字段与 Action 相同（type / asset / amount），并附带引擎使用的整数操作代码 code。
+pydantic Action 只在 API 边界（请求/响应）使用；引擎也接受策略返回的 Action，按 type 解析。
+"""
+from app.core.execution_log import ACTION_BUY, ACTION_HOLD, ACTION_NAMES, ACTION_SELL
+from app.models.match import Action
+
+DEFAULT_ASSET = "ETH"
+
+
+class TradeAction:
+    """交易指令（不做校验，由 buy() / sell() / HOLD 构造）"""
+
+    __slots__ = ("code", "asset", "amount")
+
+    def __init__(self, code: int, asset: str = DEFAULT_ASSET, amount: float = 0.0):
+        self.code = code
+        self.asset = asset
+        self.amount = amount
+
+    @property
+    def type(self) -> str:
+        return ACTION_NAMES[self.code]
+
+    def to_model(self) -> Action:
+        """转换为 pydantic Action（API 输出时使用）"""
+        return Action(type=self.type, asset=self.asset, amount=self.amount)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TradeAction):
+            return NotImplemented
+        return (self.code, self.asset, self.amount) == (other.code, other.asset, other.amount)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TradeAction(type={self.type!r}, asset={self.asset!r}, amount={self.amount!r})"
+
+
+HOLD = TradeAction(ACTION_HOLD)
+
+
+def buy(amount: float, asset: str = DEFAULT_ASSET) -> TradeAction:
+    """买入 amount 金额的 asset"""
+    return TradeAction(ACTION_BUY, asset, amount)
+
+
+def sell(amount: float, asset: str = DEFAULT_ASSET) -> TradeAction:
+    """卖出 amount 数量的 asset"""
+    return TradeAction(ACTION_SELL, asset, amount)
@@ -1,38 +1,127 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from app.models.match import Action
+from typing import Dict, Any, Optional
+import numpy as np
+from app.core.market_view import MarketView
+from app.strategies.actions import DEFAULT_ASSET, TradeAction
+from app.strategies.indicators import Indicator, IndicatorRegistry, IndicatorSpec
+from app.strategies.params import StrategyConfig
 from app.models.portfolio import Portfolio
 
 class StrategyBase(ABC):
     """策略基类"""
 
+    # 参数缺失时的默认值（覆盖 StrategyParams 的默认值，子类按需声明）
+    PARAM_DEFAULTS: Dict[str, Any] = {}
+
     def __init__(self, strategy_id: str, params: Dict[str, Any]):
         self.id = strategy_id
         self.params = params
+        # 构造时编译一次，决策与引擎直接读属性
+        self.config = StrategyConfig.compile(params, self.PARAM_DEFAULTS)
         self.portfolio: Portfolio = None
+        # 默认交易的资产（比赛主资产，由引擎通过 set_asset 设置）
+        self.asset = DEFAULT_ASSET
+        # 已订阅的共享指标：名称 → 指标实例（由 bind_indicators 填充）
+        self.indicators: Dict[str, Indicator] = {}
+        self.registry: Optional[IndicatorRegistry] = None
+        # 已喂给 on_bar 的 K 线数量（每根 K 线只处理一次）
+        self._bars_seen = 0
+        self._has_on_bar = type(self).on_bar is not StrategyBase.on_bar
+        self.initialize()
 
     def set_portfolio(self, portfolio: Portfolio):
-        """设置持仓对象"""
+        """设置持仓对象（引擎内为只读的 PortfolioView，属性与 Portfolio 相同）"""
         self.portfolio = portfolio
 
+    def set_asset(self, asset: str):
+        """设置默认交易的资产（比赛主资产）；多资产比赛中策略也可对其他资产下单"""
+        self.asset = asset
+
     @abstractmethod
     def decide(
         self,
-        market_data: List[Dict[str, Any]],
+        market_data: MarketView,
         step: int
-    ) -> Action:
+    ) -> TradeAction:
         """
         核心决策函数
 
         Args:
-            market_data: K线数据列表
+            market_data: 截止到当前步的只读 MarketView，
+                close/open/high/low/volume 属性为零拷贝的 NumPy 数组视图（主资产）；
+                多资产比赛中为 BasketView，可用 asset(symbol) 读取其他资产、prices 读取当步价格向量。
+                引擎每步原地推进同一个视图，不要跨步保存它（需要时保存 market_data[:] 或列式数组）
             step: 当前步数
 
         Returns:
-            Action: 交易指令
+            TradeAction: 交易指令，持有返回共享单例 HOLD，交易返回 buy(amount, asset) / sell(amount, asset)
+            （见 strategies/actions.py）；也可返回 pydantic Action，引擎按 type 解析
         """
         pass
 
     def initialize(self):
-        """初始化策略（可选实现）"""
+        """初始化策略（可选实现，构造时调用一次，用于创建流式指标等状态）"""
+        pass
+
+    def required_indicators(self) -> Dict[str, IndicatorSpec]:
+        """声明所需的指标（可选实现），返回 名称 → 指标规格，如 {"sma": sma(20)}"""
+        return {}
+
+    def bind_indicators(self, registry: IndicatorRegistry) -> None:
+        """向比赛级注册表订阅所需指标，相同规格的指标与其他策略共享"""
+        self.registry = registry
+        self.indicators = {
+            name: registry.subscribe(spec)
+            for name, spec in self.required_indicators().items()
+        }
+
+    def sync(self, market_data: MarketView) -> None:
+        """确保指标与 on_bar 状态已处理到最新一根 K 线
+
+        共享指标由注册表推进（引擎每步已同步一次，此处为空操作）；
+        单独运行策略时自动使用私有注册表。引擎可能因止损/止盈跳过某些步的
+        decide()，因此按已处理数量补齐，保证每根 K 线恰好处理一次。
+        """
+        if self.registry is None:
+            self.bind_indicators(IndicatorRegistry())
+        self.registry.sync(market_data)
+        if not self._has_on_bar:
+            return
+        n = len(market_data)
+        if n <= self._bars_seen:
+            return
+        closes = market_data.close[self._bars_seen:n].tolist()
+        for close in closes:
+            self.on_bar(close)
+        self._bars_seen = n
+
+    def on_bar(self, close: float) -> None:
+        """每根新 K 线调用一次（可选实现，用于维护共享指标之外的自定义状态）"""
         pass
+
+    # ==================== 向量化回测（可选实现）====================
+
+    def vector_signals(
+        self,
+        close: np.ndarray,
+        series: Dict[str, np.ndarray],
+    ) -> Optional[np.ndarray]:
+        """整段行情上的交易信号，供 MatchEngine.run_vectorized 使用
+
+        Args:
+            close: 整段收盘价
+            series: required_indicators() 中各指标的整段批量结果（未就绪处为 NaN）
+
+        Returns:
+            int8 数组（1=买入候选，-1=卖出候选，0=无信号）；返回 None 表示不支持，
+            引擎将退回逐步执行。是否真正下单仍由 buy_amount/sell_amount 依据持仓决定。
+        """
+        return None
+
+    def buy_amount(self, cash: float) -> Optional[float]:
+        """买入候选时的下单金额（按当前现金），返回 None 表示不下单"""
+        return None
+
+    def sell_amount(self, position: float) -> Optional[float]:
+        """卖出候选时的卖出数量（按当前持仓），返回 None 表示不下单"""
+        return None
@@ -0,0 +1,426 @@
+"""流式技术指标
+
+每根新 K 线调用一次 update()，单次更新为 O(1)（滚动极值为均摊 O(1)），
+与回看周期长度无关。指标在数据不足时 value 为 None（ready=False）。
+
+滚动求和类指标（SMA / RollingStd 的均值）使用分块前缀和：序列按 period 根切块，
+块内前缀和从 0 重新累加，窗口和 = 当前块前缀和 + 上一块的后缀和。相减的量不超过一个块的
+合计，误差不随序列长度增长；块内累加顺序与按块 np.cumsum 一致，因此与整段序列的向量化
+计算逐位相同。RollingStd 的离差平方和按滑动 Welford 更新，每 period 根在窗口上重算一次。
+
+比赛内多个策略可能需要完全相同的指标（如同为 lookback=20 的均值回归）。
+策略通过 required_indicators() 声明所需指标规格（IndicatorSpec），由比赛级的
+IndicatorRegistry 去重后每根 K 线只计算一次，再共享给所有订阅者。
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+from math import sqrt
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class Indicator(ABC):
+    """指标基类（子类必须实现 update）"""
+
+    __slots__ = ("period", "value", "prev")
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError(f"指标周期必须 >= 1: {period}")
+        self.period = period
+        self.value: Optional[float] = None
+        # 处理最新一根 K 线之前的值（由 push() 维护）
+        self.prev: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    @abstractmethod
+    def update(self, x: float) -> Optional[float]:
+        """输入一根新 K 线的值，返回更新后的指标值（数据不足时为 None）"""
+
+    def push(self, x: float) -> Optional[float]:
+        """记录 prev 后再 update，供需要“不含当前价”口径的策略使用"""
+        self.prev = self.value
+        return self.update(x)
+
+
+class _WindowSum:
+    """最近 period 个值之和（分块前缀和，见模块说明），与 window_sums 逐位一致"""
+
+    __slots__ = ("period", "count", "_local", "_prefix", "_prev_prefix", "_prev_total")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self._local = 0.0  # 当前块的前缀和
+        self._prefix: List[float] = []
+        # 上一块各位置的前缀和与合计（第一块之前视为全 0）
+        self._prev_prefix: List[float] = [0.0] * period
+        self._prev_total = 0.0
+
+    def add(self, x: float) -> float:
+        """加入一个值，返回加入后的窗口和（不足 period 个时为已加入值之和）"""
+        self._local += x
+        j = len(self._prefix)
+        self._prefix.append(self._local)
+        total = self._local + (self._prev_total - self._prev_prefix[j])
+        self.count += 1
+        if j + 1 == self.period:
+            self._prev_prefix, self._prev_total = self._prefix, self._local
+            self._prefix, self._local = [], 0.0
+        return total
+
+
+class SMA(Indicator):
+    """简单移动平均"""
+
+    __slots__ = ("_sum",)
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._sum = _WindowSum(period)
+
+    def update(self, x: float) -> Optional[float]:
+        total = self._sum.add(x)
+        if self._sum.count >= self.period:
+            self.value = total / self.period
+        return self.value
+
+
+class EMA(Indicator):
+    """指数移动平均（alpha = 2 / (period + 1)，首值取第一根价格）"""
+
+    __slots__ = ("alpha",)
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.alpha = 2.0 / (period + 1)
+
+    def update(self, x: float) -> Optional[float]:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class RollingStd(Indicator):
+    """滚动总体标准差（mean 为窗口均值，与 SMA 逐位一致）"""
+
+    __slots__ = ("_sum", "_window", "_m2", "_since_exact", "mean")
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._sum = _WindowSum(period)
+        self._window: Deque[float] = deque(maxlen=period)
+        self._m2 = 0.0  # 窗口内离差平方和
+        self._since_exact = 0
+        self.mean: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        n = self.period
+        window = self._window
+        full = len(window) == n
+        old = window[0] if full else 0.0
+        prev_mean = self.mean
+        window.append(x)
+        mean = self._sum.add(x) / len(window)
+        self._since_exact += 1
+        if self._since_exact >= n:
+            # 每 period 根在窗口上重算一次（均摊 O(1)），滑动更新的舍入误差不会累积
+            self._m2 = sum((v - mean) * (v - mean) for v in window)
+            self._since_exact = 0
+        elif full:
+            # 滑动 Welford：移除 old、加入 x
+            self._m2 += (x - old) * (x - mean + old - prev_mean)
+        else:
+            self._m2 += (x - prev_mean) * (x - mean) if prev_mean is not None else 0.0
+        self.mean = mean
+        if len(window) == n:
+            variance = self._m2 / n
+            self.value = sqrt(variance) if variance > 0 else 0.0
+        return self.value
+
+
+class RSI(Indicator):
+    """相对强弱指数（Wilder 平滑，取值 0~100）"""
+
+    __slots__ = ("_prev", "_count", "_avg_gain", "_avg_loss")
+
+    def __init__(self, period: int = 14):
+        super().__init__(period)
+        self._prev: Optional[float] = None
+        self._count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, x: float) -> Optional[float]:
+        if self._prev is None:
+            self._prev = x
+            return None
+        change = x - self._prev
+        self._prev = x
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        n = self.period
+        if self._count < n:
+            # 前 period 个变化取简单平均
+            self._count += 1
+            self._avg_gain += (gain - self._avg_gain) / self._count
+            self._avg_loss += (loss - self._avg_loss) / self._count
+            if self._count < n:
+                return None
+        else:
+            self._avg_gain = (self._avg_gain * (n - 1) + gain) / n
+            self._avg_loss = (self._avg_loss * (n - 1) + loss) / n
+        if self._avg_loss == 0:
+            self.value = 100.0 if self._avg_gain > 0 else 50.0
+        else:
+            rs = self._avg_gain / self._avg_loss
+            self.value = 100.0 - 100.0 / (1.0 + rs)
+        return self.value
+
+
+class Momentum(Indicator):
+    """动量比率：当前价 / 窗口内最早价格（窗口含当前价共 period 根）"""
+
+    __slots__ = ("_window",)
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._window: Deque[float] = deque(maxlen=period)
+
+    def update(self, x: float) -> Optional[float]:
+        self._window.append(x)
+        if len(self._window) == self.period:
+            self.value = x / self._window[0]
+        return self.value
+
+
+class BollingerBands(Indicator):
+    """布林带：value 为中轨，upper/lower 为 中轨 ± k 倍标准差"""
+
+    __slots__ = ("k", "_std", "upper", "lower")
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        super().__init__(period)
+        self.k = k
+        self._std = RollingStd(period)
+        self.upper: Optional[float] = None
+        self.lower: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        std = self._std.update(x)
+        if std is not None:
+            self.value = self._std.mean
+            self.upper = self.value + self.k * std
+            self.lower = self.value - self.k * std
+        return self.value
+
+    @property
+    def bands(self) -> Optional[Tuple[float, float, float]]:
+        """(下轨, 中轨, 上轨)，数据不足时为 None"""
+        if self.value is None:
+            return None
+        return self.lower, self.value, self.upper
+
+
+class RollingMax(Indicator):
+    """滚动最大值（单调递减双端队列，均摊 O(1)）"""
+
+    __slots__ = ("_index", "_queue")
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._index = -1
+        self._queue: Deque[Tuple[int, float]] = deque()
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new >= old
+
+    def update(self, x: float) -> Optional[float]:
+        self._index += 1
+        queue = self._queue
+        while queue and self._dominates(x, queue[-1][1]):
+            queue.pop()
+        queue.append((self._index, x))
+        if queue[0][0] <= self._index - self.period:
+            queue.popleft()
+        if self._index + 1 >= self.period:
+            self.value = queue[0][1]
+        return self.value
+
+
+class RollingMin(RollingMax):
+    """滚动最小值（单调递增双端队列，均摊 O(1)）"""
+
+    __slots__ = ()
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new <= old
+
+
+# ==================== 整段序列批量计算 ====================
+# 供向量化回测使用：结果与逐根 update() 逐位一致，未就绪位置为 NaN
+
+
+def window_sums(x: np.ndarray, period: int) -> np.ndarray:
+    """各位置最近 period 个值之和（分块前缀和，与 _WindowSum.add 逐位一致；前 period-1 个为部分和）"""
+    n = len(x)
+    blocks = -(-n // period)
+    padded = np.zeros(blocks * period)
+    padded[:n] = x
+    prefix = np.cumsum(padded.reshape(blocks, period), axis=1)
+    prev_prefix = np.zeros_like(prefix)
+    prev_prefix[1:] = prefix[:-1]
+    prev_total = prev_prefix[:, -1:]
+    return (prefix + (prev_total - prev_prefix)).ravel()[:n]
+
+
+def sma_series(x: np.ndarray, period: int) -> np.ndarray:
+    """整段 SMA（分块前缀和，与 SMA.update 逐位一致）"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        out[period - 1:] = window_sums(x, period)[period - 1:] / period
+    return out
+
+
+def momentum_series(x: np.ndarray, period: int) -> np.ndarray:
+    """整段动量比率：x[t] / x[t - period + 1]"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        out[period - 1:] = x[period - 1:] / x[: len(x) - period + 1]
+    return out
+
+
+# 指标类型 → 批量计算函数；未注册的指标不支持向量化回测
+BATCH_FUNCTIONS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    "sma": sma_series,
+    "momentum": momentum_series,
+}
+
+
+# ==================== 共享指标注册表 ====================
+
+# 指标类型 → 指标类，新增指标时只需在此注册
+INDICATOR_CLASSES = {
+    "sma": SMA,
+    "ema": EMA,
+    "std": RollingStd,
+    "rsi": RSI,
+    "momentum": Momentum,
+    "bollinger": BollingerBands,
+    "max": RollingMax,
+    "min": RollingMin,
+}
+
+
+class IndicatorSpec(NamedTuple):
+    """指标规格：相同规格的指标在一场比赛中只计算一次"""
+    kind: str
+    period: int
+    source: str = "close"
+    k: Optional[float] = None  # 布林带倍数等附加参数
+
+    def create(self) -> Indicator:
+        try:
+            cls = INDICATOR_CLASSES[self.kind]
+        except KeyError:
+            raise ValueError(f"不支持的指标类型: {self.kind}")
+        if self.k is not None:
+            return cls(self.period, self.k)
+        return cls(self.period)
+
+    def batch(self, market_data: Any) -> Optional[np.ndarray]:
+        """在整段行情上批量计算该指标，不支持时返回 None"""
+        fn = BATCH_FUNCTIONS.get(self.kind)
+        if fn is None or self.k is not None:
+            return None
+        return fn(np.asarray(getattr(market_data, self.source), dtype=np.float64), self.period)
+
+
+def sma(period: int, source: str = "close") -> IndicatorSpec:
+    return IndicatorSpec("sma", period, source)
+
+
+def ema(period: int, source: str = "close") -> IndicatorSpec:
+    return IndicatorSpec("ema", period, source)
+
+
+def rolling_std(period: int, source: str = "close") -> IndicatorSpec:
+    return IndicatorSpec("std", period, source)
+
+
+def rsi(period: int = 14, source: str = "close") -> IndicatorSpec:
+    return IndicatorSpec("rsi", period, source)
+
+
+def momentum(period: int, source: str = "close") -> IndicatorSpec:
+    return IndicatorSpec("momentum", period, source)
+
+
+def bollinger(period: int = 20, k: float = 2.0, source: str = "close") -> IndicatorSpec:
+    return IndicatorSpec("bollinger", period, source, k)
+
+
+def rolling_max(period: int, source: str = "high") -> IndicatorSpec:
+    return IndicatorSpec("max", period, source)
+
+
+def rolling_min(period: int, source: str = "low") -> IndicatorSpec:
+    return IndicatorSpec("min", period, source)
+
+
+class IndicatorRegistry:
+    """比赛级指标注册表：按规格去重，每根新 K 线对每个唯一指标只更新一次"""
+
+    def __init__(self):
+        self._indicators: Dict[IndicatorSpec, Indicator] = {}
+        # 按数据列分组，便于每次同步时只切一次列
+        self._by_source: Dict[str, list] = {}
+        self.subscriptions = 0
+        self._bars_seen = 0
+
+    def subscribe(self, spec: IndicatorSpec) -> Indicator:
+        """订阅指标，已存在相同规格时直接复用同一实例"""
+        self.subscriptions += 1
+        indicator = self._indicators.get(spec)
+        if indicator is None:
+            if self._bars_seen:
+                raise RuntimeError("行情已开始推进，无法再注册新指标")
+            indicator = spec.create()
+            self._indicators[spec] = indicator
+            self._by_source.setdefault(spec.source, []).append(indicator)
+        return indicator
+
+    def sync(self, market_data: Any) -> None:
+        """将尚未处理的新 K 线喂给所有唯一指标（同一步内重复调用为空操作）"""
+        n = len(market_data)
+        if n <= self._bars_seen:
+            return
+        start = self._bars_seen
+        for source, indicators in self._by_source.items():
+            values = getattr(market_data, source)[start:n].tolist()
+            for x in values:
+                for indicator in indicators:
+                    indicator.push(x)
+        self._bars_seen = n
+
+    @property
+    def unique_count(self) -> int:
+        return len(self._indicators)
+
+    def stats(self) -> Dict[str, Any]:
+        """去重统计：dedup_ratio = 订阅数 / 唯一指标数（每个指标平均被复用的次数）"""
+        unique = len(self._indicators)
+        return {
+            "indicator_subscriptions": self.subscriptions,
+            "indicator_unique": unique,
+            "indicator_dedup_ratio": round(self.subscriptions / unique, 4) if unique else 1.0,
+            "indicator_updates_saved_pct": (
+                round((1 - unique / self.subscriptions) * 100, 2) if self.subscriptions else 0.0
+            ),
+        }
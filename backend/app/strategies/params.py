@@ -0,0 +1,59 @@
+"""编译后的策略参数
+
+策略参数以 dict 形式（StrategyParams.model_dump()）传入策略，校验已在 API 边界由
+StrategyParams 完成。构造策略时编译一次为带 __slots__ 的 StrategyConfig，模板与引擎
+直接读属性，热路径上不再做 dict 查找。
+"""
+from typing import Any, Mapping, Optional
+
+from app.models.strategy import StrategyParams
+
+# 未传参数时的默认值（与 StrategyParams 一致，模板可按类覆盖）
+PARAM_DEFAULTS = {
+    name: field.default for name, field in StrategyParams.model_fields.items()
+}
+
+
+class StrategyConfig:
+    """类型化的策略参数"""
+
+    __slots__ = (
+        "lookback_period",
+        "buy_threshold",
+        "sell_threshold",
+        "position_size",
+        "max_position_pct",
+        "stop_loss",
+        "take_profit",
+    )
+
+    def __init__(
+        self,
+        lookback_period: int,
+        buy_threshold: float,
+        sell_threshold: float,
+        position_size: float,
+        max_position_pct: float,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+    ):
+        self.lookback_period = int(lookback_period)
+        self.buy_threshold = float(buy_threshold)
+        self.sell_threshold = float(sell_threshold)
+        self.position_size = float(position_size)
+        self.max_position_pct = float(max_position_pct)
+        self.stop_loss = None if stop_loss is None else float(stop_loss)
+        self.take_profit = None if take_profit is None else float(take_profit)
+
+    @classmethod
+    def compile(cls, params: Mapping[str, Any], defaults: Optional[Mapping[str, Any]] = None) -> "StrategyConfig":
+        """从参数 dict 编译：缺失的键依次取 defaults（模板默认值）与 PARAM_DEFAULTS"""
+        merged = {**PARAM_DEFAULTS, **(defaults or {})}
+        return cls(**{name: params.get(name, merged[name]) for name in cls.__slots__})
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"StrategyConfig({fields})"
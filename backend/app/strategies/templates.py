@@ -1,84 +1,146 @@
-from typing import List, Dict, Any
+import numpy as np
+from app.core.market_view import MarketView
+from app.strategies.actions import HOLD, TradeAction, buy, sell
 from app.strategies.base import StrategyBase
-from app.models.match import Action
+from app.strategies.indicators import sma, momentum
 from loguru import logger
 
+
+def _signal_array(buy: np.ndarray, sell: np.ndarray) -> np.ndarray:
+    """买入优先：同一步既满足买入又满足卖出时只算买入（与 decide 中的 if/elif 一致）"""
+    signals = np.zeros(len(buy), dtype=np.int8)
+    signals[sell & ~buy] = -1
+    signals[buy] = 1
+    return signals
+
+
 class MeanReversionStrategy(StrategyBase):
     """均值回归策略"""
 
-    def decide(self, market_data: List[Dict[str, Any]], step: int) -> Action:
-        lookback = self.params.get("lookback_period", 20)
-        buy_threshold = self.params.get("buy_threshold", 0.97)
-        sell_threshold = self.params.get("sell_threshold", 1.03)
-        position_size = self.params.get("position_size", 0.2)
+    PARAM_DEFAULTS = {"lookback_period": 20, "buy_threshold": 0.97, "sell_threshold": 1.03, "position_size": 0.2}
+
+    def initialize(self):
+        config = self.config
+        self.lookback = config.lookback_period
+        self.buy_threshold = config.buy_threshold
+        self.sell_threshold = config.sell_threshold
+        self.position_size = config.position_size
+
+    def required_indicators(self):
+        return {"sma": sma(self.lookback)}
 
-        # 需要 lookback+1 条数据（当前价 + lookback 条历史）
-        if len(market_data) < lookback + 1:
-            return Action(type="hold")
+    def buy_amount(self, cash):
+        return cash * self.position_size if cash > 1000 else None
 
-        # 用当前价之前的 lookback 条历史计算均值（不含当前价，避免自相关）
-        recent_closes = [k["close"] for k in market_data[-(lookback + 1):-1]]
-        avg_price = sum(recent_closes) / len(recent_closes)
-        current_price = market_data[-1]["close"]
+    def sell_amount(self, position):
+        return position * 0.5 if position > 0 else None
+
+    def decide(self, market_data: MarketView, step: int) -> TradeAction:
+        self.sync(market_data)
+
+        # 用当前价之前的 lookback 条历史计算均值（不含当前价，避免自相关），
+        # 即 SMA 在处理当前 K 线之前的值；需要 lookback+1 条数据
+        avg_price = self.indicators["sma"].prev
+        if avg_price is None:
+            return HOLD
+
+        current_price = float(market_data.close[-1])
 
         # 买入信号
-        if current_price < avg_price * buy_threshold:
-            if self.portfolio.cash > 1000:
-                amount = self.portfolio.cash * position_size
+        if current_price < avg_price * self.buy_threshold:
+            amount = self.buy_amount(self.portfolio.cash)
+            if amount is not None:
                 logger.debug(f"策略 {self.id}: 买入信号 - 当前价 {current_price:.2f}, 均价 {avg_price:.2f}")
-                return Action(type="buy", asset="ETH", amount=amount)
+                return buy(amount, self.asset)
 
         # 卖出信号
-        elif current_price > avg_price * sell_threshold:
-            eth_balance = self.portfolio.positions.get("ETH", 0)
-            if eth_balance > 0:
+        elif current_price > avg_price * self.sell_threshold:
+            amount = self.sell_amount(self.portfolio.positions.get(self.asset, 0))
+            if amount is not None:
                 logger.debug(f"策略 {self.id}: 卖出信号 - 当前价 {current_price:.2f}, 均价 {avg_price:.2f}")
-                return Action(type="sell", asset="ETH", amount=eth_balance * 0.5)
+                return sell(amount, self.asset)
+
+        return HOLD
 
-        return Action(type="hold")
+    def vector_signals(self, close, series):
+        # 第 t 步的均值为 SMA 在第 t-1 根处的值
+        avg_price = np.empty(len(close))
+        avg_price[:1] = np.nan
+        avg_price[1:] = series["sma"][:-1]
+        return _signal_array(
+            close < avg_price * self.buy_threshold,
+            close > avg_price * self.sell_threshold,
+        )
 
 
 class MomentumStrategy(StrategyBase):
     """动量策略"""
 
-    def decide(self, market_data: List[Dict[str, Any]], step: int) -> Action:
-        lookback = self.params.get("lookback_period", 10)
-        momentum_threshold = self.params.get("buy_threshold", 1.02)
-        position_size = self.params.get("position_size", 0.3)
+    PARAM_DEFAULTS = {"lookback_period": 10, "buy_threshold": 1.02, "position_size": 0.3}
 
-        if len(market_data) < lookback:
-            return Action(type="hold")
+    def initialize(self):
+        config = self.config
+        self.lookback = config.lookback_period
+        self.momentum_threshold = config.buy_threshold
+        self.position_size = config.position_size
 
-        # 计算动量
-        past_price = market_data[-lookback]["close"]
-        current_price = market_data[-1]["close"]
-        momentum = current_price / past_price
+    def required_indicators(self):
+        # 当前价 / lookback 窗口内最早价格
+        return {"momentum": momentum(self.lookback)}
+
+    def buy_amount(self, cash):
+        return cash * self.position_size if cash > 1000 else None
+
+    def sell_amount(self, position):
+        return position * 0.5 if position > 0 else None
+
+    def decide(self, market_data: MarketView, step: int) -> TradeAction:
+        self.sync(market_data)
+
+        momentum = self.indicators["momentum"].value
+        if momentum is None:
+            return HOLD
 
         # 上涨趋势买入
-        if momentum > momentum_threshold:
-            if self.portfolio.cash > 1000:
-                amount = self.portfolio.cash * position_size
-                return Action(type="buy", asset="ETH", amount=amount)
+        if momentum > self.momentum_threshold:
+            amount = self.buy_amount(self.portfolio.cash)
+            if amount is not None:
+                return buy(amount, self.asset)
 
         # 下跌趋势卖出
         elif momentum < 0.98:
-            eth_balance = self.portfolio.positions.get("ETH", 0)
-            if eth_balance > 0:
-                return Action(type="sell", asset="ETH", amount=eth_balance * 0.5)
+            amount = self.sell_amount(self.portfolio.positions.get(self.asset, 0))
+            if amount is not None:
+                return sell(amount, self.asset)
 
-        return Action(type="hold")
+        return HOLD
+
+    def vector_signals(self, close, series):
+        ratio = series["momentum"]
+        return _signal_array(ratio > self.momentum_threshold, ratio < 0.98)
 
 
 class DCAStrategy(StrategyBase):
     """定投策略"""
 
-    def decide(self, market_data: List[Dict[str, Any]], step: int) -> Action:
-        interval = self.params.get("lookback_period", 10)
-        buy_amount = self.params.get("position_size", 0.1) * 10000
+    PARAM_DEFAULTS = {"lookback_period": 10, "position_size": 0.1}
+
+    def initialize(self):
+        self.interval = self.config.lookback_period
+        self.fixed_amount = self.config.position_size * 10000
 
+    def buy_amount(self, cash):
+        return self.fixed_amount if cash >= self.fixed_amount else None
+
+    def decide(self, market_data: MarketView, step: int) -> TradeAction:
         # 每隔固定步数买入
-        if step % interval == 0:
-            if self.portfolio.cash >= buy_amount:
-                return Action(type="buy", asset="ETH", amount=buy_amount)
+        if step % self.interval == 0:
+            amount = self.buy_amount(self.portfolio.cash)
+            if amount is not None:
+                return buy(amount, self.asset)
+
+        return HOLD
 
-        return Action(type="hold")
+    def vector_signals(self, close, series):
+        steps = np.arange(len(close))
+        return (steps % self.interval == 0).astype(np.int8)
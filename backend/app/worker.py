@@ -0,0 +1,305 @@
+"""比赛任务 worker
+
+从数据库任务队列（match_jobs）以租约方式领取比赛任务并执行：
+- 领取时设置租约到期时间，执行期间定期心跳续约
+- 提交结果前确认仍持有租约，避免与接手过期任务的其他 worker 重复写结果
+- 周期性地将租约过期的任务重新入队（worker 崩溃或失联），超过最大尝试次数则标记失败
+- 执行期间将计算进程回传的进度快照写入 match_progress，API 进程据此向订阅者推送
+
+独立运行（MATCH_QUEUE_MODE=worker 时由它们执行全部比赛，可按需增加进程数）：
+
+    python -m app.worker
+
+本地模式（MATCH_QUEUE_MODE=local，默认）下 API 进程内置一个 worker：提交后立即在后台
+执行该任务，并周期性接管重启前遗留的任务。
+"""
+import asyncio
+import os
+import queue
+import signal
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from app.config import settings
+from app.core.execution_log import step_snapshots
+from app.core.executor import match_executor
+from app.core.metrics import MATCH_DURATION, MATCH_RUNS, MATCH_STEPS_PER_SECOND, serve_metrics
+from app.core.match_runner import (
+    PROGRESS_END,
+    MatchOutcome,
+    parse_job_payload,
+    progress_rankings,
+    run_match,
+)
+from app.database import SessionLocal
+from app.db.crud import MatchCRUD, MatchJobCRUD
+
+
+def _next_progress(channel: Any, timeout: float) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """从进度通道取出积压的全部快照，只保留最新一条；返回 (快照, 是否已结束)"""
+    latest = None
+    try:
+        item = channel.get(timeout=timeout)
+    except queue.Empty:
+        return None, False
+    while True:
+        if item is PROGRESS_END:
+            return latest, True
+        latest = item
+        try:
+            item = channel.get_nowait()
+        except queue.Empty:
+            return latest, False
+
+
+def default_worker_id(prefix: str = "worker") -> str:
+    return f"{prefix}-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class MatchWorker:
+    """基于数据库租约的比赛任务 worker"""
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        *,
+        concurrency: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        heartbeat_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+    ):
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = concurrency or settings.worker_concurrency
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds or settings.job_heartbeat_seconds
+        self.poll_seconds = poll_seconds or settings.job_poll_seconds
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ==================== 数据库操作（在线程池中执行）====================
+
+    def _claim(self, job_id: Optional[str] = None, created_before: Optional[datetime] = None):
+        db = SessionLocal()
+        try:
+            job = MatchJobCRUD.claim(
+                db, self.worker_id, self.lease_seconds, job_id=job_id, created_before=created_before
+            )
+            if job is None:
+                return None
+            return job.id, job.match_id, job.attempts, job.payload
+        finally:
+            db.close()
+
+    def _heartbeat(self, job_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            return MatchJobCRUD.heartbeat(db, job_id, self.worker_id, self.lease_seconds)
+        finally:
+            db.close()
+
+    def _complete(self, job_id: str, match_id: str, outcome: MatchOutcome) -> bool:
+        """结果、执行日志、比赛状态、策略统计与任务状态在同一事务中提交
+
+        计算结束后才打开会话，连接只在写入期间占用；每类数据一条语句（executemany），一次提交。
+        """
+        db = SessionLocal()
+        try:
+            if not MatchJobCRUD.holds_lease(db, job_id, self.worker_id):
+                db.rollback()
+                return False
+            MatchCRUD.bulk_insert_logs(
+                db, match_id, step_snapshots(outcome.logs), batch_size=settings.match_log_batch_size
+            )
+            MatchCRUD.complete(db, match_id, outcome.results, outcome.profile)
+            MatchJobCRUD.mark_completed(db, job_id)
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    def _save_progress(self, match_id: str, step: int, total_steps: int, rankings: list) -> None:
+        db = SessionLocal()
+        try:
+            MatchCRUD.upsert_progress(db, match_id, step, total_steps, {"rankings": rankings})
+        finally:
+            db.close()
+
+    def _fail(self, job_id: str, error: str) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            return MatchJobCRUD.fail(db, job_id, self.worker_id, error)
+        finally:
+            db.close()
+
+    def _requeue_expired(self) -> int:
+        db = SessionLocal()
+        try:
+            return MatchJobCRUD.requeue_expired(db)
+        finally:
+            db.close()
+
+    # ==================== 执行 ====================
+
+    async def _keep_alive(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                held = await run_in_threadpool(self._heartbeat, job_id)
+            except Exception as e:
+                # 单次续约失败（如结果写入期间数据库繁忙）不终止心跳，下个周期重试
+                logger.warning(f"[{job_id}] 心跳续约失败: {e}")
+                continue
+            if not held:
+                logger.warning(f"[{job_id}] 租约已丢失，结果将不会提交")
+                return
+
+    async def _relay_progress(self, match_id: str, channel: Any, params: Dict[str, Any]) -> None:
+        """将计算任务回传的进度快照写入数据库（积压时只写最新一条），直到收到结束标记"""
+        total_steps = params["duration_steps"]
+        initial_capital = params["initial_capital"]
+        while True:
+            snapshot, ended = await run_in_threadpool(_next_progress, channel, self.heartbeat_seconds)
+            if snapshot is not None:
+                rankings = progress_rankings(snapshot["values"], initial_capital, snapshot.get("metrics"))
+                try:
+                    await run_in_threadpool(
+                        self._save_progress, match_id, snapshot["step"], total_steps, rankings
+                    )
+                except Exception as e:
+                    logger.warning(f"[{match_id}] 写入比赛进度失败: {e}")
+            if ended:
+                return
+
+    async def process(self, claimed) -> Optional[str]:
+        """执行已领取的任务，返回任务最终状态（completed / queued / failed / None 表示租约丢失）"""
+        job_id, match_id, attempts, payload = claimed
+        logger.info(f"[{match_id}] worker {self.worker_id} 领取任务 {job_id}（第 {attempts} 次）")
+        keep_alive = asyncio.create_task(self._keep_alive(job_id))
+        relay = None
+        started = time.perf_counter()
+        try:
+            params, strategies = parse_job_payload(payload)
+            channel = match_executor.progress_channel()
+            relay = asyncio.create_task(self._relay_progress(match_id, channel, params))
+            outcome = await run_match(match_id, params, strategies, progress=channel)
+            # 等待最后一条进度写入（计算结束时已发送结束标记）
+            await relay
+
+            MATCH_DURATION.observe(time.perf_counter() - started)
+            if outcome.compute_seconds > 0:
+                MATCH_STEPS_PER_SECOND.observe(params["duration_steps"] / outcome.compute_seconds)
+            # 写入结果期间心跳继续续约（大批量日志写入可能超过一个租约周期），写入失败同样走 _fail
+            if not await run_in_threadpool(self._complete, job_id, match_id, outcome):
+                logger.warning(f"[{match_id}] 租约已被接管，丢弃本次结果")
+                MATCH_RUNS.inc("lease_lost")
+                return None
+        except Exception as e:
+            if relay is not None:
+                relay.cancel()
+            logger.error(f"[{match_id}] 比赛执行失败: {e}", exc_info=True)
+            MATCH_RUNS.inc("failed")
+            status = await run_in_threadpool(self._fail, job_id, str(e))
+            if status == "queued":
+                logger.info(f"[{match_id}] 任务 {job_id} 已重新入队")
+            return status
+        finally:
+            keep_alive.cancel()
+
+        MATCH_RUNS.inc("completed")
+        winner = outcome.results[0]
+        logger.info(f"[{match_id}] 比赛执行完成，冠军: {winner['strategy_id']} ({winner['return_pct']:+.2f}%)")
+        return "completed"
+
+    async def run_job(self, job_id: str) -> Optional[str]:
+        """执行指定任务，失败后若重新入队则立即重试，直到完成、失败或被其他 worker 领取"""
+        status = None
+        while True:
+            claimed = await run_in_threadpool(self._claim, job_id)
+            if claimed is None:
+                return status
+            status = await self.process(claimed)
+            if status != "queued":
+                return status
+
+    async def poll_once(self, created_before: Optional[datetime] = None) -> bool:
+        """回收过期租约并领取一个排队中的任务（在后台执行），返回是否领取到任务"""
+        await run_in_threadpool(self._requeue_expired)
+        claimed = await run_in_threadpool(self._claim, None, created_before)
+        if claimed is None:
+            return False
+        task = asyncio.create_task(self.process(claimed))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def run_forever(self, stop: asyncio.Event, *, stale_only: bool = False) -> None:
+        """轮询队列直到 stop 被设置；stale_only 时只接管入队超过一个租约周期仍未执行的任务"""
+        logger.info(
+            f"比赛 worker 启动: {self.worker_id}, 并发={self.concurrency}, "
+            f"租约={self.lease_seconds}s, 心跳={self.heartbeat_seconds}s"
+        )
+        if stale_only:
+            # 接管对象至少已入队一个租约周期，启动时无需立即轮询（避免与启动后的首批请求争用数据库连接）
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+        while not stop.is_set():
+            claimed = False
+            if len(self._tasks) < self.concurrency:
+                created_before = (
+                    datetime.utcnow() - timedelta(seconds=self.lease_seconds) if stale_only else None
+                )
+                try:
+                    claimed = await self.poll_once(created_before)
+                except Exception as e:
+                    logger.error(f"worker {self.worker_id} 轮询失败: {e}")
+            if not claimed:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        if self._tasks:
+            logger.info(f"worker {self.worker_id} 等待 {len(self._tasks)} 个进行中的任务完成")
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info(f"比赛 worker 已停止: {self.worker_id}")
+
+
+_local_worker: Optional[MatchWorker] = None
+
+
+def get_local_worker() -> MatchWorker:
+    """API 进程内置的 worker（本地模式使用）"""
+    global _local_worker
+    if _local_worker is None:
+        _local_worker = MatchWorker(
+            default_worker_id("api"),
+            concurrency=settings.max_concurrent_matches or max(settings.match_workers, 1),
+            poll_seconds=settings.job_lease_seconds,
+        )
+    return _local_worker
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    metrics_server = None
+    if settings.worker_metrics_port > 0:
+        metrics_server = await serve_metrics(settings.worker_metrics_port)
+    try:
+        await MatchWorker().run_forever(stop)
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        match_executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1 @@
+"""离线基准测试套件（python -m benchmarks，见 docs/development.md）"""
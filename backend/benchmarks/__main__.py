@@ -0,0 +1,77 @@
+"""运行基准测试
+
+    python -m benchmarks                          # 全部用例，结果写入 benchmarks/results/latest.json
+    python -m benchmarks --quick                  # 快速模式（跳过最大规模的用例）
+    python -m benchmarks -k engine.step           # 只运行名称包含该子串的用例
+    python -m benchmarks --compare baseline.json  # 与基线对比，出现退化时退出码为 1
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.harness import CASES, compare, load_results, measure, write_results
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "latest.json"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Agent Arena 基准测试")
+    parser.add_argument("--quick", action="store_true", help="跳过最大规模的用例")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="只运行名称包含该子串的用例（可多次指定）")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="结果 JSON 路径")
+    parser.add_argument("--compare", type=Path, help="基线结果 JSON，对比中位数耗时")
+    parser.add_argument("--threshold", type=float, default=0.15, help="退化阈值（0.15 = 慢 15%% 以上视为退化）")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每个用例的最少累计计时秒数")
+    parser.add_argument("--list", action="store_true", help="只列出用例")
+    args = parser.parse_args(argv)
+
+    # 引擎在热路径上有 debug 日志，基准运行时只保留警告
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    from benchmarks import cases
+
+    selected = [
+        case for case in CASES
+        if (not args.quick or case.quick) and (not args.filter or any(f in case.name for f in args.filter))
+    ]
+    if args.list:
+        for case in selected:
+            print(case.name)
+        return 0
+
+    results = {}
+    try:
+        for case in selected:
+            result = measure(case, min_time=args.min_time)
+            results[case.name] = result
+            throughput = (
+                f"  {result['throughput']:>14,.0f} {result['unit']}/s" if "throughput" in result else ""
+            )
+            print(f"{case.name:<60} {result['median_s'] * 1000:>11.3f} ms  x{result['repeat']:<3}{throughput}")
+    finally:
+        cases.api.close()
+
+    write_results(args.output, results, "quick" if args.quick else "full")
+    print(f"\n结果已写入 {args.output}")
+
+    if args.compare is None:
+        return 0
+    rows = compare(results, load_results(args.compare), args.threshold)
+    print(f"\n与基线对比（{args.compare}，阈值 {args.threshold:.0%}）：")
+    for row in rows:
+        print(
+            f"{row['name']:<60} {row['baseline_s'] * 1000:>11.3f} -> {row['current_s'] * 1000:>11.3f} ms"
+            f"  x{row['ratio']:.2f}  {row['status']}"
+        )
+    regressions = [row for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n发现 {len(regressions)} 个性能退化")
+        return 1
+    print("\n未发现性能退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
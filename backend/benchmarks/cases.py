@@ -0,0 +1,387 @@
+"""基准用例
+
+全部离线运行：行情使用带种子的模拟数据，CoinGecko 转换使用构造的原始 OHLC，
+API 用例在内存 SQLite 上通过 TestClient 调用（比赛在进程内线程池执行）。
+"""
+import json
+import os
+
+# 必须在导入 app 之前设置
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("MATCH_WORKERS", "0")
+os.environ.setdefault("SWEEP_WORKERS", "1")
+
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.core.kline_series import KlineSeries
+from app.core.market_basket import BasketView, MarketBasket
+from app.core.market_data import CoinGeckoFetcher, MarketDataGenerator
+from app.core.market_view import MarketView
+from app.core.match_engine import MatchEngine
+from app.models.match import MatchConfig
+from app.models.strategy import Strategy, StrategyParams, StrategyType
+from benchmarks.harness import Case, register
+
+STRATEGY_TYPES = (StrategyType.MOMENTUM, StrategyType.MEAN_REVERSION, StrategyType.DCA)
+
+
+@lru_cache(maxsize=None)
+def _market(steps: int) -> KlineSeries:
+    return MarketDataGenerator.generate_random_walk(steps=steps, seed=42)
+
+
+def _strategies(count: int) -> List[Strategy]:
+    created_at = datetime(2024, 1, 1)
+    return [
+        Strategy(
+            id=f"s{i}",
+            name=f"bench-{i}",
+            type=STRATEGY_TYPES[i % len(STRATEGY_TYPES)],
+            params=StrategyParams(lookback_period=10 + i % 20),
+            created_at=created_at,
+        )
+        for i in range(count)
+    ]
+
+
+def _engine(count: int, steps: int, **kwargs):
+    engine = MatchEngine(MatchConfig(duration_steps=steps), **kwargs)
+    match = engine.initialize_match(_strategies(count))
+    return engine, match
+
+
+# ==================== 比赛引擎 ====================
+
+def _step_setup(count: int, steps: int):
+    def setup():
+        engine, match = _engine(count, steps, log_every=settings.match_log_every)
+        return engine, match, _market(steps)
+    return setup
+
+
+def _step_run(state) -> None:
+    engine, match, market = state
+    view = MarketView(market, stop=0)
+    closes = market.close.tolist()
+    for step in range(len(market)):
+        engine.execute_step(match, view.advance_to(step + 1), step, closes[step])
+
+
+# (策略数, 步数, 是否包含在快速模式)
+STEP_MATRIX = [
+    (2, 100, True),
+    (2, 10_000, True),
+    (2, 100_000, False),
+    (10, 100, True),
+    (10, 10_000, True),
+    (10, 100_000, False),
+    (1000, 100, True),
+    (1000, 1_000, False),
+]
+for _count, _steps, _quick in STEP_MATRIX:
+    register(Case(
+        name=f"engine.step[strategies={_count},steps={_steps}]",
+        group="engine",
+        setup=_step_setup(_count, _steps),
+        run=_step_run,
+        units=_count * _steps,
+        unit="strategy_steps",
+        quick=_quick,
+        params={"strategies": _count, "steps": _steps},
+    ))
+
+
+BASKET_ASSETS = ("BTC", "ETH", "SOL", "BNB", "XRP")
+
+
+@lru_cache(maxsize=None)
+def _basket(steps: int) -> MarketBasket:
+    return MarketBasket({
+        asset: MarketDataGenerator.generate_random_walk(steps=steps, seed=42 + j, end_ms=0)
+        for j, asset in enumerate(BASKET_ASSETS)
+    })
+
+
+def _basket_setup(count: int, steps: int):
+    def setup():
+        engine, match = _engine_with_assets(count, steps)
+        return engine, match, _basket(steps)
+    return setup
+
+
+def _engine_with_assets(count: int, steps: int):
+    engine = MatchEngine(
+        MatchConfig(duration_steps=steps, assets=list(BASKET_ASSETS)),
+        log_every=settings.match_log_every,
+    )
+    return engine, engine.initialize_match(_strategies(count))
+
+
+def _basket_run(state) -> None:
+    engine, match, basket = state
+    view = BasketView(basket, stop=0)
+    for step in range(len(basket)):
+        engine.execute_step(match, view.advance_to(step + 1), step)
+
+
+for _count, _steps, _quick in [(10, 10_000, True), (1000, 100, True)]:
+    register(Case(
+        name=f"engine.basket_step[strategies={_count},assets={len(BASKET_ASSETS)},steps={_steps}]",
+        group="engine",
+        setup=_basket_setup(_count, _steps),
+        run=_basket_run,
+        units=_count * _steps,
+        unit="strategy_steps",
+        quick=_quick,
+        params={"strategies": _count, "assets": len(BASKET_ASSETS), "steps": _steps},
+    ))
+
+
+def _vectorized_setup(count: int, steps: int):
+    def setup():
+        engine, match = _engine(count, steps, record_log=False)
+        return engine, match, _market(steps)
+    return setup
+
+
+for _count, _steps, _quick in [(10, 10_000, True), (10, 100_000, False), (1000, 10_000, False)]:
+    register(Case(
+        name=f"engine.vectorized[strategies={_count},steps={_steps}]",
+        group="engine",
+        setup=_vectorized_setup(_count, _steps),
+        run=lambda state: state[0].run_vectorized(state[1], state[2]),
+        units=_count * _steps,
+        unit="strategy_steps",
+        quick=_quick,
+        params={"strategies": _count, "steps": _steps},
+    ))
+
+
+def _finalize_setup(count: int, steps: int):
+    def setup():
+        engine, match = _engine(count, steps, record_log=False)
+        rng = np.random.default_rng(7)
+        for i in range(len(engine.book)):
+            values = 10_000.0 * np.cumprod(1 + rng.normal(0, 0.01, size=steps + 1))
+            engine.book.set_history(i, values)
+        return engine, match
+    return setup
+
+
+for _count, _steps, _quick in [(10, 10_000, True), (10, 100_000, False)]:
+    register(Case(
+        name=f"engine.finalize[strategies={_count},steps={_steps}]",
+        group="engine",
+        setup=_finalize_setup(_count, _steps),
+        run=lambda state: state[0].finalize_match(state[1]),
+        units=_count * _steps,
+        unit="values",
+        quick=_quick,
+        params={"strategies": _count, "steps": _steps},
+    ))
+
+
+# ==================== 行情 ====================
+
+for _market_type in ("random", "trending", "ranging"):
+    register(Case(
+        name=f"market.generate[type={_market_type},steps=100000]",
+        group="market",
+        run=lambda _state, market_type=_market_type: MarketDataGenerator.generate(
+            market_type, 100_000, seed=1
+        ),
+        units=100_000,
+        unit="klines",
+        params={"type": _market_type, "steps": 100_000},
+    ))
+
+
+def _raw_ohlc(rows: int) -> list:
+    rng = np.random.default_rng(3)
+    close = 30_000 * np.cumprod(1 + rng.normal(0, 0.005, size=rows))
+    ts = 1_700_000_000_000 + np.arange(rows, dtype=np.int64) * 1_800_000
+    return [
+        [int(t), float(c * 0.999), float(c * 1.002), float(c * 0.997), float(c)]
+        for t, c in zip(ts, close)
+    ]
+
+
+register(Case(
+    name="market.convert_ohlc[rows=100000]",
+    group="market",
+    setup=lambda: _raw_ohlc(100_000),
+    run=lambda raw: CoinGeckoFetcher._convert_ohlc(raw, seed=1),
+    units=100_000,
+    unit="klines",
+    params={"rows": 100_000},
+))
+
+
+# ==================== 序列化 ====================
+
+def _fake_match(participants: int, steps: int) -> SimpleNamespace:
+    rng = np.random.default_rng(5)
+    now = datetime(2024, 1, 1)
+    return SimpleNamespace(
+        id="bench",
+        status="completed",
+        error_message=None,
+        initial_capital=10_000.0,
+        trading_pair="ETH/USDC",
+        timeframe="5m",
+        duration_steps=steps,
+        market_type="random",
+        market_source="simulated",
+        coin_id=None,
+        market_seed=1,
+        created_at=now,
+        start_time=now,
+        end_time=now,
+        profile=None,
+        participants=[
+            SimpleNamespace(
+                strategy_id=f"s{i}",
+                strategy=SimpleNamespace(name=f"bench-{i}"),
+                final_value=10_000.0,
+                return_pct=0.0,
+                total_trades=0,
+                win_trades=0,
+                rank=i + 1,
+                max_drawdown=0.0,
+                sharpe_ratio=0.0,
+                value_history=(10_000.0 + rng.normal(0, 50, size=steps + 1)).tolist(),
+            )
+            for i in range(participants)
+        ],
+    )
+
+
+def _serialize_setup():
+    # 导入 API 模块较慢，放在 setup 中不计时
+    from app.api.matches import _match_to_response
+    return _match_to_response, _fake_match(10, 10_000)
+
+
+def _serialize(state) -> bytes:
+    """与路由返回 dict 时相同：构造响应 dict → jsonable_encoder → JSON"""
+    from fastapi.encoders import jsonable_encoder
+    to_response, match = state
+    return json.dumps(jsonable_encoder(to_response(match))).encode("utf-8")
+
+
+register(Case(
+    name="api.match_to_response[participants=10,steps=10000]",
+    group="serialization",
+    setup=_serialize_setup,
+    run=_serialize,
+    units=10 * 10_000,
+    unit="values",
+    params={"participants": 10, "steps": 10_000},
+))
+
+
+# ==================== API（内存 SQLite）====================
+
+class _Api:
+    """惰性启动的 TestClient 与预置数据（所有 API 用例共享）"""
+
+    def __init__(self):
+        self.client = None
+        self.context = None
+        self.strategy_ids: List[str] = []
+        self.long_match_id: Optional[str] = None
+
+    def get(self):
+        if self.client is None:
+            from fastapi.testclient import TestClient
+            from loguru import logger
+            from app.main import app
+
+            # app.main 导入时会重新配置日志，基准运行时只保留警告
+            logger.remove()
+            self.context = TestClient(app)
+            self.client = self.context.__enter__()
+            logger.remove()
+            self._seed()
+        return self.client
+
+    def _seed(self) -> None:
+        for stype in ("momentum", "mean_reversion"):
+            r = self.client.post("/api/strategies/", json={"name": stype, "type": stype, "params": {}})
+            self.strategy_ids.append(r.json()["id"])
+        for seed in range(50):
+            self.run_match(100, seed)
+        self.long_match_id = self.run_match(settings.max_match_duration_steps, 1)
+
+    def run_match(self, steps: int, seed: int) -> str:
+        r = self.client.post(
+            "/api/matches/run",
+            json={"strategy_ids": self.strategy_ids, "duration_steps": steps, "seed": seed},
+        )
+        r.raise_for_status()
+        return r.json()["match_id"]
+
+    def close(self) -> None:
+        if self.context is not None:
+            self.context.__exit__(None, None, None)
+            self.client = self.context = None
+
+
+api = _Api()
+
+
+def _request(method: str, path_fn):
+    def run(_state):
+        client = api.get()
+        r = client.request(method, path_fn())
+        r.raise_for_status()
+    return run
+
+
+register(Case(
+    name="api.post_run_match[steps=1000]",
+    group="api",
+    setup=api.get,
+    run=lambda _client: api.run_match(1_000, 7),
+    units=1,
+    unit="requests",
+    params={"steps": 1_000},
+))
+register(Case(
+    name="api.get_match[steps=10000]",
+    group="api",
+    setup=api.get,
+    run=_request("GET", lambda: f"/api/matches/{api.long_match_id}"),
+    units=1,
+    unit="requests",
+))
+register(Case(
+    name="api.list_matches[limit=50]",
+    group="api",
+    setup=api.get,
+    run=_request("GET", lambda: "/api/matches/?limit=50"),
+    units=1,
+    unit="requests",
+))
+register(Case(
+    name="api.match_logs_page[limit=500]",
+    group="api",
+    setup=api.get,
+    run=_request("GET", lambda: f"/api/matches/{api.long_match_id}/logs?limit=500"),
+    units=1,
+    unit="requests",
+))
+register(Case(
+    name="api.health",
+    group="api",
+    setup=api.get,
+    run=_request("GET", lambda: "/health"),
+    units=1,
+    unit="requests",
+))
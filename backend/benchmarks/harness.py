@@ -0,0 +1,121 @@
+"""基准测试框架：用例注册、计时、结果文件与基线对比"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class Case:
+    """一个基准用例：setup() 的返回值传给 run()，只计 run() 的耗时"""
+    name: str
+    group: str
+    run: Callable[[Any], Any]
+    setup: Callable[[], Any] = lambda: None
+    units: float = 0.0          # 每次 run 处理的工作量（如步数），用于计算吞吐
+    unit: str = ""              # 工作量单位（如 "steps"）
+    quick: bool = True          # 是否包含在 --quick 模式中
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+CASES: List[Case] = []
+
+
+def register(case: Case) -> Case:
+    if any(c.name == case.name for c in CASES):
+        raise ValueError(f"基准用例重名: {case.name}")
+    CASES.append(case)
+    return case
+
+
+def measure(case: Case, min_time: float = 0.5, max_repeat: int = 20, min_repeat: int = 1) -> Dict[str, Any]:
+    """重复执行直到累计耗时达到 min_time（或达到 max_repeat 次），返回中位数/最小值等统计"""
+    timings: List[float] = []
+    while len(timings) < min_repeat or (sum(timings) < min_time and len(timings) < max_repeat):
+        state = case.setup()
+        started = time.perf_counter()
+        case.run(state)
+        timings.append(time.perf_counter() - started)
+
+    median = statistics.median(timings)
+    result = {
+        "group": case.group,
+        "params": case.params,
+        "repeat": len(timings),
+        "median_s": median,
+        "min_s": min(timings),
+        "max_s": max(timings),
+    }
+    if case.units and case.unit:
+        result["unit"] = case.unit
+        result["throughput"] = case.units / median if median > 0 else 0.0
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def write_results(path: Path, results: Dict[str, Dict[str, Any]], mode: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"meta": {**environment(), "mode": mode}, "results": results}
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def compare(
+    current: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = 0.15,
+) -> List[Dict[str, Any]]:
+    """按中位数耗时对比两次结果；ratio = 当前 / 基线，超过 1 + threshold 视为退化
+
+    只对比两边都有的用例，返回按 ratio 降序的对比行。
+    """
+    rows = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None or not base.get("median_s"):
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({
+            "name": name,
+            "baseline_s": base["median_s"],
+            "current_s": result["median_s"],
+            "ratio": ratio,
+            "status": status,
+        })
+    rows.sort(key=lambda row: row["ratio"], reverse=True)
+    return rows
@@ -1,12 +1,22 @@
 """
-pytest 配置：测试用内存 SQLite，避免污染开发库。
+pytest 配置：测试用临时目录中的 SQLite 文件库，避免污染开发库。
+（同步与异步引擎各自建立连接，内存库无法在两者间共享，API 路由会报错。）
 必须在导入 app 前设置 DATABASE_URL。
 """
+import atexit
 import os
+import shutil
+import tempfile
 import pytest
 
 # 最先设置，再导入 app（database 会读 settings.database_url）
-os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="agent_arena_test_")
+atexit.register(shutil.rmtree, _TEST_DB_DIR, ignore_errors=True)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TEST_DB_DIR}/test.db")
+# 直接调用 run_sweep 时默认在测试进程内执行（进程池路径由 test_sweep 显式覆盖）；API 扫描走 match_executor
+os.environ.setdefault("SWEEP_WORKERS", "1")
+# 比赛在测试进程的线程池中执行
+os.environ.setdefault("MATCH_WORKERS", "0")
 
 from fastapi.testclient import TestClient
 from app.main import app
@@ -67,6 +67,54 @@ def test_list_matches(client: TestClient):
     assert "id" in items[0] and "status" in items[0] and "config" in items[0]
 
 
+def test_match_summaries_keyset_pagination(client: TestClient):
+    """摘要列表：冠军与参赛数一次查出，按 (created_at, id) 键集翻页，同一时间戳不重复不遗漏"""
+    from datetime import datetime
+    from sqlalchemy import update
+    from app.database import SessionLocal
+    from app.db import models
+
+    ids = _create_two_strategies(client)
+    match_ids = [
+        client.post("/api/matches/run", json={"strategy_ids": ids, "duration_steps": 15, "seed": i}).json()["match_id"]
+        for i in range(5)
+    ]
+    # 其中三场的创建时间相同，由 id 决定顺序
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(models.Match).where(models.Match.id.in_(match_ids[1:4])).values(created_at=datetime(2030, 1, 1))
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/matches/summary", params=params).json()
+        assert len(page["items"]) <= 2
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(item["id"] for item in seen) == sorted(match_ids)
+    keys = [(item["created_at"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    detail = client.get(f"/api/matches/{seen[0]['id']}").json()
+    champion = next(p for p in detail["participants"] if p["rank"] == 1)
+    assert seen[0]["participants_count"] == 2
+    assert seen[0]["winner"] == {
+        "strategy_id": champion["strategy_id"],
+        "strategy_name": champion["strategy_name"],
+        "return_pct": champion["return_pct"],
+    }
+    assert "participants" not in seen[0]
+    assert client.get("/api/matches/summary", params={"status": "failed"}).json() == {"items": [], "next_cursor": None}
+    assert client.get("/api/matches/summary", params={"cursor": "@@bad"}).status_code == 400
+
+
 def test_run_match_requires_two_strategies(client: TestClient):
     """少于 2 个策略：请求体 min_length=2 触发 422 校验失败"""
     r = client.post(
@@ -96,3 +144,155 @@ def test_run_match_requires_two_strategies(client: TestClient):
     )
     # Pydantic 校验 strategy_ids 最少 2 个，返回 422
     assert r2.status_code == 422
+
+
+def test_run_match_many_strategies(client: TestClient):
+    """单场比赛可容纳大量策略（上限取配置），重复的策略 ID 返回 400"""
+    ids = []
+    for i in range(12):
+        r = client.post("/api/strategies/", json={"name": f"pop-{i}", "type": ("dca", "momentum")[i % 2], "params": {}})
+        ids.append(r.json()["id"])
+    match_id = client.post("/api/matches/run", json={"strategy_ids": ids, "duration_steps": 30}).json()["match_id"]
+    body = client.get(f"/api/matches/{match_id}").json()
+    assert body["status"] == "completed"
+    assert sorted(p["rank"] for p in body["participants"]) == list(range(1, 13))
+    # 风险收益指标随结果写入 match_participants
+    dca = next(p for p in body["participants"] if p["strategy_id"] == ids[0])
+    assert dca["exposure_pct"] > 0 and dca["turnover"] > 0 and dca["volatility"] > 0
+    assert {"sortino_ratio", "calmar_ratio", "max_drawdown_duration", "profit_factor", "avg_trade_pnl"} <= set(dca)
+
+    r = client.post("/api/matches/run", json={"strategy_ids": [ids[0], ids[0]], "duration_steps": 30})
+    assert r.status_code == 400
+
+
+def test_run_match_records_seed(client: TestClient):
+    """比赛记录保存行情种子，同一种子重跑得到相同结果"""
+    ids = _create_two_strategies(client)
+    payload = {
+        "strategy_ids": ids,
+        "market_type": "random",
+        "market_source": "simulated",
+        "duration_steps": 50,
+        "initial_capital": 10000,
+        "seed": 12345,
+    }
+    first = client.post("/api/matches/run", json=payload).json()["match_id"]
+    second = client.post("/api/matches/run", json=payload).json()["match_id"]
+
+    m1 = client.get(f"/api/matches/{first}").json()
+    m2 = client.get(f"/api/matches/{second}").json()
+    assert m1["config"]["market_seed"] == 12345
+    values1 = {p["strategy_id"]: p["value_history"] for p in m1["participants"]}
+    values2 = {p["strategy_id"]: p["value_history"] for p in m2["participants"]}
+    assert values1 == values2
+
+    auto = client.post("/api/matches/run", json={**payload, "seed": None}).json()
+    assert client.get(f"/api/matches/{auto['match_id']}").json()["config"]["market_seed"] is not None
+
+
+def test_value_history_is_packed_and_downsampled(client: TestClient):
+    """value_history 以压缩二进制存储；points 参数返回 LTTB 降采样序列与所选步数"""
+    from sqlalchemy import text
+    from app.database import SessionLocal
+
+    ids = _create_two_strategies(client)
+    match_id = client.post("/api/matches/run", json={"strategy_ids": ids, "duration_steps": 400, "seed": 8}).json()["match_id"]
+
+    db = SessionLocal()
+    try:
+        raw = db.execute(
+            text("SELECT value_history FROM match_participants WHERE match_id = :m"), {"m": match_id}
+        ).scalars().all()
+    finally:
+        db.close()
+    assert all(isinstance(blob, bytes) and len(blob) < 401 * 8 for blob in raw)
+
+    full = client.get(f"/api/matches/{match_id}").json()["participants"]
+    assert all(len(p["value_history"]) == 401 and "value_history_steps" not in p for p in full)
+
+    sampled = client.get(f"/api/matches/{match_id}", params={"points": 50}).json()["participants"]
+    for p, f in zip(sampled, full):
+        assert len(p["value_history"]) == len(p["value_history_steps"]) == 50
+        assert p["value_history_steps"][0] == 0 and p["value_history_steps"][-1] == 400
+        assert p["value_history"] == [f["value_history"][i] for i in p["value_history_steps"]]
+    listed = client.get("/api/matches/", params={"points": 50}).json()
+    assert all(len(p["value_history"]) == 50 for m in listed for p in m["participants"])
+    assert client.get(f"/api/matches/{match_id}", params={"points": 2}).status_code == 422
+
+
+def test_run_match_with_profile(client: TestClient):
+    """profile=true 时比赛详情附带引擎分阶段计时，默认不附带"""
+    ids = _create_two_strategies(client)
+    payload = {"strategy_ids": ids, "duration_steps": 40, "seed": 9}
+    profiled = client.post("/api/matches/run", json={**payload, "profile": True}).json()["match_id"]
+    plain = client.post("/api/matches/run", json=payload).json()["match_id"]
+
+    body = client.get(f"/api/matches/{profiled}").json()
+    profile = body["profile"]
+    assert profile["steps"] == 40
+    assert profile["stages"]["decide"]["calls"] == 80
+    assert set(profile["strategies"]) == set(ids)
+    assert "profile" not in client.get(f"/api/matches/{plain}").json()
+
+
+def test_match_logs_paged_and_streamed(client: TestClient):
+    """比赛日志批量写入，支持按步键集分页与 NDJSON 流式读取"""
+    import json
+
+    ids = _create_two_strategies(client)
+    match_id = client.post(
+        "/api/matches/run",
+        json={"strategy_ids": ids, "duration_steps": 35, "seed": 8},
+    ).json()["match_id"]
+
+    # 默认无成交的步每 10 步一条快照、最后一步总是记录；有成交的步总是记录
+    detail = client.get(f"/api/matches/{match_id}", params={"include_logs": True}).json()
+    expected_steps = [log["step"] for log in detail["logs"]]
+    assert {0, 10, 20, 30, 34} <= set(expected_steps)
+    entries = detail["logs"][0]["data"]["logs"]
+    assert {e["strategy_id"] for e in entries} == set(ids)
+    trades = {sid: 0 for sid in ids}
+    for log in detail["logs"]:
+        traded = [e for e in log["data"]["logs"] if e["action"]["type"] != "hold"]
+        assert traded or log["step"] % 10 == 0 or log["step"] == 34
+        for e in traded:
+            trades[e["strategy_id"]] += 1
+    assert trades == {p["strategy_id"]: p["total_trades"] for p in detail["participants"]}
+
+    steps, after = [], -1
+    while after is not None:
+        page = client.get(f"/api/matches/{match_id}/logs", params={"after_step": after, "limit": 2}).json()
+        steps += [item["step"] for item in page["items"]]
+        after = page["next_after_step"]
+    assert steps == expected_steps
+
+    r = client.get(f"/api/matches/{match_id}/logs/stream", params={"after_step": 10})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    later = [log for log in detail["logs"] if log["step"] > 10]
+    assert [line["step"] for line in lines] == [log["step"] for log in later]
+    assert lines[0]["data"] == later[0]["data"]
+
+    assert client.get("/api/matches/missing/logs").status_code == 404
+
+
+def test_run_match_with_coin_basket(client: TestClient):
+    """coin_ids 组成多资产比赛：主资产决定交易对，日志持仓覆盖全部资产；重复或不支持的币种返回 400"""
+    ids = _create_two_strategies(client)
+    payload = {"strategy_ids": ids, "duration_steps": 30, "seed": 3, "coin_ids": ["bitcoin", "solana"]}
+    r = client.post("/api/matches/run", json=payload)
+    assert r.status_code == 200
+    assert r.json()["config"]["trading_pair"] == "BTC/USDT"
+
+    body = client.get(f"/api/matches/{r.json()['match_id']}?include_logs=true").json()
+    assert body["status"] == "completed"
+    assert body["config"]["coin_ids"] == ["bitcoin", "solana"]
+    assert body["config"]["coin_id"] == "bitcoin"
+    entry = body["logs"][0]["data"]["logs"][0]
+    assert set(entry["portfolio"]["positions"]) == {"BTC", "SOL"}
+
+    dup = client.post("/api/matches/run", json={**payload, "coin_ids": ["bitcoin", "bitcoin"]})
+    assert dup.status_code == 400
+    bad = client.post("/api/matches/run", json={**payload, "coin_ids": ["bitcoin", "nope"]})
+    assert bad.status_code == 400
@@ -0,0 +1,173 @@
+"""异步 CRUD：与同步 CRUD 读写同一个库、结果一致，并发查询互不阻塞"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.db.crud import AsyncMatchCRUD, AsyncStrategyCRUD, MatchCRUD, StrategyCRUD
+from app.models.strategy import StrategyCreate
+
+CONFIG = {
+    "initial_capital": 10000.0,
+    "trading_pair": "ETH/USDC",
+    "timeframe": "5m",
+    "duration_steps": 20,
+    "market_type": "random",
+}
+
+
+def test_async_crud_matches_sync_crud(db_clean):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            strategies = [
+                await AsyncStrategyCRUD.create(db, StrategyCreate(name=f"策略{i}", type="dca", params={}))
+                for i in range(3)
+            ]
+            ids = [s.id for s in strategies]
+            match = await AsyncMatchCRUD.create(db, config=CONFIG, strategy_ids=ids)
+
+        async def read(match_id):
+            async with AsyncSessionLocal() as db:
+                return await AsyncMatchCRUD.get(db, match_id, load_logs=False)
+
+        # 每个协程独立会话，并发执行
+        loaded = await asyncio.gather(*(read(match.id) for _ in range(5)))
+        async with AsyncSessionLocal() as db:
+            listed = await AsyncStrategyCRUD.get_all(db)
+            summaries = await AsyncMatchCRUD.list_summaries(db)
+        return ids, match.id, loaded, listed, summaries
+
+    ids, match_id, loaded, listed, summaries = asyncio.run(scenario())
+
+    for m in loaded:
+        assert sorted(p.strategy.name for p in m.participants) == ["策略0", "策略1", "策略2"]
+
+    db = SessionLocal()
+    try:
+        assert [s.id for s in listed] == [s.id for s in StrategyCRUD.get_all(db)]
+        assert summaries == MatchCRUD.list_summaries(db)
+        MatchCRUD.bulk_insert_logs(db, match_id, [(step, [step]) for step in range(30)])
+        db.commit()
+    finally:
+        db.close()
+
+    async def logs_and_delete():
+        async with AsyncSessionLocal() as db:
+            page = await AsyncMatchCRUD.get_logs_page(db, match_id, after_step=9, limit=5)
+            streamed = [step async for step, _ in AsyncMatchCRUD.iter_logs(db, match_id, chunk_size=7)]
+            deleted = await AsyncMatchCRUD.delete(db, match_id)
+            return [log.step for log in page], streamed, deleted
+
+    page, streamed, deleted = asyncio.run(logs_and_delete())
+    assert page == [10, 11, 12, 13, 14]
+    assert streamed == list(range(30))
+    assert deleted
+
+    db = SessionLocal()
+    try:
+        assert MatchCRUD.get(db, match_id) is None
+        assert StrategyCRUD.get(db, ids[0]) is not None
+    finally:
+        db.close()
+
+
+def test_async_routes_run_alongside_threadpool_worker(client: TestClient):
+    """异步路由读写与线程池中的 worker（同步会话）同时进行，互不干扰"""
+    ids = [
+        client.post("/api/strategies/", json={"name": stype, "type": stype, "params": {}}).json()["id"]
+        for stype in ("mean_reversion", "momentum", "dca")
+    ]
+
+    def submit(seed):
+        # 本地模式下后台任务（worker 领取、执行、提交结果）在该请求返回前完成
+        r = client.post("/api/matches/run", json={"strategy_ids": ids, "duration_steps": 300, "seed": seed})
+        return r.status_code, r.json()["match_id"]
+
+    def browse():
+        codes = []
+        for i in range(15):
+            codes.append(client.get("/api/matches/summary").status_code)
+            codes.append(client.get("/api/strategies/").status_code)
+            codes.append(client.post("/api/strategies/", json={"name": f"b{i}", "type": "dca", "params": {}}).status_code)
+        return codes
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        submitted = [pool.submit(submit, seed) for seed in range(4)]
+        browsed = [pool.submit(browse) for _ in range(4)]
+        results = [f.result() for f in submitted]
+        codes = [code for f in browsed for code in f.result()]
+
+    assert set(codes) <= {200, 201}
+    for status_code, match_id in results:
+        assert status_code == 200
+        match = client.get(f"/api/matches/{match_id}").json()
+        assert match["status"] == "completed"
+        assert len(match["participants"]) == 3
+
+
+def test_delete_match_removes_logs_without_loading_them(db_clean):
+    """删除比赛不把执行日志加载进会话：日志由一条 DELETE 删除"""
+    from sqlalchemy import event, func, select
+    from app.database import async_engine, engine
+    from app.db import models
+
+    db = SessionLocal()
+    try:
+        ids = [StrategyCRUD.create(db, StrategyCreate(name=f"s{i}", type="dca", params={})).id for i in range(2)]
+        match_ids = [MatchCRUD.create(db, config=CONFIG, strategy_ids=ids).id for _ in range(2)]
+        for match_id in match_ids:
+            MatchCRUD.bulk_insert_logs(db, match_id, [(step, [step]) for step in range(50)])
+        db.commit()
+    finally:
+        db.close()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", capture)
+    try:
+        db = SessionLocal()
+        try:
+            assert MatchCRUD.delete(db, match_ids[0])
+        finally:
+            db.close()
+
+        async def delete_async():
+            async with AsyncSessionLocal() as adb:
+                return await AsyncMatchCRUD.delete(adb, match_ids[1])
+
+        assert asyncio.run(delete_async())
+    finally:
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "before_cursor_execute", capture)
+
+    assert not [s for s in statements if s.startswith("SELECT") and "FROM match_logs" in s]
+    assert len([s for s in statements if s.startswith("DELETE FROM match_logs")]) == 2
+    db = SessionLocal()
+    try:
+        assert db.scalar(select(func.count()).select_from(models.MatchLog)) == 0
+        assert db.scalar(select(func.count()).select_from(models.Match)) == 0
+    finally:
+        db.close()
+
+
+def test_memory_sqlite_fails_on_first_async_use(monkeypatch):
+    import pytest
+    from app import database
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "database_url", "sqlite:///:memory:")
+    monkeypatch.setattr(settings, "async_database_url", None)
+    # 导入（创建引擎）时不报错，首次获取异步会话时给出明确错误
+    memory_engine = database.create_async_db_engine()
+
+    async def first_use():
+        with pytest.raises(RuntimeError, match="内存 SQLite"):
+            await database.get_async_db().__anext__()
+        await memory_engine.dispose()
+
+    asyncio.run(first_use())
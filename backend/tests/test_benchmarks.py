@@ -0,0 +1,32 @@
+"""基准测试框架测试（计时统计、结果文件、基线对比）"""
+from benchmarks.harness import Case, compare, load_results, measure, write_results
+
+
+def test_measure_and_compare(tmp_path):
+    calls = []
+    case = Case(
+        name="demo",
+        group="demo",
+        setup=lambda: 3,
+        run=lambda state: calls.append(state),
+        units=100,
+        unit="items",
+    )
+    result = measure(case, min_time=0.0, min_repeat=3)
+    assert result["repeat"] == 3 and calls == [3, 3, 3]
+    assert result["min_s"] <= result["median_s"] <= result["max_s"]
+    assert result["unit"] == "items" and result["throughput"] > 0
+
+    path = tmp_path / "results.json"
+    write_results(path, {"demo": result}, "quick")
+    assert load_results(path)["demo"]["repeat"] == 3
+
+    baseline = {"fast": {"median_s": 1.0}, "slow": {"median_s": 1.0}, "same": {"median_s": 1.0}, "gone": {"median_s": 1.0}}
+    current = {"fast": {"median_s": 0.5}, "slow": {"median_s": 1.3}, "same": {"median_s": 1.1}, "new": {"median_s": 1.0}}
+    rows = compare(current, baseline, threshold=0.15)
+    # 只对比两边都有的用例，按 ratio 降序
+    assert [(r["name"], r["status"]) for r in rows] == [
+        ("slow", "regression"),
+        ("same", "ok"),
+        ("fast", "improvement"),
+    ]
@@ -0,0 +1,54 @@
+"""主要 CRUD 查询的执行计划检查：EXPLAIN QUERY PLAN 应走二级索引而非全表扫描"""
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.db.crud import MatchCRUD, StrategyCRUD
+
+
+@contextmanager
+def _captured_statements():
+    """记录期间执行的 (SQL, 参数)"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def _plans(statements) -> list:
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        return [
+            " | ".join(row[-1] for row in raw.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+            for sql, params in statements
+        ]
+
+
+def _assert_uses(index: str, call) -> None:
+    db = SessionLocal()
+    try:
+        with _captured_statements() as statements:
+            call(db)
+    finally:
+        db.close()
+    plans = _plans(statements)
+    assert any(index in plan for plan in plans), plans
+
+
+def test_hot_queries_use_indexes(db_clean):
+    cursor = (datetime(2026, 1, 1), "m")
+    _assert_uses("ix_strategies_user_id_created_at", lambda db: StrategyCRUD.get_all(db, user_id="u"))
+    _assert_uses("ix_strategies_is_public_created_at", lambda db: StrategyCRUD.get_all(db, is_public=True))
+    _assert_uses("ix_matches_status_created_at", lambda db: MatchCRUD.get_all(db, status="completed"))
+    _assert_uses("ix_matches_created_at_id", lambda db: MatchCRUD.list_summaries(db, before=cursor))
+    _assert_uses("ix_match_participants_match_id", lambda db: MatchCRUD.list_summaries(db))
+    _assert_uses("ix_match_logs_match_id_step", lambda db: MatchCRUD.get_logs_page(db, "m", after_step=10))
@@ -0,0 +1,76 @@
+"""比赛执行器单元测试（有界并发、排队统计、进程池模式）"""
+import asyncio
+import math
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core.executor import MatchExecutor
+
+
+def test_executor_bounds_concurrency_and_reports_queue():
+    """超过并发上限的任务排队，stats 反映排队数与利用率"""
+    executor = MatchExecutor(workers=0, max_concurrent=1)
+    release = threading.Event()
+
+    async def scenario():
+        tasks = [asyncio.create_task(executor.run(release.wait, 5)) for _ in range(3)]
+        while executor.running < 1 or executor.queued < 2:
+            await asyncio.sleep(0.01)
+        during = executor.stats()
+        release.set()
+        await asyncio.gather(*tasks)
+        return during
+
+    during = asyncio.run(scenario())
+    executor.shutdown()
+
+    assert during["running"] == 1 and during["queued"] == 2
+    assert during["utilization"] == 1.0
+    after = executor.stats()
+    assert after["completed"] == 3 and after["queued"] == 0 and after["running"] == 0
+    assert after["utilization"] == 0.0
+
+
+def test_executor_process_mode():
+    """进程池模式下在子进程中执行并返回结果，异常计入 failed"""
+    executor = MatchExecutor(workers=1)
+    assert executor.mode == "process"
+
+    async def scenario():
+        value = await executor.run(math.factorial, 20)
+        try:
+            await executor.run(math.factorial, -1)
+        except ValueError:
+            pass
+        return value
+
+    try:
+        assert asyncio.run(scenario()) == math.factorial(20)
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert stats["completed"] == 1 and stats["failed"] == 1
+
+
+def test_executor_stats_endpoint(client: TestClient):
+    """比赛在执行器中完成后，/executor/stats 计数增加"""
+    before = client.get("/api/matches/executor/stats").json()
+    assert {"mode", "workers", "max_concurrent", "queued", "running", "utilization"} <= set(before)
+
+    ids = []
+    for stype in ("momentum", "dca"):
+        r = client.post(
+            "/api/strategies/",
+            json={"name": stype, "type": stype, "params": {"lookback_period": 5}},
+        )
+        ids.append(r.json()["id"])
+    match_id = client.post(
+        "/api/matches/run",
+        json={"strategy_ids": ids, "duration_steps": 30, "seed": 1},
+    ).json()["match_id"]
+
+    assert client.get(f"/api/matches/{match_id}").json()["status"] == "completed"
+    after = client.get("/api/matches/executor/stats").json()
+    assert after["completed"] == before["completed"] + 1
+    assert after["queued"] == 0 and after["running"] == 0
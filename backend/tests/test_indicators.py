@@ -0,0 +1,122 @@
+"""流式指标与基于指标的策略模板"""
+import numpy as np
+import pytest
+from app.core.market_data import MarketDataGenerator
+from app.core.market_view import MarketView
+from app.models.portfolio import Portfolio
+from app.strategies.indicators import (
+    Indicator, SMA, EMA, RollingStd, RSI, Momentum, BollingerBands, RollingMax, RollingMin, sma_series,
+)
+from app.strategies.templates import MeanReversionStrategy, MomentumStrategy
+
+
+@pytest.fixture
+def closes():
+    return MarketDataGenerator.generate_random_walk(steps=300, seed=11).close
+
+
+def _feed(indicator, values):
+    return [indicator.update(float(x)) for x in values]
+
+
+def test_sma_matches_vectorized_block_sums(closes):
+    """SMA 与整段 sma_series 逐位一致，且与窗口直接求均值一致"""
+    for n in (1, 7, 20):
+        out = _feed(SMA(n), closes)
+        assert out[: n - 1] == [None] * (n - 1)
+        assert np.array_equal(np.array(out[n - 1:]), sma_series(closes, n)[n - 1:])
+        expected = np.lib.stride_tricks.sliding_window_view(closes, n).mean(axis=1)
+        np.testing.assert_allclose(out[n - 1:], expected, rtol=1e-12)
+
+
+def test_rolling_sums_do_not_drift_on_long_series():
+    """长序列上窗口和不随累计总量丢失精度（相减量只有一个块的合计）"""
+    rng = np.random.default_rng(0)
+    x = 2000 + np.cumsum(rng.normal(0, 0.5, 200_000))
+    sma, std = SMA(20), RollingStd(20)
+    for v in x:
+        sma.update(float(v))
+        std.update(float(v))
+    window = x[-20:]
+    assert sma.value == pytest.approx(window.mean(), rel=1e-13)
+    assert std.mean == sma.value
+    assert std.value == pytest.approx(window.std(), rel=1e-9)
+
+
+def test_rolling_window_indicators(closes):
+    """滚动标准差 / 布林带 / 极值 / 动量与朴素实现一致"""
+    n = 15
+    std = _feed(RollingStd(n), closes)
+    bands = BollingerBands(n, k=2.0)
+    rmax, rmin, mom = RollingMax(n), RollingMin(n), Momentum(n)
+    for i, x in enumerate(closes):
+        bands.update(float(x))
+        hi, lo, m = rmax.update(float(x)), rmin.update(float(x)), mom.update(float(x))
+        if i < n - 1:
+            assert std[i] is None and hi is None and lo is None and m is None
+            continue
+        window = closes[i - n + 1: i + 1]
+        assert std[i] == pytest.approx(window.std(), rel=1e-6)
+        assert bands.value == pytest.approx(window.mean())
+        assert bands.upper == pytest.approx(window.mean() + 2 * window.std(), rel=1e-6)
+        assert hi == window.max() and lo == window.min()
+        assert m == closes[i] / closes[i - n + 1]
+
+
+def test_ema_and_rsi():
+    """EMA 递推与 RSI 边界"""
+    ema = EMA(3)
+    assert _feed(ema, [1.0, 2.0, 3.0]) == [1.0, 1.5, 2.25]
+
+    rising = _feed(RSI(5), range(1, 12))
+    assert rising[:5] == [None] * 5 and rising[-1] == 100.0
+    falling = _feed(RSI(5), range(12, 1, -1))
+    assert falling[-1] == 0.0
+
+
+def test_indicator_base_requires_update():
+    """Indicator 是抽象基类，未实现 update 的子类不能实例化"""
+    with pytest.raises(TypeError):
+        Indicator(5)
+
+    class Incomplete(Indicator):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(5)
+
+
+def _naive_mean_reversion(market, params, cash):
+    """旧实现：每步重新计算均值，用于对照"""
+    lookback = params["lookback_period"]
+    if len(market) < lookback + 1:
+        return "hold"
+    recent = market.close[-(lookback + 1):-1].tolist()
+    avg = sum(recent) / len(recent)
+    current = float(market.close[-1])
+    if current < avg * params["buy_threshold"]:
+        return "buy" if cash > 1000 else "hold"
+    return "hold"
+
+
+def test_templates_use_incremental_state():
+    """模板基于流式指标，决策与逐步重算的旧实现一致"""
+    market = MarketDataGenerator.generate_random_walk(steps=400, seed=5)
+    params = {"lookback_period": 12, "buy_threshold": 0.99, "sell_threshold": 1.01, "position_size": 0.2}
+    strategy = MeanReversionStrategy("mr", params)
+    strategy.set_portfolio(Portfolio(strategy_id="mr", cash=10_000.0))
+    momentum = MomentumStrategy("mo", {"lookback_period": 8, "buy_threshold": 1.01})
+    momentum.set_portfolio(Portfolio(strategy_id="mo", cash=10_000.0))
+
+    view = MarketView(market, stop=0)
+    for step in range(len(market)):
+        view.advance_to(step + 1)
+        action = strategy.decide(view, step)
+        expected = _naive_mean_reversion(view, params, strategy.portfolio.cash)
+        assert (action.type if action.type == "buy" else "hold") == expected
+        # 跳过若干步（如止损接管）后再决策，指标仍逐根补齐
+        if step % 7 != 0:
+            momentum_action = momentum.decide(view, step)
+            if step >= 7:
+                ratio = market.close[step] / market.close[step - 7]
+                assert momentum_action.type == ("buy" if ratio > 1.01 else "hold")
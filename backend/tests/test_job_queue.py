@@ -0,0 +1,204 @@
+"""持久化比赛任务队列测试（租约领取、心跳、过期重新入队、独立 worker 执行）"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import SessionLocal
+from app.db import models
+from app.db.crud import MatchJobCRUD
+from app.core.match_runner import MatchOutcome
+from app.worker import MatchWorker
+
+
+@pytest.fixture
+def worker_mode(monkeypatch):
+    """worker 模式：API 只入队，不在进程内执行"""
+    monkeypatch.setattr(settings, "match_queue_mode", "worker")
+
+
+def _submit_match(client: TestClient) -> str:
+    ids = []
+    for stype in ("mean_reversion", "dca"):
+        r = client.post(
+            "/api/strategies/",
+            json={"name": stype, "type": stype, "params": {"lookback_period": 5}},
+        )
+        ids.append(r.json()["id"])
+    r = client.post(
+        "/api/matches/run",
+        json={"strategy_ids": ids, "duration_steps": 40, "seed": 3},
+    )
+    assert r.status_code == 200
+    return r.json()["match_id"]
+
+
+def _job_for(match_id: str) -> models.MatchJob:
+    db = SessionLocal()
+    try:
+        return MatchJobCRUD.get_by_match(db, match_id)
+    finally:
+        db.close()
+
+
+def _expire_lease(job_id: str):
+    db = SessionLocal()
+    try:
+        job = MatchJobCRUD.get(db, job_id)
+        job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_worker_mode_enqueues_and_worker_completes(client: TestClient, worker_mode):
+    """worker 模式下比赛保持 pending，独立 worker 领取后完成并写入结果"""
+    match_id = _submit_match(client)
+    assert client.get(f"/api/matches/{match_id}").json()["status"] == "pending"
+    job = _job_for(match_id)
+    assert job.status == "queued"
+    # 模拟行情的截止时刻随任务保存，重试时时间戳不变
+    assert isinstance(job.payload["params"]["market_end_ms"], int)
+    assert client.get("/api/matches/executor/stats").json()["jobs"] == {"queued": 1}
+
+    worker = MatchWorker("worker-test", lease_seconds=30)
+    assert asyncio.run(worker.run_job(job.id)) == "completed"
+
+    data = client.get(f"/api/matches/{match_id}").json()
+    assert data["status"] == "completed"
+    assert all(len(p["value_history"]) == 41 for p in data["participants"])
+    assert _job_for(match_id).status == "completed"
+
+
+def test_claim_is_exclusive_and_expired_lease_is_requeued(client: TestClient, worker_mode):
+    """同一任务只能被一个 worker 领取；租约过期后重新入队，原 worker 无法再提交结果"""
+    match_id = _submit_match(client)
+    job_id = _job_for(match_id).id
+
+    first = MatchWorker("worker-a", lease_seconds=30)
+    second = MatchWorker("worker-b", lease_seconds=30)
+    claimed = first._claim()
+    assert claimed is not None and claimed[0] == job_id
+    assert second._claim() is None
+    assert client.get(f"/api/matches/{match_id}").json()["status"] == "running"
+    assert first._heartbeat(job_id) and not second._heartbeat(job_id)
+
+    _expire_lease(job_id)
+    assert first._requeue_expired() == 1
+    assert client.get(f"/api/matches/{match_id}").json()["status"] == "pending"
+
+    assert asyncio.run(second.run_job(job_id)) == "completed"
+    assert _job_for(match_id).attempts == 2
+    # 原持有者的租约已失效，结果不会被重复提交
+    assert first._complete(job_id, match_id, MatchOutcome([], [])) is False
+
+
+def test_job_fails_after_max_attempts(client: TestClient, worker_mode):
+    """失败任务重新入队，超过最大尝试次数后任务与比赛均标记失败"""
+    match_id = _submit_match(client)
+    job_id = _job_for(match_id).id
+    worker = MatchWorker("worker-x", lease_seconds=30)
+
+    statuses = []
+    for _ in range(settings.job_max_attempts):
+        assert worker._claim(job_id) is not None
+        statuses.append(worker._fail(job_id, "boom"))
+    assert statuses == ["queued"] * (settings.job_max_attempts - 1) + ["failed"]
+    assert worker._claim(job_id) is None
+
+    data = client.get(f"/api/matches/{match_id}").json()
+    assert data["status"] == "failed"
+    assert data["error_message"] == "boom"
+
+
+def test_complete_writes_results_in_one_transaction(client: TestClient, worker_mode):
+    """完成比赛：参赛记录与策略统计各一条 executemany UPDATE，一次提交；策略统计按原值在数据库端累加"""
+    from sqlalchemy import event
+    from app.database import engine
+
+    match_id = _submit_match(client)
+    worker = MatchWorker("worker-tx", lease_seconds=30)
+    statements, commits = [], []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement.split()[0:2], executemany))
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    original = worker._complete
+
+    def complete(*args):
+        event.listen(engine, "before_cursor_execute", on_execute)
+        event.listen(engine, "commit", on_commit)
+        try:
+            return original(*args)
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+            event.remove(engine, "commit", on_commit)
+
+    worker._complete = complete
+    assert asyncio.run(worker.run_job(_job_for(match_id).id)) == "completed"
+
+    assert len(commits) == 1
+    updates = [(words[1], many) for words, many in statements if words[0] == "UPDATE"]
+    assert ("match_participants", True) in updates and ("strategies", True) in updates
+    assert len(updates) == 4  # matches、match_participants、strategies、match_jobs
+
+    first = client.get(f"/api/matches/{match_id}").json()
+    assert first["status"] == "completed" and first["end_time"] is not None
+    strategy_ids = [p["strategy_id"] for p in first["participants"]]
+    r = client.post("/api/matches/run", json={"strategy_ids": strategy_ids, "duration_steps": 40, "seed": 4})
+    second_id = r.json()["match_id"]
+    assert asyncio.run(worker.run_job(_job_for(second_id).id)) == "completed"
+    second = client.get(f"/api/matches/{second_id}").json()
+
+    for sid in strategy_ids:
+        results = [
+            next(p for p in m["participants"] if p["strategy_id"] == sid) for m in (first, second)
+        ]
+        stats = client.get(f"/api/strategies/{sid}").json()
+        wins = sum(p["rank"] == 1 for p in results)
+        assert stats["total_matches"] == 2 and stats["wins"] == wins
+        assert stats["win_rate"] == pytest.approx(wins / 2)
+        assert stats["avg_return"] == pytest.approx(sum(p["return_pct"] for p in results) / 2)
+
+
+def test_complete_keeps_lease_and_failures_go_through_fail(client: TestClient, worker_mode):
+    """写入结果期间心跳继续续约；写入失败时任务经 _fail 重新入队并计入失败次数"""
+    import time
+    from app.core.metrics import MATCH_RUNS
+
+    match_id = _submit_match(client)
+    job_id = _job_for(match_id).id
+    worker = MatchWorker("worker-slow", lease_seconds=30, heartbeat_seconds=0.02)
+    heartbeats, writing, calls = [], [], []
+    original_heartbeat, original_complete = worker._heartbeat, worker._complete
+
+    def heartbeat(job):
+        heartbeats.append(bool(writing))
+        return original_heartbeat(job)
+
+    def complete(*args):
+        writing.append(True)
+        calls.append(True)
+        try:
+            time.sleep(0.2)
+            if len(calls) == 1:
+                raise RuntimeError("写入失败")
+            return original_complete(*args)
+        finally:
+            writing.clear()
+
+    worker._heartbeat, worker._complete = heartbeat, complete
+    failed_before = MATCH_RUNS.value("failed")
+    # 第一次写入失败 → _fail 重新入队 → run_job 立即重试并完成
+    assert asyncio.run(worker.run_job(job_id)) == "completed"
+
+    assert any(heartbeats), "写入结果期间应继续心跳"
+    assert MATCH_RUNS.value("failed") == failed_before + 1
+    job = _job_for(match_id)
+    assert job.status == "completed" and job.attempts == 2 and job.last_error == "写入失败"
+    assert client.get(f"/api/matches/{match_id}").json()["status"] == "completed"
@@ -0,0 +1,136 @@
+"""行情数据：列式 KlineSeries 与生成器/CoinGecko 转换"""
+import numpy as np
+import pytest
+from app.core.kline_series import KlineSeries
+from app.core.market_data import MarketDataGenerator, CoinGeckoFetcher
+
+
+def test_generators_return_columnar_series():
+    """生成器直接返回 KlineSeries，时间戳为 int64 毫秒、价格为 float64"""
+    for klines in (
+        MarketDataGenerator.generate_random_walk(steps=50),
+        MarketDataGenerator.generate_trending(steps=50),
+        MarketDataGenerator.generate_ranging(steps=50),
+    ):
+        assert isinstance(klines, KlineSeries)
+        assert len(klines) == 50
+        assert klines.timestamp.dtype == np.int64
+        assert klines.close.dtype == np.float64
+        assert np.all(np.diff(klines.timestamp) == 5 * 60 * 1000)
+
+
+def test_convert_ohlc_and_rows_round_trip():
+    """CoinGecko 原始 OHLC 转为列式序列，API 边界再转回 dict 行"""
+    raw = [
+        [1_700_000_000_000, 1.0, 2.0, 0.5, 1.5],
+        [1_700_000_300_000, 1.5, 2.5, 1.0, 2.0],
+    ]
+    klines = CoinGeckoFetcher._convert_ohlc(raw)
+    assert klines.timestamp.tolist() == [1_700_000_000_000, 1_700_000_300_000]
+    assert klines.close.tolist() == [1.5, 2.0]
+
+    rows = klines.to_rows()
+    assert [r["high"] for r in rows] == [2.0, 2.5]
+    assert isinstance(rows[0]["timestamp"], str)
+
+    again = KlineSeries.from_rows(rows)
+    assert again.timestamp.tolist() == klines.timestamp.tolist()
+    assert again.close.tolist() == klines.close.tolist()
+
+
+def test_slice_and_concat_share_layout():
+    """切片共享底层数组，concat 按顺序拼接"""
+    klines = MarketDataGenerator.generate_random_walk(steps=20)
+    head, tail = klines[:5], klines[5:]
+    assert np.shares_memory(head.close, klines.close)
+    joined = KlineSeries.concat([head, tail])
+    assert joined.close.tolist() == klines.close.tolist()
+
+
+def test_seeded_generators_are_reproducible():
+    """相同种子生成完全一致的行情；也可直接传入 np.random.Generator"""
+    a = MarketDataGenerator.generate_random_walk(steps=500, seed=42, end_ms=0)
+    b = MarketDataGenerator.generate_random_walk(steps=500, seed=42, end_ms=0)
+    c = MarketDataGenerator.generate_random_walk(steps=500, seed=np.random.default_rng(42), end_ms=0)
+    for field in ("timestamp",) + KlineSeries.PRICE_FIELDS:
+        assert np.array_equal(getattr(a, field), getattr(b, field))
+        assert np.array_equal(getattr(a, field), getattr(c, field))
+    other = MarketDataGenerator.generate_random_walk(steps=500, seed=43, end_ms=0)
+    assert not np.array_equal(a.close, other.close)
+
+
+def test_random_walk_respects_price_floor():
+    """向量化路径与逐步 max(p * (1 + c), 100) 递推完全一致"""
+    klines = MarketDataGenerator.generate_random_walk(
+        initial_price=150.0, steps=2000, volatility=0.05, seed=7
+    )
+    changes = np.random.default_rng(7).normal(0.0, 0.05, size=1999)
+    prices = [150.0]
+    for c in changes:
+        prices.append(max(prices[-1] * (1 + c), 100))
+    assert np.array_equal(klines.close, np.round(prices, 2))
+    assert klines.close.min() >= 100
+
+
+def test_basket_aligns_on_common_timestamps():
+    """多资产篮子按公共时间戳对齐，视图同步推进并给出每步价格向量"""
+    from app.core.market_basket import BasketView, MarketBasket
+
+    btc = KlineSeries([1, 2, 3, 4], [1] * 4, [1] * 4, [1] * 4, [10.0, 11.0, 12.0, 13.0])
+    eth = KlineSeries([2, 3, 4, 5], [1] * 4, [1] * 4, [1] * 4, [20.0, 21.0, 22.0, 23.0])
+    basket = MarketBasket.align({"BTC": btc, "ETH": eth})
+    assert basket.assets == ("BTC", "ETH") and len(basket) == 3
+    assert basket.closes.tolist() == [[11.0, 20.0], [12.0, 21.0], [13.0, 22.0]]
+    with pytest.raises(ValueError):
+        MarketBasket({"BTC": btc, "ETH": eth})
+
+    view = BasketView(basket, stop=0).advance_to(2)
+    assert view.close.tolist() == [11.0, 12.0]  # 列式属性为主资产
+    assert view.asset("ETH").close.tolist() == [20.0, 21.0]
+    assert view.prices.tolist() == [12.0, 21.0]
+    assert view.rewind().advance_to(1).prices.tolist() == [11.0, 20.0]
+
+    # 视图是原地推进的游标；切片与列式数组的区间固定
+    kept, eth_kept, closes = view[:], view.asset("ETH")[:], view.close
+    view.advance_to(3)
+    assert len(view) == len(view.asset("ETH")) == 3
+    assert len(kept) == len(eth_kept) == 2 and closes.tolist() == [11.0, 12.0]
+
+
+def test_load_market_basket_concurrent_and_seeded(monkeypatch):
+    """模拟篮子的主资产与单资产行情一致；真实行情并发获取后截取同一段"""
+    import asyncio
+    from app.core.market_data import load_market_basket, load_market_data
+
+    basket = asyncio.run(load_market_basket("simulated", "random", ["bitcoin", "solana"], 200, seed=5))
+    single = asyncio.run(load_market_data("simulated", "random", "bitcoin", 200, seed=5))
+    assert basket.assets == ("BTC", "SOL") and len(basket) == 200
+    assert np.array_equal(basket.series["BTC"].close, single.close)
+    assert not np.array_equal(basket.series["SOL"].close, single.close)
+
+    # 相同 seed 与 end_ms 时时间戳也逐位相同
+    anchored = [
+        asyncio.run(load_market_data("simulated", "trending", "bitcoin", 50, seed=5, end_ms=1_700_000_000_000))
+        for _ in range(2)
+    ]
+    assert np.array_equal(anchored[0].timestamp, anchored[1].timestamp)
+    assert anchored[0].timestamp[-1] < 1_700_000_000_000
+    pinned = asyncio.run(load_market_basket("simulated", "random", ["bitcoin", "solana"], 50, seed=5, end_ms=0))
+    assert np.array_equal(pinned.series["SOL"].timestamp, anchored[0].timestamp - 1_700_000_000_000)
+
+    requested = []
+
+    async def fake_raw(coin_id, days):
+        requested.append(coin_id)
+        offset = 0 if coin_id == "bitcoin" else 2  # 两个币种的时间戳错开 2 根
+        return [
+            [1_700_000_000_000 + (i + offset) * 1_800_000, 1.0, 1.0, 1.0, float(i + offset)]
+            for i in range(300)
+        ]
+
+    monkeypatch.setattr(CoinGeckoFetcher, "_fetch_raw", fake_raw)
+    real = asyncio.run(load_market_basket("coingecko_historical", "random", ["bitcoin", "ethereum"], 100, seed=1))
+    assert sorted(requested) == ["bitcoin", "ethereum"]
+    assert real.assets == ("BTC", "ETH") and len(real) == 100
+    # 对齐后同一时间戳的两资产收盘价相同（构造数据中 close 即时间下标）
+    assert np.array_equal(real.series["BTC"].close, real.series["ETH"].close)
@@ -4,6 +4,9 @@ import pytest
 from app.models.match import MatchConfig, MatchStatus
 from app.models.strategy import Strategy, StrategyType, StrategyParams
 from app.core.match_engine import MatchEngine, STRATEGY_CLASSES
+from app.core.market_data import MarketDataGenerator
+from app.core.market_view import MarketView
+from app.models.portfolio import Portfolio
 
 
 def _make_dca_strategy(sid: str, lookback: int = 1, position_size: float = 0.1):
@@ -114,3 +117,519 @@ def test_strategy_registry():
     for key in ("mean_reversion", "momentum", "dca"):
         assert key in STRATEGY_CLASSES
     assert len(STRATEGY_CLASSES) >= 3
+
+
+def test_market_view_shares_buffer():
+    """MarketView 按下标推进，负下标与切片共享底层数组"""
+    from app.core.kline_series import KlineSeries
+    from app.core.market_view import MarketView
+
+    series = KlineSeries.from_rows([{"close": float(i)} for i in range(10)])
+    view = MarketView(series, stop=0)
+    assert len(view) == 0
+
+    view.advance_to(5)
+    assert len(view) == 5
+    assert view[-1]["close"] == 4.0
+    assert view.close.base is series.close or view.close.base is series.close.base
+
+    window = view[-3:-1]
+    assert isinstance(window, MarketView)
+    assert window.close.tolist() == [2.0, 3.0]
+    assert [k["close"] for k in view[::2]] == [0.0, 2.0, 4.0]
+
+    with pytest.raises(IndexError):
+        view[5]
+    with pytest.raises(ValueError):
+        view.advance_to(11)
+
+
+def test_execute_step_with_market_view():
+    """引擎可直接消费 MarketView，结果与传入前缀列表一致"""
+    from app.core.market_view import MarketView
+
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=30)
+    market = [{"close": 100.0 + (i % 7) * 3 - (i % 3) * 4} for i in range(30)]
+
+    def run(use_view: bool):
+        engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0)
+        strategy = _make_dca_strategy("s1", lookback=3)
+        strategy.type = StrategyType.MEAN_REVERSION
+        strategy.params.lookback_period = 5
+        match = engine.initialize_match([strategy, _make_dca_strategy("s2", lookback=3)])
+        view = MarketView(market, stop=0)
+        for step in range(len(market)):
+            data = view.advance_to(step + 1) if use_view else market[: step + 1]
+            engine.execute_step(match, data, step, market[step]["close"])
+        return {sid: engine.value_history[sid] for sid in ("s1", "s2")}
+
+    assert run(True) == run(False)
+
+
+def test_shared_indicators_are_deduplicated():
+    """相同类型与回看周期的策略共享同一指标实例，引擎统计报告去重比"""
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=40)
+    strategies = []
+    for i, (stype, lookback) in enumerate([
+        (StrategyType.MEAN_REVERSION, 20),
+        (StrategyType.MEAN_REVERSION, 20),
+        (StrategyType.MEAN_REVERSION, 20),
+        (StrategyType.MEAN_REVERSION, 10),
+        (StrategyType.MOMENTUM, 10),
+    ]):
+        s = _make_dca_strategy(f"s{i}", lookback=lookback)
+        s.type = stype
+        strategies.append(s)
+
+    engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0)
+    match = engine.initialize_match(strategies)
+    instances = engine.strategies_instances
+    assert instances["s0"].indicators["sma"] is instances["s2"].indicators["sma"]
+    assert instances["s0"].indicators["sma"] is not instances["s3"].indicators["sma"]
+
+    market = MarketDataGenerator.generate_random_walk(steps=40, seed=3)
+    view = MarketView(market, stop=0)
+    for step in range(40):
+        engine.execute_step(match, view.advance_to(step + 1), step, float(market.close[step]))
+
+    stats = engine.stats
+    assert stats["indicator_subscriptions"] == 5
+    assert stats["indicator_unique"] == 3
+    assert stats["indicator_dedup_ratio"] == pytest.approx(5 / 3, abs=1e-4)
+
+
+def test_run_vectorized_matches_step_loop():
+    """向量化回测与逐步执行的结果、净值曲线、持仓与交易计数完全一致"""
+    steps = 300
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=steps)
+    specs = [
+        (StrategyType.MEAN_REVERSION, dict(lookback_period=20, stop_loss=0.05, take_profit=1.1)),
+        (StrategyType.MEAN_REVERSION, dict(lookback_period=5, position_size=0.5, max_position_pct=0.3)),
+        (StrategyType.MOMENTUM, dict(lookback_period=3, buy_threshold=1.001, take_profit=1.02)),
+        (StrategyType.DCA, dict(lookback_period=10, position_size=0.01)),
+    ]
+
+    def make_strategies():
+        strategies = []
+        for i, (stype, params) in enumerate(specs):
+            s = _make_dca_strategy(f"s{i}")
+            s.type = stype
+            s.params = s.params.model_copy(update=params)
+            strategies.append(s)
+        return strategies
+
+    market = MarketDataGenerator.generate_random_walk(steps=steps, seed=11)
+
+    step_engine = MatchEngine(config, fee_rate=0.001, slippage_rate=0.0005)
+    match = step_engine.initialize_match(make_strategies())
+    view = MarketView(market, stop=0)
+    closes = market.close.tolist()
+    for step in range(steps):
+        step_engine.execute_step(match, view.advance_to(step + 1), step, closes[step])
+    step_results = step_engine.finalize_match(match)
+
+    vec_engine = MatchEngine(config, fee_rate=0.001, slippage_rate=0.0005)
+    vec_results = vec_engine.run_vectorized(vec_engine.initialize_match(make_strategies()), market)
+
+    assert [r.model_dump() for r in vec_results] == [r.model_dump() for r in step_results]
+    assert vec_engine.value_history == step_engine.value_history
+    assert vec_engine.portfolios == step_engine.portfolios
+    assert vec_engine.trade_count == step_engine.trade_count
+    assert vec_engine.win_trade_count == step_engine.win_trade_count
+    assert sum(vec_engine.trade_count.values()) > 0
+
+
+def test_population_step_loop_matches_vectorized():
+    """大规模种群：批量执行路径（每步指令多于逐条执行阈值）与向量化回测逐位一致"""
+    from app.core.portfolio_book import SCALAR_ORDER_LIMIT
+
+    steps = 120
+    count = 3 * SCALAR_ORDER_LIMIT
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=steps)
+    kinds = [StrategyType.DCA, StrategyType.MEAN_REVERSION, StrategyType.MOMENTUM]
+
+    def make_strategies():
+        strategies = []
+        for i in range(count):
+            s = _make_dca_strategy(f"s{i}", lookback=1 + i % 3, position_size=0.02 + 0.01 * (i % 5))
+            s.type = kinds[i % 3]
+            s.params = s.params.model_copy(update=dict(
+                stop_loss=0.02 if i % 4 == 0 else None,
+                take_profit=1.03 if i % 4 == 1 else None,
+                max_position_pct=0.2 + 0.1 * (i % 4),
+            ))
+            strategies.append(s)
+        return strategies
+
+    market = MarketDataGenerator.generate_random_walk(steps=steps, seed=21)
+    step_engine = MatchEngine(config, fee_rate=0.001, slippage_rate=0.0005, record_log=False)
+    match = step_engine.initialize_match(make_strategies())
+    view = MarketView(market, stop=0)
+    closes = market.close.tolist()
+    for step in range(steps):
+        step_engine.execute_step(match, view.advance_to(step + 1), step, closes[step])
+    step_results = step_engine.finalize_match(match)
+
+    vec_engine = MatchEngine(config, fee_rate=0.001, slippage_rate=0.0005)
+    vec_results = vec_engine.run_vectorized(vec_engine.initialize_match(make_strategies()), market)
+
+    assert [r.model_dump() for r in vec_results] == [r.model_dump() for r in step_results]
+    assert vec_engine.value_history == step_engine.value_history
+    assert vec_engine.portfolios == step_engine.portfolios
+    assert vec_engine.cost_basis == step_engine.cost_basis
+    assert vec_engine.win_trade_count == step_engine.win_trade_count
+    assert sum(step_engine.win_trade_count.values()) > 0
+    assert step_engine.book.history.shape == (steps + 1, count)
+
+
+def test_execution_log_is_columnar_and_optional():
+    """执行日志按策略列式存储，按需构造 dict 行；record_log=False 时不记录"""
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=20)
+    market = MarketDataGenerator.generate_random_walk(steps=20, seed=4)
+
+    def run(record_log: bool) -> MatchEngine:
+        engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0, record_log=record_log)
+        match = engine.initialize_match([_make_dca_strategy("s1", lookback=3), _make_dca_strategy("s2")])
+        view = MarketView(market, stop=0)
+        for step in range(20):
+            engine.execute_step(match, view.advance_to(step + 1), step, float(market.close[step]))
+        engine.finalize_match(match)
+        return engine
+
+    engine = run(True)
+    log = engine.execution_logs["s1"]
+    assert len(log) == 20
+    assert log.arrays()["total_value"].tolist() == engine.value_history["s1"][1:]
+    # 每 3 步买入一次，第 18 步因持仓达到 max_position_pct 上限而跳过
+    assert log.trade_count == engine.trade_count["s1"] == 6
+
+    row = log.row(0)
+    assert row["step"] == 0 and row["strategy_id"] == "s1"
+    assert row["action"] == {"type": "buy", "asset": "ETH", "amount": 1000.0}
+    assert set(row["portfolio"]) == {"cash", "positions", "total_value"}
+
+    rows = engine.log_rows()
+    assert len(rows) == 40
+    assert [(r["step"], r["strategy_id"]) for r in rows[:4]] == [(0, "s1"), (0, "s2"), (1, "s1"), (1, "s2")]
+
+    quiet = run(False)
+    assert quiet.execution_logs == {} and quiet.log_rows() == []
+    assert quiet.value_history == engine.value_history
+    assert quiet.trade_count == engine.trade_count
+
+
+def test_sampled_log_keeps_every_trade():
+    """log_every > 1 时只抽样持有的步，成交与止损/止盈的步总是记录，交易次数与引擎一致"""
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=60)
+    market = MarketDataGenerator.generate_random_walk(steps=60, seed=4)
+    engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0, log_every=25)
+    match = engine.initialize_match([_make_dca_strategy("s1", lookback=7), _make_dca_strategy("s2", lookback=11)])
+    view = MarketView(market, stop=0)
+    for step in range(60):
+        engine.execute_step(match, view.advance_to(step + 1), step, float(market.close[step]))
+
+    for strategy_id, log in engine.execution_logs.items():
+        assert log.trade_count == engine.trade_count[strategy_id] > 0
+    steps = engine.execution_logs["s1"].arrays()["step"].tolist()
+    assert {0, 25, 50, 59} <= set(steps) and len(steps) < 60
+
+
+def test_engine_profile_reports_stage_timings():
+    """profile=True 时按阶段/策略累计耗时与调用次数；默认不计时、结果不变"""
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=30)
+    market = MarketDataGenerator.generate_random_walk(steps=30, seed=8)
+
+    def run(profile: bool) -> MatchEngine:
+        engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0, profile=profile)
+        match = engine.initialize_match([_make_dca_strategy("s1", lookback=3), _make_dca_strategy("s2")])
+        view = MarketView(market, stop=0)
+        for step in range(30):
+            engine.execute_step(match, view.advance_to(step + 1), step, float(market.close[step]))
+        engine.finalize_match(match)
+        return engine
+
+    plain = run(False)
+    assert plain.profiler is None and plain.profile_report() is None
+
+    engine = run(True)
+    assert engine.value_history == plain.value_history
+    report = engine.profile_report()
+    assert report["steps"] == 30 and report["steps_per_second"] > 0
+    stages = report["stages"]
+    assert list(stages)[:2] == ["indicators", "risk_controls"]
+    assert stages["indicators"]["calls"] == 30
+    # 风控/执行/估值/日志对全部策略批量计算，每步一次；decide 每步每策略一次
+    for stage in ("risk_controls", "execute", "update_value", "log"):
+        assert stages[stage]["calls"] == 30
+    assert stages["decide"]["calls"] == 60
+    assert stages["finalize"]["calls"] == 1
+    assert sum(s["share_pct"] for s in stages.values()) == pytest.approx(100, abs=0.1)
+    assert set(report["strategies"]) == {"s1", "s2"}
+    assert report["strategies"]["s1"]["decide"]["calls"] == 30
+
+
+def test_engine_profile_charges_failing_decide_to_its_strategy():
+    """decide 抛出异常时，耗时与调用次数仍计入该策略，不转嫁给下一个策略"""
+    import time
+    from app.strategies.templates import DCAStrategy
+
+    class FailingDCA(DCAStrategy):
+        def decide(self, market_data, step):
+            time.sleep(0.002)
+            raise RuntimeError("boom")
+
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=20)
+    market = MarketDataGenerator.generate_random_walk(steps=20, seed=8)
+    engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0, profile=True)
+    STRATEGY_CLASSES["failing_test"] = FailingDCA
+    try:
+        failing = _make_dca_strategy("bad")
+        failing.type = "failing_test"
+        match = engine.initialize_match([failing, _make_dca_strategy("ok")])
+    finally:
+        del STRATEGY_CLASSES["failing_test"]
+    view = MarketView(market, stop=0)
+    for step in range(20):
+        engine.execute_step(match, view.advance_to(step + 1), step, float(market.close[step]))
+
+    strategies = engine.profile_report()["strategies"]
+    assert strategies["bad"]["decide"]["calls"] == 20
+    assert strategies["ok"]["decide"]["calls"] == 20
+    assert strategies["bad"]["decide"]["seconds"] >= 0.04
+    assert strategies["ok"]["decide"]["seconds"] < 0.02
+
+
+def test_strategy_config_and_lightweight_actions():
+    """参数构造时编译为 StrategyConfig（模板默认值生效）；decide 返回轻量指令，引擎也接受 pydantic Action"""
+    from app.models.match import Action
+    from app.strategies.actions import HOLD, TradeAction, buy
+    from app.strategies.templates import DCAStrategy, MomentumStrategy
+
+    momentum = MomentumStrategy("m", {"lookback_period": 5})
+    assert momentum.config.lookback_period == 5
+    assert momentum.config.buy_threshold == 1.02 and momentum.config.position_size == 0.3
+    assert momentum.config.max_position_pct == 0.5 and momentum.config.stop_loss is None
+    assert not hasattr(momentum.config, "__dict__")
+
+    dca = DCAStrategy("d", {"lookback_period": 2, "position_size": 0.1})
+    dca.set_portfolio(Portfolio(strategy_id="d"))
+    assert dca.decide([{"close": 100.0}], 1) is HOLD
+    action = dca.decide([{"close": 100.0}], 0)
+    assert isinstance(action, TradeAction) and action == buy(1000.0)
+    assert action.type == "buy" and action.to_model() == Action(type="buy", asset="ETH", amount=1000.0)
+
+    # 自定义策略返回 pydantic Action 时按 type 解析
+    class PydanticDCA(DCAStrategy):
+        def decide(self, market_data, step):
+            result = super().decide(market_data, step)
+            return result.to_model()
+
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=10)
+    market = [{"close": 100.0 + i} for i in range(10)]
+
+    def run(cls):
+        engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0)
+        STRATEGY_CLASSES["dca_test"] = cls
+        try:
+            strategy = _make_dca_strategy("s1", lookback=2)
+            strategy.type = "dca_test"
+            match = engine.initialize_match([strategy])
+        finally:
+            del STRATEGY_CLASSES["dca_test"]
+        for step in range(10):
+            engine.execute_step(match, market[: step + 1], step, market[step]["close"])
+        return engine
+
+    assert run(PydanticDCA).value_history == run(DCAStrategy).value_history
+    assert run(PydanticDCA).trade_count["s1"] > 0
+
+
+def test_hold_steps_do_not_allocate():
+    """持有步：引擎复用指令与估值缓冲区，每步的临时内存分配与策略数无关"""
+    import statistics
+    import tracemalloc
+
+    steps = 200
+    strategies = []
+    for i in range(200):
+        s = _make_dca_strategy(f"s{i}", lookback=5 + i % 7)
+        # 阈值设置为不会触发交易
+        s.type = StrategyType.MOMENTUM if i % 2 else StrategyType.MEAN_REVERSION
+        s.params = s.params.model_copy(update=dict(buy_threshold=10.0 if i % 2 else 0.01, sell_threshold=10.0))
+        strategies.append(s)
+    engine = MatchEngine(MatchConfig(duration_steps=steps), record_log=False)
+    match = engine.initialize_match(strategies)
+    market = MarketDataGenerator.generate_random_walk(steps=steps, seed=2)
+    view = MarketView(market, stop=0)
+    closes = market.close.tolist()
+    for step in range(50):
+        engine.execute_step(match, view.advance_to(step + 1), step, closes[step])
+
+    tracemalloc.start()
+    try:
+        transient = []
+        for step in range(50, steps):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            engine.execute_step(match, view.advance_to(step + 1), step, closes[step])
+            transient.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    assert sum(engine.trade_count.values()) == 0
+    # 取中位数：共享指标的前缀和缓冲区偶尔按倍数扩容（与策略数无关）；
+    # 每步按策略数分配的列表（200 个元素约 1.6KB/个）会远超该上限
+    assert statistics.median(transient) < 1024
+
+
+def test_multi_asset_basket_valuation_and_risk(monkeypatch):
+    """多资产比赛：策略可交易篮子中的任意资产，估值为持仓与价格向量的点积，止损按资产逐列触发"""
+    import numpy as np
+    from app.core.kline_series import KlineSeries
+    from app.core.market_basket import BasketView, MarketBasket
+    from app.strategies.actions import HOLD, buy
+    from app.strategies.templates import DCAStrategy
+
+    class BasketDCA(DCAStrategy):
+        """第 0 步买主资产，第 1 步按 ETH 视图的价格买 ETH"""
+
+        def decide(self, market_data, step):
+            if step == 0:
+                return buy(1000.0, self.asset)
+            if step == 1 and market_data.asset("ETH").close[-1] > 0:
+                return buy(1000.0, "ETH")
+            return HOLD
+
+    monkeypatch.setitem(STRATEGY_CLASSES, "dca", BasketDCA)
+    steps = 4
+    ts = np.arange(steps)
+    btc = [100.0, 100.0, 100.0, 100.0]
+    eth = [10.0, 10.0, 8.0, 8.0]  # 第 2 步 ETH 跌 20%，触发 10% 止损
+    basket = MarketBasket({
+        "BTC": KlineSeries(ts, btc, btc, btc, btc),
+        "ETH": KlineSeries(ts, eth, eth, eth, eth),
+    })
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=steps, assets=list(basket.assets))
+    engine = MatchEngine(config, fee_rate=0.0, slippage_rate=0.0)
+    strategy = _make_dca_strategy("s1")
+    strategy.params.stop_loss = 0.1
+    match = engine.initialize_match([strategy, _make_dca_strategy("s2")])
+
+    view = BasketView(basket, stop=0)
+    for step in range(2):
+        engine.execute_step(match, view.advance_to(step + 1), step)
+    book = engine.book
+    assert engine.portfolios["s1"].positions == {"BTC": 10.0, "ETH": 100.0}
+    assert book.total_value.tolist() == (book.cash + book.positions @ basket.closes[1]).tolist()
+
+    engine.execute_step(match, view.advance_to(3), 2)
+    # s1 的 ETH 止损平仓，BTC 不受影响；s2 未设止损
+    assert engine.portfolios["s1"].positions == {"BTC": 10.0}
+    assert engine.portfolios["s2"].positions == {"BTC": 10.0, "ETH": 100.0}
+    assert engine.trade_count == {"s1": 3, "s2": 2}
+    row = engine.execution_logs["s1"].row(2)
+    assert row["action"] == {"type": "sell", "asset": "ETH", "amount": 100.0}
+    assert row["price"] == 8.0 and row["portfolio"]["positions"] == {"BTC": 10.0, "ETH": 0.0}
+
+    with pytest.raises(ValueError):
+        engine.execute_step(match, MarketView(basket.primary), 3, 100.0)
+
+
+def test_online_metrics_match_batch_recomputation():
+    """在线统计（跨多个折叠块）与按完整净值曲线的批量计算一致，且比赛中途即可读取"""
+    import numpy as np
+    from app.core.value_metrics import METRIC_BLOCK
+
+    steps = 2 * METRIC_BLOCK + 90
+    config = MatchConfig(initial_capital=10_000.0, duration_steps=steps)
+    specs = [
+        (StrategyType.MEAN_REVERSION, dict(lookback_period=10, stop_loss=0.05)),
+        (StrategyType.MOMENTUM, dict(lookback_period=3, buy_threshold=1.001, take_profit=1.02)),
+        (StrategyType.DCA, dict(lookback_period=7, position_size=0.01)),
+    ]
+    strategies = []
+    for i, (stype, params) in enumerate(specs):
+        s = _make_dca_strategy(f"s{i}")
+        s.type = stype
+        s.params = s.params.model_copy(update=params)
+        strategies.append(s)
+
+    market = MarketDataGenerator.generate_random_walk(steps=steps, seed=5)
+    engine = MatchEngine(config, fee_rate=0.001, slippage_rate=0.0005)
+    match = engine.initialize_match(strategies)
+    view = MarketView(market, stop=0)
+    closes = market.close.tolist()
+    for step in range(steps):
+        engine.execute_step(match, view.advance_to(step + 1), step, closes[step])
+        if step == METRIC_BLOCK // 2:
+            midway = engine.current_metrics()
+            assert set(midway) == {"s0", "s1", "s2"}
+            assert {"max_drawdown", "sharpe_ratio", "exposure_pct", "turnover", "total_trades"} <= set(midway["s2"])
+    results = {r.strategy_id: r for r in engine.finalize_match(match)}
+
+    for sid, values in engine.value_history.items():
+        values = np.asarray(values)
+        peak = np.maximum.accumulate(values)
+        drawdown = ((peak - values) / peak).max() * 100
+        returns = np.diff(values) / values[:-1]
+        sharpe = returns.mean() / returns.std() * np.sqrt(105120) if returns.std() > 0 else 0.0
+        downside = np.sqrt((np.minimum(returns, 0.0) ** 2).mean())
+        sortino = returns.mean() / downside * np.sqrt(105120) if downside > 0 else 0.0
+        below = values < peak
+        longest = run = 0
+        for flag in below.tolist():
+            run = run + 1 if flag else 0
+            longest = max(longest, run)
+        result = results[sid]
+        assert result.max_drawdown == pytest.approx(round(drawdown, 2), abs=0.011)
+        assert result.sharpe_ratio == pytest.approx(round(sharpe, 2), abs=0.011)
+        assert result.sortino_ratio == pytest.approx(sortino, abs=1e-3)
+        assert result.volatility == pytest.approx(returns.std() * np.sqrt(105120) * 100, abs=0.01)
+        assert result.max_drawdown_duration == longest
+        if result.max_drawdown > 0:
+            assert result.calmar_ratio == pytest.approx(returns.mean() * 105120 / (drawdown / 100), rel=1e-3)
+    # 回撤持续时间跨越折叠块的边界
+    assert max(r.max_drawdown_duration for r in results.values()) > METRIC_BLOCK
+    # DCA 首次买入后一直持仓；成交额至少包含全部买入金额
+    assert results["s2"].exposure_pct > 90
+    assert results["s2"].turnover >= 100 * results["s2"].total_trades * 0.99
+
+
+def test_trade_pnl_metrics_use_closed_trades():
+    """盈亏比与平均每笔盈亏按已成交卖出的已实现盈亏计算，逐条与整批执行路径一致"""
+    import numpy as np
+    from app.core.execution_log import ACTION_BUY, ACTION_SELL
+    from app.core.portfolio_book import SCALAR_ORDER_LIMIT, PortfolioBook
+
+    per_strategy = []
+    for n in (2, SCALAR_ORDER_LIMIT + 4):
+        book = PortfolioBook([f"s{i}" for i in range(n)], 10000.0)
+        rows, cols, cap = list(range(n)), [0] * n, np.ones(n)
+        # 100 买入 10 个，110 卖出 5 个（+50），96 卖出剩余 5 个（-20）；手续费为 0
+        orders = ((ACTION_BUY, 1000.0, 100.0), (ACTION_SELL, 5.0, 110.0), (ACTION_SELL, 5.0, 96.0))
+        for kind, amount, price in orders:
+            book.execute(rows, [kind] * n, [amount] * n, cols, np.array([price]), cap, 0.0, 0.0)
+            book.revalue(np.array([price]))
+        metrics = book.result_metrics(105120)
+        per_strategy += list(zip(metrics["profit_factor"].tolist(), metrics["avg_trade_pnl"].tolist()))
+        assert book.trades.tolist() == [3] * n and book.sells.tolist() == [2] * n
+    assert per_strategy == [(2.5, 15.0)] * len(per_strategy)
+
+
+def test_annualization_follows_timeframe():
+    """年化系数由 MatchConfig.timeframe 换算"""
+    from app.core.value_metrics import steps_per_year
+
+    assert steps_per_year("5m") == 105120
+    assert steps_per_year("1h") == 8760
+    assert steps_per_year("1d") == 365
+    with pytest.raises(ValueError):
+        steps_per_year("5x")
+
+    market = MarketDataGenerator.generate_random_walk(steps=50, seed=3)
+    ratios = {}
+    for timeframe in ("5m", "1d"):
+        engine = MatchEngine(MatchConfig(duration_steps=50, timeframe=timeframe), record_log=False)
+        results = engine.run_vectorized(engine.initialize_match([_make_dca_strategy("s0")]), market)
+        ratios[timeframe] = results[0]
+    assert ratios["5m"].volatility == pytest.approx(ratios["1d"].volatility * (105120 / 365) ** 0.5, rel=1e-3)
+    assert ratios["5m"].max_drawdown == ratios["1d"].max_drawdown
@@ -0,0 +1,53 @@
+"""Prometheus 指标测试（指标类型与文本格式、/metrics 接口）"""
+from fastapi.testclient import TestClient
+
+from app.core.metrics import Registry
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("demo_requests_total", "请求数", ("route",))
+    latency = registry.histogram("demo_latency_seconds", "耗时", buckets=(0.1, 1.0))
+    registry.callback_gauge("demo_depth", "深度", ("state",), lambda: {("queued",): 3})
+
+    requests.inc("/a")
+    requests.inc("/a", amount=2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE demo_requests_total counter" in lines
+    assert 'demo_requests_total{route="/a"} 3' in lines
+    # 累积分桶：le 为上界（含），+Inf 等于总数
+    assert 'demo_latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'demo_latency_seconds_bucket{le="1"} 3' in lines
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "demo_latency_seconds_sum 3.65" in lines
+    assert "demo_latency_seconds_count 4" in lines
+    assert 'demo_depth{state="queued"} 3' in lines
+
+
+def test_metrics_endpoint(client: TestClient):
+    ids = []
+    for stype in ("momentum", "dca"):
+        r = client.post("/api/strategies/", json={"name": stype, "type": stype, "params": {}})
+        ids.append(r.json()["id"])
+    match_id = client.post(
+        "/api/matches/run", json={"strategy_ids": ids, "duration_steps": 30, "seed": 1}
+    ).json()["match_id"]
+    client.get(f"/api/matches/{match_id}")
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    # 路由标签使用模板路径，不含具体 ID
+    assert 'http_requests_total{method="GET",route="/api/matches/{match_id}",status="200"}' in text
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/api/matches/run",le="+Inf"}' in text
+    assert "http_requests_in_flight 1" in text
+    assert 'matches{status="completed"} 1' in text
+    assert 'match_jobs{status="completed"} 1' in text
+    assert 'match_runs_total{result="completed"}' in text
+    assert "match_steps_per_second_count" in text
+    assert 'match_executor_tasks{state="running"} 0' in text
+    assert "coingecko_cache_hit_ratio" in text
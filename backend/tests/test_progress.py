@@ -0,0 +1,118 @@
+"""比赛实时进度测试（计算端节流发送、广播中心扇出、进度快照与 SSE 接口）"""
+import asyncio
+import json
+import queue
+from datetime import datetime
+
+from app.config import settings
+from app.core.market_data import MarketDataGenerator
+from app.core.match_runner import PROGRESS_END, progress_rankings, simulate_match
+from app.core.progress_hub import ProgressHub
+from app.models.match import MatchConfig
+from app.models.strategy import Strategy, StrategyParams, StrategyType
+
+
+def _create_strategies(client):
+    ids = []
+    for stype in ("momentum", "dca"):
+        r = client.post(
+            "/api/strategies/",
+            json={"name": stype, "type": stype, "params": {"lookback_period": 5}},
+        )
+        ids.append(r.json()["id"])
+    return ids
+
+
+def test_simulate_match_reports_throttled_progress(monkeypatch):
+    monkeypatch.setattr(settings, "progress_every_steps", 25)
+    monkeypatch.setattr(settings, "progress_interval_ms", 60_000)
+    strategies = [
+        Strategy(id=stype.value, name=stype.value, type=stype, params=StrategyParams(lookback_period=5),
+                 created_at=datetime.now())
+        for stype in (StrategyType.MOMENTUM, StrategyType.DCA)
+    ]
+    market = MarketDataGenerator.generate_random_walk(steps=100, seed=7)
+    channel = queue.Queue()
+
+    simulate_match(MatchConfig(duration_steps=100), strategies, market, progress=channel)
+
+    items = []
+    while not channel.empty():
+        items.append(channel.get_nowait())
+    assert items[-1] is PROGRESS_END
+    snapshots = items[:-1]
+    # 每 25 步一次；最后一步恰好已发送，结束时不重复发送
+    assert [s["step"] for s in snapshots] == [25, 50, 75, 100]
+    assert set(snapshots[-1]["values"]) == {"momentum", "dca"}
+    # 快照附带截至当前步的在线指标，实时排名直接读取
+    metrics = snapshots[1]["metrics"]
+    assert set(metrics) == {"momentum", "dca"}
+    rankings = progress_rankings(snapshots[1]["values"], 10_000.0, metrics)
+    dca = next(p for p in rankings if p["strategy_id"] == "dca")
+    assert dca["total_trades"] == metrics["dca"]["total_trades"] > 0
+    assert dca["exposure_pct"] > 0 and dca["turnover"] > 0
+    assert dca["max_drawdown"] >= 0
+
+
+def test_progress_hub_fans_out_single_poller():
+    fetches = []
+    states = iter([
+        {"status": "running", "step": 10},
+        {"status": "running", "step": 10},
+        {"status": "running", "step": 20},
+        {"status": "completed", "step": 30},
+    ])
+
+    def fetch(match_id):
+        fetches.append(match_id)
+        return next(states)
+
+    hub = ProgressHub(fetch, poll_seconds=0.01)
+
+    async def consume():
+        return [s["step"] async for s in hub.subscribe("m1")]
+
+    async def main():
+        return await asyncio.gather(consume(), consume())
+
+    first, second = asyncio.run(main())
+    # 两个订阅者共享一个轮询者：4 个周期只查询 4 次，未变化的快照不重复推送
+    assert len(fetches) == 4
+    assert first == second == [10, 20, 30]
+    assert hub.stats()["matches"] == 0
+
+
+def test_match_progress_snapshot_after_run(client):
+    ids = _create_strategies(client)
+    r = client.post("/api/matches/run", json={"strategy_ids": ids, "duration_steps": 60, "seed": 5})
+    match_id = r.json()["match_id"]
+
+    r = client.get(f"/api/matches/{match_id}/progress")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "completed"
+    assert body["step"] == body["total_steps"] == 60
+    assert body["progress_pct"] == 100.0
+    assert [p["rank"] for p in body["rankings"]] == [1, 2]
+    assert {p["strategy_id"] for p in body["rankings"]} == set(ids)
+
+    assert client.get("/api/matches/missing/progress").status_code == 404
+
+
+def test_match_progress_stream_sends_final_event(client):
+    ids = _create_strategies(client)
+    r = client.post("/api/matches/run", json={"strategy_ids": ids, "duration_steps": 30, "seed": 5})
+    match_id = r.json()["match_id"]
+
+    with client.stream("GET", f"/api/matches/{match_id}/progress/stream") as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/event-stream")
+        body = "".join(r.iter_text())
+
+    events = [block for block in body.split("\n\n") if block]
+    assert len(events) == 1
+    event, data = events[0].split("\n")
+    assert event == "event: progress"
+    snapshot = json.loads(data[len("data: "):])
+    assert snapshot["status"] == "completed"
+    assert snapshot["step"] == 30
@@ -0,0 +1,33 @@
+"""价值序列编码与 LTTB 降采样测试"""
+import numpy as np
+import pytest
+
+from app.core.series_codec import decode_values, encode_values, lttb
+
+
+def test_encode_roundtrip_is_lossless_and_compact():
+    rng = np.random.default_rng(0)
+    values = 10_000 * np.cumprod(1 + rng.normal(0, 0.002, 5000))
+    values[:200] = 10_000.0  # 开局未交易时价值不变
+    blob = encode_values(values)
+    assert np.array_equal(decode_values(blob), values)
+    assert len(blob) < values.nbytes
+    assert decode_values(encode_values([])).size == 0
+    assert decode_values(encode_values([1.5])).tolist() == [1.5]
+    with pytest.raises(ValueError):
+        decode_values(b"\x09" + blob[1:])
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.linspace(0, 20, 10_001)
+    values = 10_000 + 500 * np.sin(x)
+    values[7_777] = 20_000  # 尖峰必须保留
+    steps, sampled = lttb(values, 500)
+    assert len(steps) == len(sampled) == 500
+    assert steps[0] == 0 and steps[-1] == 10_000
+    assert np.all(np.diff(steps) > 0)
+    assert 7_777 in steps.tolist()
+    assert np.array_equal(sampled, values[steps])
+
+    steps, sampled = lttb(values[:100], 500)
+    assert steps.tolist() == list(range(100))
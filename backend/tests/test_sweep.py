@@ -0,0 +1,122 @@
+"""参数扫描单元与 API 测试"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.executor import MatchExecutor
+from app.core.market_data import MarketDataGenerator
+from app.core.match_engine import MatchEngine
+from app.core.sweep import expand_grid, grid_size, run_sweep, run_sweep_async
+from app.models.match import MatchConfig
+from app.models.strategy import Strategy, StrategyParams, StrategyType
+from app.models.sweep import ParamGrid
+
+
+def test_expand_grid_cartesian_product():
+    """网格展开为笛卡尔积，未给出的字段取默认值，None 表示不设止损"""
+    grid = ParamGrid(lookback_period=[10, 20, 30], stop_loss=[None, 0.05])
+    combos = expand_grid(grid)
+    assert grid_size(grid) == len(combos) == 6
+    assert combos[0] == StrategyParams(lookback_period=10, stop_loss=None)
+    assert combos[-1] == StrategyParams(lookback_period=30, stop_loss=0.05)
+    assert all(c.buy_threshold == 0.97 for c in combos)
+
+    with pytest.raises(ValueError):
+        expand_grid(ParamGrid(position_size=[0.1, 2.0]))
+
+
+def test_sweep_matches_single_strategy_match():
+    """每个组合的结果与单独跑一场比赛一致，排名按收益率降序"""
+    market = MarketDataGenerator.generate_random_walk(steps=500, seed=5)
+    params_list = expand_grid(ParamGrid(lookback_period=[5, 20], take_profit=[None, 1.05]))
+    rows = run_sweep(
+        StrategyType.MEAN_REVERSION, params_list, market,
+        fee_rate=0.001, slippage_rate=0.0, workers=1,
+    )
+
+    assert [r.rank for r in rows] == [1, 2, 3, 4]
+    returns = [r.return_pct for r in rows]
+    assert returns == sorted(returns, reverse=True)
+
+    for row in rows:
+        engine = MatchEngine(MatchConfig(duration_steps=len(market)), fee_rate=0.001, slippage_rate=0.0)
+        strategy = Strategy(
+            id="single", name="single", type=StrategyType.MEAN_REVERSION,
+            params=row.params, created_at=datetime(2020, 1, 1),
+        )
+        [result] = engine.run_vectorized(engine.initialize_match([strategy]), market)
+        assert (result.return_pct, result.max_drawdown, result.sharpe_ratio, result.total_trades) == (
+            row.return_pct, row.max_drawdown, row.sharpe_ratio, row.total_trades
+        )
+
+
+def test_sweep_process_pool_matches_in_process():
+    """进程池分块执行与单进程执行结果完全一致"""
+    market = MarketDataGenerator.generate_trending(steps=300, seed=9)
+    params_list = expand_grid(ParamGrid(lookback_period=[3, 5, 10], buy_threshold=[1.001, 1.01]))
+    kwargs = dict(initial_capital=5000.0, sort_by="max_drawdown", chunk_size=2)
+    local = run_sweep(StrategyType.MOMENTUM, params_list, market, workers=1, **kwargs)
+    pooled = run_sweep(StrategyType.MOMENTUM, params_list, market, workers=2, **kwargs)
+    assert [r.model_dump() for r in pooled] == [r.model_dump() for r in local]
+    drawdowns = [r.max_drawdown for r in local]
+    assert drawdowns == sorted(drawdowns)
+
+
+def test_sweep_async_uses_shared_bounded_executor():
+    """异步扫描的各块提交到给定的比赛执行器，并发不超过其上限，结果与单进程一致"""
+    market = MarketDataGenerator.generate_ranging(steps=200, seed=4)
+    params_list = expand_grid(ParamGrid(lookback_period=[3, 5, 10, 20], position_size=[0.05, 0.1]))
+    kwargs = dict(sort_by="sharpe_ratio", chunk_size=3)
+    executor = MatchExecutor(workers=0, max_concurrent=2)
+    peak = []
+
+    async def sweep():
+        task = asyncio.ensure_future(
+            run_sweep_async(StrategyType.DCA, params_list, market, executor=executor, **kwargs)
+        )
+        while not task.done():
+            peak.append(executor.running)
+            await asyncio.sleep(0)
+        return task.result()
+
+    try:
+        rows = asyncio.run(sweep())
+    finally:
+        executor.shutdown()
+    local = run_sweep(StrategyType.DCA, params_list, market, workers=1, **kwargs)
+    assert [r.model_dump() for r in rows] == [r.model_dump() for r in local]
+    assert executor.completed == 3
+    assert max(peak) <= 2
+
+
+def test_sweep_api_returns_ranked_table(client: TestClient):
+    """POST /api/sweeps/ 返回排名表，不创建策略记录"""
+    r = client.post(
+        "/api/sweeps/",
+        json={
+            "strategy_type": "dca",
+            "grid": {"lookback_period": [5, 10, 20], "position_size": [0.05, 0.1]},
+            "duration_steps": 200,
+            "seed": 7,
+            "sort_by": "sharpe_ratio",
+            "top": 4,
+        },
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["combinations"] == 6
+    assert data["market"]["market_seed"] == 7
+    assert len(data["results"]) == 4
+    assert [row["rank"] for row in data["results"]] == [1, 2, 3, 4]
+    assert {"params", "return_pct", "max_drawdown", "sharpe_ratio", "total_trades"} <= set(data["results"][0])
+
+    assert client.get("/api/strategies/").json() == []
+
+    too_many = client.post(
+        "/api/sweeps/",
+        json={"strategy_type": "momentum", "grid": {"lookback_period": list(range(1, 101)),
+                                                    "buy_threshold": [1.0 + i / 1000 for i in range(1, 101)]}},
+    )
+    assert too_many.status_code == 400
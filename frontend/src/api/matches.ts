@@ -1,5 +1,6 @@
 import { apiClient } from "./client";
 import type { Match, RunMatchRequest } from "../types/match";
+import { CHART_POINTS } from "../utils/valueHistory";
 
 export const matchesApi = {
   // 获取比赛列表
@@ -11,7 +12,7 @@ export const matchesApi = {
   // 获取比赛详情
   getById: async (id: string, includeLogs = false): Promise<Match> => {
     const response = await apiClient.get(`/api/matches/${id}`, {
-      params: { include_logs: includeLogs },
+      params: { include_logs: includeLogs, points: CHART_POINTS },
     });
     return response.data;
   },
@@ -10,6 +10,7 @@ import {
   ResponsiveContainer,
 } from "recharts";
 import type { MatchParticipant, MatchLogEntry } from "../../types/match";
+import { mergeValueHistories } from "../../utils/valueHistory";
 import styles from "./Chart.module.css";
 
 interface PerformanceChartProps {
@@ -31,27 +32,14 @@ const TOOLTIP_STYLE = {
   padding: "10px 14px",
 };
 
-/** 优先使用 value_history（完整每步数据） */
+/** 优先使用 value_history（每步数据，长比赛为服务端降采样后的点） */
 const buildFromValueHistory = (
   participants: MatchParticipant[],
   initialCapital: number,
-): Record<string, number | string>[] | null => {
-  const withHistory = participants.filter((p) => p.value_history && p.value_history.length > 1);
-  if (withHistory.length === 0) return null;
-  const maxLen = Math.max(...withHistory.map((p) => p.value_history!.length));
-  return Array.from({ length: maxLen }, (_, i) => {
-    const row: Record<string, number | string> = { step: i };
-    participants.forEach((p) => {
-      const name = p.strategy_name || p.strategy_id;
-      const v = p.value_history?.[i];
-      row[name] =
-        v !== undefined
-          ? parseFloat((((v - initialCapital) / initialCapital) * 100).toFixed(3))
-          : 0;
-    });
-    return row;
-  });
-};
+): Record<string, number | string>[] | null =>
+  mergeValueHistories(participants, (v) =>
+    parseFloat((((v - initialCapital) / initialCapital) * 100).toFixed(3)),
+  );
 
 /** 从执行日志构建收益率曲线（备用） */
 const buildFromLogs = (
@@ -140,6 +128,7 @@ export const PerformanceChart: React.FC<PerformanceChartProps> = ({
               stroke={CHART_COLORS[index % CHART_COLORS.length]}
               strokeWidth={2}
               dot={false}
+              connectNulls
               activeDot={{ r: 4, strokeWidth: 0 }}
             />
           ))}
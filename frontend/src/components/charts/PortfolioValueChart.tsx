@@ -10,6 +10,7 @@ import {
   ResponsiveContainer,
 } from "recharts";
 import type { MatchParticipant, MatchLogEntry } from "../../types/match";
+import { mergeValueHistories } from "../../utils/valueHistory";
 import styles from "./Chart.module.css";
 
 interface PortfolioValueChartProps {
@@ -31,24 +32,11 @@ const TOOLTIP_STYLE = {
   padding: "10px 14px",
 };
 
-/** 优先使用 value_history（完整每步数据） */
+/** 优先使用 value_history（每步数据，长比赛为服务端降采样后的点） */
 const buildFromValueHistory = (
   participants: MatchParticipant[],
-  initialCapital: number,
-): Record<string, number | string>[] | null => {
-  const withHistory = participants.filter((p) => p.value_history && p.value_history.length > 1);
-  if (withHistory.length === 0) return null;
-  const maxLen = Math.max(...withHistory.map((p) => p.value_history!.length));
-  return Array.from({ length: maxLen }, (_, i) => {
-    const row: Record<string, number | string> = { step: i };
-    participants.forEach((p) => {
-      const name = p.strategy_name || p.strategy_id;
-      const v = p.value_history?.[i];
-      row[name] = v !== undefined ? parseFloat(v.toFixed(2)) : initialCapital;
-    });
-    return row;
-  });
-};
+): Record<string, number | string>[] | null =>
+  mergeValueHistories(participants, (v) => parseFloat(v.toFixed(2)));
 
 /** 从执行日志构建资金变化曲线（备用） */
 const buildFromLogs = (
@@ -94,7 +82,7 @@ export const PortfolioValueChart: React.FC<PortfolioValueChartProps> = ({
   participants, initialCapital, steps, logs,
 }) => {
   const data =
-    buildFromValueHistory(participants, initialCapital) ??
+    buildFromValueHistory(participants) ??
     (logs && logs.length > 0
       ? buildFromLogs(participants, initialCapital, logs)
       : buildFallback(participants, initialCapital, steps));
@@ -149,6 +137,7 @@ export const PortfolioValueChart: React.FC<PortfolioValueChartProps> = ({
               strokeWidth={2}
               fill={`url(#pv-grad${index})`}
               dot={false}
+              connectNulls
               activeDot={{ r: 4, strokeWidth: 0 }}
             />
           ))}
@@ -157,9 +157,9 @@ export const RunMatchForm: React.FC<RunMatchFormProps> = ({
                   value={config.duration_steps}
                   onChange={(e) => setConfig({ ...config, duration_steps: parseInt(e.target.value) })}
                   className="input"
-                  min="10" max="500" required
+                  min="10" max="10000" required
                 />
-                <p className={styles.fieldHint}>10-500 步，每步代表一个时间周期</p>
+                <p className={styles.fieldHint}>10-10000 步，每步代表一个时间周期</p>
               </div>
 
               <div>
@@ -22,6 +22,7 @@ export interface MatchParticipant {
   max_drawdown?: number;
   sharpe_ratio?: number;
   value_history?: number[];
+  value_history_steps?: number[]; // 降采样时各点对应的步数
 }
 
 export interface MatchConfig {
@@ -32,6 +33,7 @@ export interface MatchConfig {
   market_type?: MarketType;
   market_source?: MarketSource;
   coin_id?: string;
+  market_seed?: number;
 }
 
 export interface ExecutionEntry {
@@ -71,4 +73,5 @@ export interface RunMatchRequest {
   coin_id: string;
   duration_steps: number;
   initial_capital: number;
+  seed?: number;
 }
@@ -0,0 +1,31 @@
+import type { MatchParticipant } from "../types/match";
+
+/** 比赛详情请求的价值序列点数（服务端按 LTTB 降采样，长比赛也只返回约这么多点） */
+export const CHART_POINTS = 500;
+
+/**
+ * 按步数合并各策略的价值序列为图表行。
+ * 降采样后的序列附带 value_history_steps（各点的步数），不同策略选中的步数可能不同，
+ * 某一步缺少的值留空，由图表的 connectNulls 连接。
+ */
+export const mergeValueHistories = (
+  participants: MatchParticipant[],
+  format: (value: number) => number,
+): Record<string, number | string>[] | null => {
+  const withHistory = participants.filter((p) => p.value_history && p.value_history.length > 1);
+  if (withHistory.length === 0) return null;
+  const rows = new Map<number, Record<string, number | string>>();
+  withHistory.forEach((p) => {
+    const name = p.strategy_name || p.strategy_id;
+    p.value_history!.forEach((v, i) => {
+      const step = p.value_history_steps?.[i] ?? i;
+      let row = rows.get(step);
+      if (!row) {
+        row = { step };
+        rows.set(step, row);
+      }
+      row[name] = format(v);
+    });
+  });
+  return Array.from(rows.values()).sort((a, b) => Number(a.step) - Number(b.step));
+};